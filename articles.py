@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import newspaper
+import requests
+from requests.adapters import HTTPAdapter
+
+
+ARTICLE_CACHE_DIR = os.getenv(
+    "ARTICLE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "qiab", "articles")
+)
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+def parse_article(url, html):
+    """Main text of an article page, extracted by newspaper3k."""
+    article = newspaper.Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.text
+
+
+class ArticleFetcher:
+    """
+    Downloads and parses article pages concurrently.
+
+    A download is given up once it has taken `timeout` seconds, even when
+    the page keeps trickling in. At most `per_domain` requests go to the
+    same site at once, and parsed text is kept in `cache_dir` as one JSON
+    file per URL, so a page is only ever downloaded once.
+    """
+
+    def __init__(self, cache_dir=ARTICLE_CACHE_DIR, max_workers=8, per_domain=2, timeout=10):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.per_domain = per_domain
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.domains = {}
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def cached(self, url):
+        try:
+            with open(self._path(url)) as f:
+                return json.load(f)["text"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store(self, url, text):
+        path = self._path(url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"url": url, "text": text}, f)
+        os.replace(tmp, path)
+
+    def _domain_slot(self, url):
+        domain = urlparse(url).netloc.lower()
+        with self.lock:
+            if domain not in self.domains:
+                self.domains[domain] = threading.BoundedSemaphore(self.per_domain)
+            return self.domains[domain]
+
+    def _download(self, url):
+        # The session timeout only bounds each read, the deadline the whole body
+        deadline = time.monotonic() + self.timeout
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            chunks = []
+            for chunk in response.iter_content(chunk_size=None):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"download took longer than {self.timeout}s")
+                chunks.append(chunk)
+        return b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+
+    def fetch(self, url):
+        """Text of the article at `url`, or None if it can't be downloaded or parsed."""
+        text = self.cached(url)
+        if text is not None:
+            return text
+        try:
+            with self._domain_slot(url):
+                html = self._download(url)
+            text = parse_article(url, html)
+        except Exception as e:
+            print(f"cant access the article {url}: {e}")
+            return None
+        self._store(url, text)
+        return text
+
+    def fetch_many(self, urls):
+        """fetch() for every URL in parallel, results in the order of `urls`."""
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            return list(pool.map(self.fetch, urls))
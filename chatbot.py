@@ -1,80 +1,53 @@
-import os
-import re
-import requests
-import yfinance as yf
-import google.generativeai as genai
+import asyncio
+import threading
 from dotenv import load_dotenv
+from llmcache import default_client
+from quantalgo.metrics import stage
+from quotes import default_service
+from resolver import resolve, MIN_CONFIDENCE
 
 
 load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
 
 
-genai.configure(api_key=GEMINI_API_KEY)
-
-
-# to fetch stock price from Yahoo Finance
-def get_stock_price_yahoo(ticker):
-    try:
-        stock = yf.Ticker(ticker)
-        
-        # fetching price from history
-        hist = stock.history(period="1d")
-        if not hist.empty:
-            price = hist["Close"].iloc[-1]
-        else:
-            price = stock.fast_info["last_price"]
-
-        return f"The latest stock price of {ticker} (Yahoo Finance) is {price:.2f}."
-    
-    except Exception as e:
-        return f"Error fetching stock price from Yahoo Finance: {str(e)}"
-
-
-# to fetch stock price from Alpha Vantage API
-def get_stock_price_alpha(ticker):
-    try:
-        url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={ticker}&apikey={ALPHA_VANTAGE_API_KEY}"
-        response = requests.get(url).json()
-        price = response["Global Quote"]["05. price"]
-        return f"The latest stock price of {ticker} (Alpha Vantage) is {price}."
-    except Exception as e:
-        return f"Error fetching stock price from Alpha Vantage: {str(e)}"
-
 #to determine which API to use for stock data
 def get_stock_price(ticker):
-    yahoo_response = get_stock_price_yahoo(ticker)
-    if "Error" not in yahoo_response:
-        return yahoo_response 
-    
-    alpha_response = get_stock_price_alpha(ticker)
-    if "Error" not in alpha_response:
-        return alpha_response 
-    
+    # Yahoo and Alpha Vantage are asked at the same time, the first answer wins
+    quote = default_service().get(ticker)
+    if quote is not None:
+        return f"The latest stock price of {ticker} ({quote['source']}) is {quote['price']:.2f}."
+
     return "Sorry, I couldn't fetch the stock price from any source."
 
-#to query Gemini AI
-def generate_gemini_response(user_input):
-    try:
-        model = genai.GenerativeModel("gemini-1.5-flash") 
-        custom_prompt = """
+ANSWER_MODEL = "gemini-1.5-flash"
+ANSWER_CONFIG = dict(temperature=0.7, top_p=0.95, top_k=40, max_output_tokens=8192)
+
+
+def answer_prompt(user_input):
+    custom_prompt = """
         You are a stock market assistant with deep knowledge of finance, investments, and trading.
         Answer the user's question in a clear and precise manner with relevant financial insights.
         """
 
-        full_prompt = f"{custom_prompt}\n\nUser Query: {user_input}"
+    return f"{custom_prompt}\n\nUser Query: {user_input}"
 
-        generation_config = genai.GenerationConfig(
-            temperature=0.7, top_p=0.95, top_k=40, max_output_tokens=8192
-        )
-
-        response = model.generate_content(full_prompt, generation_config=generation_config)
-        return response.text.strip()
+#to query Gemini AI
+def generate_gemini_response(user_input):
+    try:
+        # Shared client: one model instance and an on-disk cache of answers
+        response = default_client().generate(answer_prompt(user_input), ANSWER_MODEL, ANSWER_CONFIG)
+        return response.strip()
     
     except Exception as e:
         return f"Error with Gemini: {str(e)}"
 
+#same answer, as chunks of text while Gemini is still writing it
+def stream_gemini_response(user_input):
+    try:
+        yield from default_client().stream(answer_prompt(user_input), ANSWER_MODEL, ANSWER_CONFIG)
+    except Exception as e:
+        yield f"Error with Gemini: {str(e)}"
+
 #LLM for intent detection
 def detect_intent(user_input):
     try:
@@ -108,6 +81,8 @@ def extract_ticker(user_input):
             return ticker.upper()  # Return LLM-extracted ticker
 
         # use yahoo finance search but this isn't working
+        import yfinance as yf
+
         search_results = yf.search_tickers(user_input)
 
         if search_results and "quotes" in search_results and len(search_results["quotes"]) > 0:
@@ -120,13 +95,103 @@ def extract_ticker(user_input):
 
 
 
-def main():
+def _write(text):
+    print(text, end="", flush=True)
+
+
+def _start_answer(user_input):
+    """
+    Generate the general answer in a background thread.
+
+    Returns an asyncio queue receiving the chunks (None at the end) and an
+    event that stops generation when the answer turns out not to be needed.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        for chunk in stream_gemini_response(user_input):
+            if stop.is_set():
+                break
+            loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+        loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+    threading.Thread(target=produce, daemon=True).start()
+    return chunks, stop
+
+
+async def _print_answer(chunks, write):
+    while (chunk := await chunks.get()) is not None:
+        write(chunk)
+
+
+async def _price_answer(user_input, quote):
+    if quote is None:
+        ticker = await asyncio.to_thread(extract_ticker, user_input)
+        if not ticker:
+            return "I couldn't find a valid stock ticker in your query. Please try again with a stock symbol (e.g., 'TSLA', 'AAPL')."
+        quote = asyncio.to_thread(get_stock_price, ticker)
+    return await quote
+
+
+async def respond(user_input, write=_write):
+    """
+    Answer one message, writing the reply to `write` as it is produced.
+
+    The quote fetch starts as soon as a ticker is known. When the local
+    resolver isn't sure of the intent, the general answer is generated
+    while Gemini classifies the question and is shown only if it turns out
+    to be a general question.
+    """
+    resolved = resolve(user_input)
+    confident = resolved["confidence"] >= MIN_CONFIDENCE
+    if confident and resolved["intent"] == "general_query":
+        await _print_answer(_start_answer(user_input)[0], write)
+        return
+
+    quote = None
+    if resolved["ticker"]:
+        quote = asyncio.create_task(asyncio.to_thread(get_stock_price, resolved["ticker"]))
+    if confident:
+        write(await _price_answer(user_input, quote))
+        return
+
+    chunks, stop = _start_answer(user_input)
+    intent = (await asyncio.to_thread(detect_intent, user_input)).lower()
+    if intent == "stock_price":
+        stop.set()
+        write(await _price_answer(user_input, quote))
+    else:
+        if quote is not None:
+            quote.cancel()
+        await _print_answer(chunks, write)
+
+
+async def _input(prompt):
+    # input() in a daemon thread, so Ctrl+C doesn't wait for Enter
+    loop = asyncio.get_running_loop()
+    line = loop.create_future()
+
+    def read():
+        try:
+            result = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(lambda: line.done() or line.set_exception(e))
+        else:
+            loop.call_soon_threadsafe(lambda: line.done() or line.set_result(result))
+
+    threading.Thread(target=read, daemon=True).start()
+    return await line
+
+
+async def chat():
     print("\nAI Stock Market Assistant - Chatbot")
     print("Type 'exit' to stop chatting.\n")
 
     while True:
         try:
-            user_input = input("You: ").strip()
+            user_input = (await _input("You: ")).strip()
             
             if not user_input:
                 print("AI: Please enter a question or command.")
@@ -136,25 +201,23 @@ def main():
                 print("\nBye")
                 break
 
-            # Detect intent using Gemini
-            intent = detect_intent(user_input).lower()
-
-            if intent == "stock_price":
-                ticker = extract_ticker(user_input)
-                if ticker:
-                    response = get_stock_price(ticker)
-                else:
-                    response = "I couldn't find a valid stock ticker in your query. Please try again with a stock symbol (e.g., 'TSLA', 'AAPL')."
-            else:
-                response = generate_gemini_response(user_input)  # Uses Gemini for general queries
-            
-            print("AI:", response)
+            _write("AI: ")
+            with stage("chat.respond"):
+                await respond(user_input)
+            print()
 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             print("\nBye")
             break
         except Exception as e:
             print(f"AI: An unexpected error occurred: {str(e)}")
 
+
+def main():
+    try:
+        asyncio.run(chat())
+    except KeyboardInterrupt:
+        print("\nBye")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,202 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from dotenv import load_dotenv
+from quantalgo.metrics import stage, timed
+
+
+load_dotenv()
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "qiab", "llm.sqlite3"))
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 24 * 3600))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+
+def normalize_prompt(prompt):
+    """Collapse the indentation and blank lines that differ between otherwise identical prompts."""
+    return " ".join(prompt.split())
+
+
+class GeminiBackend:
+    """generate_content through google-generativeai, one GenerativeModel per model name."""
+
+    def __init__(self, api_key=None):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY"))
+        self.genai = genai
+        self.models = {}
+
+    def model(self, name):
+        if name not in self.models:
+            self.models[name] = self.genai.GenerativeModel(name)
+        return self.models[name]
+
+    def generate(self, model, prompt, config=None):
+        response = self.model(model).generate_content(prompt, generation_config=config)
+        return response.text
+
+    def stream(self, model, prompt, config=None):
+        for chunk in self.model(model).generate_content(prompt, generation_config=config, stream=True):
+            yield chunk.text
+
+
+class FakeBackend:
+    """
+    Offline stand-in for GeminiBackend.
+
+    `responder(model, prompt, config)` produces the text (default: a fixed
+    "neutral"); every call is recorded in `calls`. `latency` seconds pass
+    before the first word and `chunk_delay` before each streamed word.
+    """
+
+    def __init__(self, responder=None, latency=0.0, chunk_delay=0.0):
+        self.responder = responder or (lambda model, prompt, config: "neutral")
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.calls = []
+
+    def generate(self, model, prompt, config=None):
+        return "".join(self.stream(model, prompt, config))
+
+    def stream(self, model, prompt, config=None):
+        self.calls.append((model, prompt, config))
+        text = self.responder(model, prompt, config)
+        time.sleep(self.latency)
+        for chunk in re.findall(r"\s*\S+\s*", text) or [text]:
+            time.sleep(self.chunk_delay)
+            yield chunk
+
+
+class LLMClient:
+    """
+    Shared LLM access with a persistent response cache.
+
+    Responses are stored in a sqlite file keyed on model, generation config
+    and normalized prompt. Entries expire after `ttl` seconds and the least
+    recently used ones are dropped beyond `max_entries`. Failed calls raise
+    and are never cached.
+    """
+
+    def __init__(self, backend=None, path=CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self._backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, value TEXT, created REAL, last_used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.db.commit()
+
+    @property
+    def backend(self):
+        # Created on first use so cache hits never touch the network client
+        if self._backend is None:
+            self._backend = GeminiBackend()
+        return self._backend
+
+    def _key(self, *parts):
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _get(self, key, ttl):
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] + ttl >= now:
+                self.db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                self.db.commit()
+                self.hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def _put(self, key, value):
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                            (key, json.dumps(value), now, now))
+            self.db.execute("DELETE FROM responses WHERE created + ? < ?", (self.ttl, now))
+            self.db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+            self.db.commit()
+
+    def memoize(self, name, args, compute, ttl=None, keep=None):
+        """
+        Cached result of `compute()` for (name, args), for work around an LLM
+        call that is itself expensive, like scraping the articles to analyze.
+        The result must be JSON serializable. A result `keep(result)` rejects
+        is returned without being cached.
+        """
+        key = self._key("memo", name, args)
+        value = self._get(key, self.ttl if ttl is None else ttl)
+        if value is None:
+            value = compute()
+            if keep is None or keep(value):
+                self._put(key, value)
+        return value
+
+    @timed("llm.generate")
+    def generate(self, prompt, model=DEFAULT_MODEL, config=None):
+        """Response text for `prompt`, from the cache when an identical request was answered before."""
+        key = self._key("generate", model, config, normalize_prompt(prompt))
+        text = self._get(key, self.ttl)
+        if text is None:
+            with stage("llm.backend"):
+                text = self.backend.generate(model, prompt, config)
+            self._put(key, text)
+        return text
+
+    def stream(self, prompt, model=DEFAULT_MODEL, config=None):
+        """
+        generate() as an iterator of text chunks, yielded as the backend
+        produces them. A cached answer comes back as one chunk; a stream that
+        is abandoned half way is not cached.
+        """
+        key = self._key("generate", model, config, normalize_prompt(prompt))
+        text = self._get(key, self.ttl)
+        if text is not None:
+            yield text
+            return
+        chunks = []
+        # Includes the time the caller spends on each chunk
+        with stage("llm.stream"):
+            for chunk in self.backend.stream(model, prompt, config):
+                chunks.append(chunk)
+                yield chunk
+        self._put(key, "".join(chunks))
+
+    def stats(self):
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0, "entries": entries}
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM responses")
+            self.db.commit()
+
+
+_default_client = None
+
+
+def default_client():
+    global _default_client
+    if _default_client is None:
+        _default_client = LLMClient()
+    return _default_client
@@ -1,38 +1,34 @@
-import newspaper 
 from googlesearch import search as SEARCHH
-import os
-import google.generativeai as genai
+from articles import ArticleFetcher
+from llmcache import default_client
+from sentiment import analyze, scored
 
-key= os.environ.get('GOOGLE_API_KEY')
-# # Set up your API key
-genai.configure(api_key=key)
 
-# # Select the Gemini model
-model = genai.GenerativeModel("gemini-2.0-flash")
+def sentimentAnalysis(query):
+    # The same query within a day neither re-scrapes nor re-asks Gemini. A
+    # scrape that scored nothing isn't cached, so a passing outage isn't
+    # remembered as a neutral answer for the whole day.
+    return default_client().memoize("news_sentiment:analyze", query, lambda: _sentimentAnalysis(query),
+                                    keep=scored)
 
 
+def search_urls(query, num_results=10):
+    # The first two results are skipped, as before
+    return list(SEARCHH(query,num_results=num_results))[2:]
 
-def sentimentAnalysis(query):
-    num=0
-    results=""
-    for j in SEARCHH(query,num_results=10):
-        num+=1
-        if(num>2):
-            try:
-                article=newspaper.Article(j)
-                article.download()
-                article.parse()
-                print(article.text)
-                results+=article.text
-                print("---------------------------------------------------")
-            except(newspaper.article.ArticleException):
-                print("cant access the article")
-
-    # generate("Perform sentiment analysis on this: \n"+results)
-    response = model.generate_content("Perform sentiment analysis:\n"+results+"\n return bullish neutral or bearish, just 1 word")
-    # return response
-    return response.text
-
-message=input("enter which company ka sentiment analysis: ")
-print(sentimentAnalysis("news about stocks of "+message))
 
+def _sentimentAnalysis(query):
+    urls=search_urls(query)
+    results=[]
+    for text in ArticleFetcher().fetch_many(urls):
+        if text is not None:
+            print(text)
+            results.append(text)
+            print("---------------------------------------------------")
+
+    # label and confidence, from deduplicated articles scored chunk by chunk
+    return analyze(results, subject=query)
+
+if __name__ == "__main__":
+    message=input("enter which company ka sentiment analysis: ")
+    print(sentimentAnalysis("news about stocks of "+message))
@@ -0,0 +1,398 @@
+import re
+import numpy as np
+import pandas as pd
+
+from quantalgo.pricestore import fetch_history
+from resolver import TickerIndex, default_index, read_tickers
+
+
+TRADING_DAYS = 252
+OBJECTIVES = ("mean_variance", "min_variance", "risk_parity")
+
+# Words users use for the sectors of the ticker file
+SECTOR_ALIASES = {
+    "it": "Technology", "tech": "Technology", "technology": "Technology", "software": "Technology",
+    "semiconductor": "Technology", "semiconductors": "Technology", "chips": "Technology",
+    "communication": "Communication", "communications": "Communication", "media": "Communication",
+    "telecom": "Communication", "entertainment": "Communication",
+    "consumer": "Consumer", "fmcg": "Consumer", "retail": "Consumer", "food": "Consumer", "beverages": "Consumer",
+    "auto": "Automobile", "autos": "Automobile", "automobile": "Automobile", "automobiles": "Automobile",
+    "automotive": "Automobile", "cars": "Automobile", "ev": "Automobile",
+    "bank": "Financials", "banks": "Financials", "banking": "Financials", "finance": "Financials",
+    "financial": "Financials", "financials": "Financials", "insurance": "Financials", "fintech": "Financials",
+    "health": "Healthcare", "healthcare": "Healthcare", "pharma": "Healthcare", "pharmaceuticals": "Healthcare",
+    "energy": "Energy", "oil": "Energy", "gas": "Energy", "oil and gas": "Energy",
+    "industrials": "Industrials", "industrial": "Industrials", "infrastructure": "Industrials",
+    "infra": "Industrials", "aerospace": "Industrials",
+    "materials": "Materials", "metals": "Materials", "steel": "Materials", "cement": "Materials",
+    "chemicals": "Materials",
+    "utilities": "Utilities", "power": "Utilities",
+}
+
+
+def canonical_sector(name):
+    """Sector of the ticker file meant by `name` ("IT", "banks", "pharma"), or None."""
+    name = " ".join(name.lower().replace("&", " and ").split())
+    if name in SECTOR_ALIASES:
+        return SECTOR_ALIASES[name]
+    sectors = {row["sector"].lower(): row["sector"] for row in read_tickers()}
+    return sectors.get(name)
+
+
+def joined_names():
+    """Sector and company names with an "and" in them ("oil and gas", "procter and gamble"), longest first."""
+    names = {alias for alias in SECTOR_ALIASES if " and " in alias}
+    for row in read_tickers():
+        for name in [row["name"], row["sector"]] + row["aliases"].split("|"):
+            name = " ".join(name.lower().replace("&", " and ").rstrip(".").split())
+            if " and " in name:
+                names.add(name)
+    return sorted(names, key=len, reverse=True)
+
+
+def sector_universe(sectors, market=None):
+    """
+    Candidate symbols and their sectors for the sectors (or company names)
+    a user listed. `market` "US" or "IN" keeps one exchange only.
+    """
+    rows = read_tickers()
+    index = TickerIndex(rows)
+    sector_of = {row["symbol"]: row["sector"] for row in rows}
+    chosen = {}
+    for name in sectors:
+        sector = canonical_sector(name)
+        if sector is not None:
+            chosen.update((row["symbol"], sector) for row in rows if row["sector"] == sector)
+        else:
+            chosen.update((symbol, sector_of[symbol]) for symbol in index.find(name))
+    if market == "US":
+        chosen = {s: sector for s, sector in chosen.items() if "." not in s}
+    elif market == "IN":
+        chosen = {s: sector for s, sector in chosen.items() if s.endswith(".NS")}
+    return chosen
+
+
+def load_returns(symbols, period="2y"):
+    """Daily returns of `symbols` from the local price store, on the dates all of them traded."""
+    closes = {}
+    for symbol in symbols:
+        df = fetch_history(symbol, period=period)
+        if df.empty:
+            print(f"Error fetching data: No data retrieved for {symbol}")
+            continue
+        # Exchanges in different time zones are aligned on the calendar date
+        closes[symbol] = df["Close"].set_axis(pd.DatetimeIndex(df.index.date))
+    prices = pd.DataFrame(closes).sort_index().ffill()
+    return prices.pct_change().dropna()
+
+
+def _crossing(taus, totals, target):
+    """Where the decreasing piecewise-linear totals(taus) passes `target`."""
+    k = int(np.searchsorted(-totals, -target))
+    if k == 0:
+        return taus[0]
+    if k == len(taus):
+        return taus[-1]
+    t0, t1, s0, s1 = taus[k - 1], taus[k], totals[k - 1], totals[k]
+    return t0 if s0 == s1 else t0 + (s0 - target) * (t1 - t0) / (s0 - s1)
+
+
+def project_box_simplex(v, lo, hi, total=1.0):
+    """Euclidean projection of `v` onto {sum(w) = total, lo <= w <= hi}."""
+    # sum(clip(v - tau, lo, hi)) is piecewise linear and decreasing in tau,
+    # with its kinks at v - hi and v - lo
+    kinks = np.sort(np.concatenate([v - hi, v - lo]))
+    tau = _crossing(kinks, np.clip(v[None, :] - kinks[:, None], lo, hi).sum(axis=1), total)
+    return np.clip(v - tau, lo, hi)
+
+
+def project_grouped(v, lo, hi, groups, floors, caps):
+    """
+    Euclidean projection of `v` onto {sum(w) = 1, lo <= w <= hi,
+    floors[g] <= sum of group g <= caps[g]} for disjoint groups.
+
+    The solution is clip(v - tau, lo, hi) inside every group whose total
+    stays within its bounds, and a projection onto the clamped total inside
+    the others, for one shared shift tau.
+    """
+    onehot = np.eye(len(caps))[groups]
+    # Group totals are linear between the kinks of the single weights...
+    kinks = np.sort(np.concatenate([v - hi, v - lo]))
+    sums = np.clip(v[None, :] - kinks[:, None], lo, hi) @ onehot
+    totals = np.clip(sums, floors, caps).sum(axis=1)
+    k = min(max(int(np.searchsorted(-totals, -1.0)), 1), len(kinks) - 1)
+
+    # ...and between two of those, the clamped totals only bend where a
+    # group total reaches its floor or cap
+    t0, t1 = kinks[k - 1], kinks[k]
+    slopes = (sums[k] - sums[k - 1]) / (t1 - t0) if t1 > t0 else np.zeros(len(caps))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bends = t0 + (np.concatenate([floors, caps]) - np.tile(sums[k - 1], 2)) / np.tile(slopes, 2)
+    taus = np.sort(np.concatenate([[t0, t1], bends[(bends > t0) & (bends < t1)]]))
+    totals = np.clip(sums[k - 1] + np.outer(taus - t0, slopes), floors, caps).sum(axis=1)
+    tau = _crossing(taus, totals, 1.0)
+
+    w = np.clip(v - tau, lo, hi)
+    sums = w @ onehot
+    for g in np.flatnonzero((sums < floors) | (sums > caps)):
+        mask = groups == g
+        w[mask] = project_box_simplex(v[mask], lo[mask], hi[mask], np.clip(sums[g], floors[g], caps[g]))
+    return w
+
+
+class PortfolioOptimizer:
+    """
+    Long-only allocation over a fixed set of stocks.
+
+    Expected returns and a shrunk covariance are estimated once from daily
+    returns. Constraints (per-stock caps, sector caps and floors, excluded
+    names) can then be changed and re-solved from the previous weights, which
+    takes milliseconds.
+    """
+
+    def __init__(self, returns, sectors, objective="mean_variance", risk_aversion=3.0, shrinkage=0.1,
+                 max_weight=0.25):
+        self.symbols = list(returns.columns)
+        values = returns.to_numpy()
+        self.mu = values.mean(axis=0) * TRADING_DAYS
+        cov = np.atleast_2d(np.cov(values, rowvar=False)) * TRADING_DAYS
+        self.cov = (1 - shrinkage) * cov + shrinkage * np.diag(np.diag(cov))
+        self.max_eig = np.linalg.eigvalsh(self.cov)[-1]
+        self.sectors = np.array([sectors.get(symbol, "Other") for symbol in self.symbols])
+        self.objective = objective
+        self.risk_aversion = risk_aversion
+        # Diversified by default, as long as the stocks can fill the portfolio
+        self.max_weight = max(max_weight, 1 / len(self.symbols))
+        self.stock_caps = {}
+        self.sector_caps = {}
+        self.sector_floors = {}
+        self.weights = None
+
+    @classmethod
+    def from_sectors(cls, sectors, period="2y", market=None, **kwargs):
+        universe = sector_universe(sectors, market)
+        returns = load_returns(list(universe), period)
+        if returns.empty:
+            raise ValueError("No price history for the requested sectors")
+        return cls(returns, universe, **kwargs)
+
+    def _bounds(self):
+        hi = np.full(len(self.symbols), float(self.max_weight))
+        for symbol, cap in self.stock_caps.items():
+            i = self.symbols.index(symbol)
+            hi[i] = min(hi[i], cap)
+        if hi.sum() < 1:
+            raise ValueError("The caps leave no way to invest the whole amount")
+        return np.zeros(len(self.symbols)), hi
+
+    def projector(self):
+        """Function mapping weights to the nearest weights satisfying every constraint."""
+        lo, hi = self._bounds()
+        if not self.sector_caps and not self.sector_floors:
+            return lambda w: project_box_simplex(w, lo, hi)
+
+        names, groups = np.unique(self.sectors, return_inverse=True)
+        caps = np.bincount(groups, hi, len(names))
+        floors = np.zeros(len(names))
+        for g, name in enumerate(names):
+            caps[g] = min(caps[g], self.sector_caps.get(name, 1.0))
+            floors[g] = min(self.sector_floors.get(name, 0.0), caps[g])
+        if floors.sum() > 1 or caps.sum() < 1:
+            raise ValueError("The sector limits leave no way to invest the whole amount")
+        return lambda w: project_grouped(w, lo, hi, groups, floors, caps)
+
+    def _quadratic(self, mu, gamma, iterations=2000, tol=1e-9):
+        """
+        Maximize mu'w - gamma/2 w'Cw over the constraints by accelerated
+        projected gradient, restarting the momentum whenever it overshoots.
+        """
+        project = self.projector()
+        step = 1.0 / (gamma * self.max_eig)
+        w = project(self.weights if self.weights is not None else np.full(len(mu), 1 / len(mu)))
+        y, t = w, 1.0
+        for _ in range(iterations):
+            w_next = project(y + step * (mu - gamma * self.cov @ y))
+            if np.abs(w_next - w).max() < tol:
+                return w_next
+            if (y - w_next) @ (w_next - w) > 0:
+                t = 1.0
+            t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            y = w_next + (t - 1) / t_next * (w_next - w)
+            w, t = w_next, t_next
+        return w
+
+    def _risk_parity(self, iterations=500, tol=1e-10):
+        """Equal risk contributions by cyclical coordinate descent, then moved into the constraints."""
+        _, hi = self._bounds()
+        active = np.flatnonzero(hi > 0)
+        cov = self.cov[np.ix_(active, active)]
+        budget = 1.0 / len(active)
+        y = 1 / np.sqrt(np.diag(cov))
+        for _ in range(iterations):
+            previous = y.copy()
+            for i in range(len(y)):
+                a = cov[i, i]
+                b = cov[i] @ y - a * y[i]
+                y[i] = (-b + np.sqrt(b * b + 4 * a * budget)) / (2 * a)
+            if np.abs(y - previous).max() < tol * y.max():
+                break
+        w = np.zeros(len(self.symbols))
+        w[active] = y / y.sum()
+        return self.projector()(w)
+
+    def solve(self):
+        """Weights for the current objective and constraints, as a Series."""
+        if self.objective == "risk_parity":
+            w = self._risk_parity()
+        elif self.objective == "min_variance":
+            w = self._quadratic(np.zeros(len(self.symbols)), 1.0)
+        elif self.objective == "mean_variance":
+            w = self._quadratic(self.mu, self.risk_aversion)
+        else:
+            raise ValueError(f"Unknown objective: {self.objective}")
+        w[w < 1e-6] = 0.0
+        self.weights = w / w.sum()
+        return pd.Series(self.weights, index=self.symbols)
+
+    def summary(self):
+        """Weight, sector, expected return, volatility and risk contribution of every holding."""
+        w = self.weights
+        risk = self.cov @ w
+        table = pd.DataFrame({
+            "weight": w,
+            "sector": self.sectors,
+            "expected_return": self.mu,
+            "volatility": np.sqrt(np.diag(self.cov)),
+            "risk_contribution": w * risk / (w @ risk),
+        }, index=self.symbols)
+        return table[table["weight"] > 0].sort_values("weight", ascending=False)
+
+    def portfolio_stats(self):
+        w = self.weights
+        return {"expected_return": float(self.mu @ w), "volatility": float(np.sqrt(w @ self.cov @ w))}
+
+    def _targets(self, phrase):
+        """Sectors or held symbols named in `phrase`."""
+        sector = canonical_sector(phrase)
+        if sector is not None:
+            return [("sector", sector)]
+        symbols = [s for s in default_index().find(phrase) if s in self.symbols]
+        return [("stock", symbol) for symbol in symbols]
+
+    def _weight_of(self, kind, name):
+        if self.weights is None:
+            return 0.0
+        if kind == "sector":
+            return float(self.weights[self.sectors == name].sum())
+        return float(self.weights[self.symbols.index(name)])
+
+    def _set_cap(self, kind, name, cap):
+        if kind == "sector":
+            self.sector_caps[name] = cap
+            self.sector_floors.pop(name, None)
+        else:
+            self.stock_caps[name] = cap
+
+    def _check_held(self, sector):
+        # Floors only move weight between the portfolio's own stocks
+        if sector not in self.sectors:
+            raise ValueError(f"the portfolio holds no {sector} stocks to put more into")
+
+    def apply_edit(self, text):
+        """
+        Turn an edit request ("less IT, cap any stock at 10%", "no Tesla",
+        "at least 20% in pharma", "safer") into constraint or objective
+        changes. Returns a description of every change; empty when nothing in
+        `text` was understood. Edits that leave no feasible portfolio, or ask
+        for more of a sector the portfolio holds nothing of, are undone and
+        raise ValueError.
+        """
+        saved = (dict(self.stock_caps), dict(self.sector_caps), dict(self.sector_floors), self.max_weight,
+                 self.objective, self.risk_aversion)
+        try:
+            changes = self._apply_clauses(text)
+            self.projector()
+        except ValueError:
+            (self.stock_caps, self.sector_caps, self.sector_floors, self.max_weight,
+             self.objective, self.risk_aversion) = saved
+            raise
+        return changes
+
+    def _apply_clauses(self, text):
+        changes = []
+        # "and" inside a name doesn't split it; both lookups read "&" as "and"
+        text = " ".join(text.lower().replace("&", " and ").split())
+        for name in joined_names():
+            text = re.sub(rf"\b{re.escape(name)}\b", name.replace(" and ", " & "), text)
+        for clause in re.split(r",|;|\band\b|\bbut\b|\.\s", text):
+            clause = clause.strip()
+            if not clause:
+                continue
+
+            match = re.search(r"(?:cap|limit|max(?:imum)?|at most|no more than)\s+(?:any|each|every|all|a|one|single)?"
+                              r"\s*(?:stock|position|holding|name)s?\s+(?:at|to)?\s*(\d+(?:\.\d+)?)\s*%", clause)
+            if match:
+                self.max_weight = float(match.group(1)) / 100
+                changes.append(f"every stock capped at {match.group(1)}%")
+                continue
+
+            match = re.search(r"(at most|max(?:imum)?|no more than|cap|limit|at least|min(?:imum)?)\s+(?:of\s+)?"
+                              r"(\d+(?:\.\d+)?)\s*%\s*(?:in|on|to|for|of)\s+(.+)", clause)
+            if match:
+                amount = float(match.group(2)) / 100
+                for kind, name in self._targets(match.group(3)):
+                    if match.group(1).startswith(("at least", "min")):
+                        if kind == "sector":
+                            self._check_held(name)
+                            self.sector_floors[name] = amount
+                            changes.append(f"at least {match.group(2)}% in {name}")
+                    else:
+                        self._set_cap(kind, name, amount)
+                        changes.append(f"at most {match.group(2)}% in {name}")
+                continue
+
+            match = re.search(r"\b(no|remove|exclude|drop|without|sell|avoid)\s+(.+)", clause)
+            if match:
+                for kind, name in self._targets(match.group(2)):
+                    self._set_cap(kind, name, 0.0)
+                    changes.append(f"no {name}")
+                continue
+
+            match = re.search(r"\b(less|reduce|lower|cut|underweight|decrease)\s+(.+)", clause)
+            if match and match.group(2).strip() not in ("risk", "risky", "volatile", "volatility"):
+                for kind, name in self._targets(match.group(2)):
+                    cap = round(self._weight_of(kind, name) / 2, 4)
+                    self._set_cap(kind, name, cap)
+                    changes.append(f"{name} cut to at most {cap:.1%}")
+                continue
+
+            match = re.search(r"\b(more|increase|overweight|add)\s+(.+)", clause)
+            if match and match.group(2).strip() not in ("risk", "return", "returns", "aggressive"):
+                for kind, name in self._targets(match.group(2)):
+                    if kind == "sector":
+                        self._check_held(name)
+                        floor = round(min(self._weight_of(kind, name) + 0.1, 1.0), 4)
+                        self.sector_floors[name] = floor
+                        self.sector_caps.pop(name, None)
+                        changes.append(f"{name} raised to at least {floor:.1%}")
+                    else:
+                        self.stock_caps.pop(name, None)
+                        changes.append(f"{name} uncapped")
+                continue
+
+            if re.search(r"risk parity|equal risk", clause):
+                self.objective = "risk_parity"
+                changes.append("risk parity weights")
+            elif re.search(r"min(?:imum)?[ -]variance|lowest risk|least volatile", clause):
+                self.objective = "min_variance"
+                changes.append("minimum variance weights")
+            elif re.search(r"mean[ -]variance|max(?:imum)? return|best return", clause):
+                self.objective = "mean_variance"
+                changes.append("mean-variance weights")
+            elif re.search(r"safer|less risk|lower risk|conservative|less volatile|less volatility", clause):
+                self.risk_aversion *= 2
+                changes.append(f"risk aversion raised to {self.risk_aversion:g}")
+            elif re.search(r"aggressive|more risk|higher return|more return", clause):
+                self.risk_aversion /= 2
+                changes.append(f"risk aversion lowered to {self.risk_aversion:g}")
+        return changes
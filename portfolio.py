@@ -1,10 +1,11 @@
-import google.generativeai as genai
 import json
 import os
 from dotenv import load_dotenv
+from llmcache import default_client
+from optimizer import PortfolioOptimizer
+from resolver import read_tickers
+from valuation import describe, value_portfolio
 load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
 def generate_investment_portfolio(investment_amount, sectors):
     """
     Generates an investment portfolio based on user-provided amount and sectors using Gemini.
@@ -17,8 +18,6 @@ def generate_investment_portfolio(investment_amount, sectors):
         str: A JSON string containing the portfolio recommendations.
     """
 
-    model = genai.GenerativeModel('gemini-2.0-flash')
-
     prompt = f"""
     Given an investment amount of ${investment_amount} and the following sectors: {', '.join(sectors)}, 
     generate a diversified investment portfolio. 
@@ -41,8 +40,7 @@ def generate_investment_portfolio(investment_amount, sectors):
     """
 
     try:
-        response = model.generate_content(prompt)
-        json_output = response.text.strip()
+        json_output = default_client().generate(prompt, 'gemini-2.0-flash').strip()
         return json_output
     except Exception as e:
         return f"Error generating portfolio: {e}"
@@ -51,8 +49,6 @@ def generate_investment_portfolio(investment_amount, sectors):
 
 def generate_investment_portfolio_edit(existing_portfolio,prompt):
 
-    model = genai.GenerativeModel('gemini-2.0-flash')
-
     promptpassed = f"""
     Given an existing portfolio,\n{existing_portfolio}
     
@@ -62,12 +58,79 @@ def generate_investment_portfolio_edit(existing_portfolio,prompt):
     """
 
     try:
-        response = model.generate_content(promptpassed)
-        json_output = response.text.strip()
+        json_output = default_client().generate(promptpassed, 'gemini-2.0-flash').strip()
         return json_output
     except Exception as e:
         return f"Error generating portfolio: {e}"
 
+def explain_allocation(optimizer, investment_amount):
+    """
+    Portfolio JSON for the optimizer's current weights, with Gemini asked
+    only for a one-line reason per stock.
+    """
+    table = optimizer.summary()
+    names = {row["symbol"]: row["name"] for row in read_tickers()}
+    lines = "\n".join(
+        f"{symbol} ({names.get(symbol, symbol)}), {row.sector}: {row.weight:.1%}, expected return "
+        f"{row.expected_return:.1%}, volatility {row.volatility:.1%}, risk share {row.risk_contribution:.1%}"
+        for symbol, row in table.iterrows()
+    )
+    prompt = f"""
+    An investment of ${investment_amount} was allocated by a {optimizer.objective.replace('_', '-')} optimizer:
+    {lines}
+
+    Give a brief reason for holding each stock at its weight.
+    Return just JSON mapping each ticker to its reason, like {{"AAPL": "reason"}}.
+    """
+    try:
+        answer = default_client().generate(prompt, 'gemini-2.0-flash')
+        reasons = json.loads(answer[answer.index("{"):answer.rindex("}") + 1])
+    except Exception as e:
+        print(f"Error generating reasons: {e}")
+        reasons = {}
+
+    portfolio = [{
+        "sector": row.sector,
+        "stock": f"{symbol} ({names.get(symbol, symbol)})",
+        "percentage": f"{row.weight:.2%}",
+        "amount": round(investment_amount * row.weight, 2),
+        "reason": reasons.get(symbol, ""),
+    } for symbol, row in table.iterrows()]
+    return json.dumps({"portfolio": portfolio, **optimizer.portfolio_stats()}, indent=4)
+
+
+def generate_optimized_portfolio(investment_amount, sectors, objective="mean_variance", period="2y"):
+    """
+    Portfolio over the stocks of `sectors` weighted from their price history
+    by `optimizer.py`. Returns (optimizer, JSON string); keep the optimizer
+    for edits.
+    """
+    optimizer = PortfolioOptimizer.from_sectors(sectors, period, objective=objective)
+    optimizer.solve()
+    return optimizer, explain_allocation(optimizer, investment_amount)
+
+
+def edit_optimized_portfolio(optimizer, investment_amount, prompt):
+    """
+    Apply an edit request as constraint changes and re-solve. Returns the
+    new JSON string, or None if the request wasn't understood.
+    """
+    changes = optimizer.apply_edit(prompt)
+    if not changes:
+        return None
+    print("Applied: " + ", ".join(changes))
+    optimizer.solve()
+    return explain_allocation(optimizer, investment_amount)
+
+
+def show_orders(portfolio_json, investment_amount):
+    """Print the whole-share orders that invest `investment_amount` in the portfolio at current prices."""
+    try:
+        print(describe(value_portfolio(portfolio_json, cash=investment_amount)))
+    except Exception as e:
+        print(f"Error valuing portfolio: {e}")
+
+
 def main():
     """
     Main function to interact with the user and generate the portfolio.
@@ -78,11 +141,28 @@ def main():
         sectors_input = input("Enter the sectors you want to invest in (separate using ','): ")
         sectors = [sector.strip() for sector in sectors_input.split(',')]
 
-        portfolio_json = generate_investment_portfolio(investment_amount, sectors)
-        print(portfolio_json)
-        prompt=input("Enter what changes do you want?")
-        portfolio_json=generate_investment_portfolio_edit(portfolio_json,prompt)
+        try:
+            optimizer, portfolio_json = generate_optimized_portfolio(investment_amount, sectors)
+        except Exception as e:
+            print(f"Optimizer unavailable ({e}), asking Gemini instead.")
+            optimizer, portfolio_json = None, generate_investment_portfolio(investment_amount, sectors)
         print(portfolio_json)
+        show_orders(portfolio_json, investment_amount)
+
+        while True:
+            prompt = input("Enter what changes do you want? (blank to finish) ")
+            if not prompt.strip():
+                break
+            edited = None
+            if optimizer is not None:
+                try:
+                    edited = edit_optimized_portfolio(optimizer, investment_amount, prompt)
+                except ValueError as e:
+                    print(f"Can't apply that: {e}")
+                    continue
+            portfolio_json = edited or generate_investment_portfolio_edit(portfolio_json, prompt)
+            print(portfolio_json)
+            show_orders(portfolio_json, investment_amount)
 
     except ValueError:
         print("Invalid input. Please enter a valid number for the investment amount.")
@@ -90,4 +170,4 @@ def main():
         print(f"An unexpected error occurred: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,7 +1,11 @@
 package main
 
 import (
+	"encoding/binary"
 	"fmt"
+	"net"
+	"os"
+	"strings"
 
 	kiteconnect "github.com/zerodha/gokiteconnect/v4"
 	kitemodels "github.com/zerodha/gokiteconnect/v4/models"
@@ -16,6 +20,35 @@ var (
 	instrument_tokens = []uint32{281854981}
 )
 
+// Ticks are forwarded to the Python ingestor (quantalgo/ticks.py) in its
+// TICK_DTYPE layout: 32 little-endian bytes per tick
+var tickFeed net.Conn
+
+type tickRecord struct {
+	Token    uint32
+	Quantity uint32
+	Time     float64
+	Price    float64
+	Volume   uint64
+}
+
+func connect_tick_feed() {
+	address := os.Getenv("TICK_FEED_ADDR")
+	if address == "" {
+		return
+	}
+	network := "tcp"
+	if strings.HasPrefix(address, "unix:") {
+		network, address = "unix", strings.TrimPrefix(address, "unix:")
+	}
+	conn, err := net.Dial(network, address)
+	if err != nil {
+		fmt.Println("Tick feed error: ", err)
+		return
+	}
+	tickFeed = conn
+}
+
 func onError(err error) {
 	fmt.Println("Error: ", err)
 }
@@ -38,7 +71,22 @@ func onConnect() {
 }
 
 func onTick(tick kitemodels.Tick) {
-	fmt.Println("Tick: ", tick)
+	if tickFeed == nil {
+		fmt.Println("Tick: ", tick)
+		return
+	}
+	record := tickRecord{
+		Token:    tick.InstrumentToken,
+		Quantity: tick.LastTradedQuantity,
+		Time:     float64(tick.Timestamp.UnixNano()) / 1e9,
+		Price:    tick.LastPrice,
+		Volume:   uint64(tick.VolumeTraded),
+	}
+	if err := binary.Write(tickFeed, binary.LittleEndian, record); err != nil {
+		fmt.Println("Tick feed error: ", err)
+		tickFeed.Close()
+		tickFeed = nil
+	}
 }
 
 func onOrderUpdate(order kiteconnect.Order) {
@@ -57,6 +105,7 @@ func start_ticker() {
 	ticker.OnConnect(onConnect)
 	ticker.OnTick(onTick)
 	ticker.OnOrderUpdate(onOrderUpdate)
+	connect_tick_feed()
 
 	fmt.Println("Started ticker")
 	go ticker.Serve()
@@ -39,6 +39,12 @@ JSON Request form required
 	"validity" : string -> DAY/IOC
 	"variety" : string
 */
+func write_json(w http.ResponseWriter, status int, v any) {
+	w.Header().Set("Content-Type", "application/json")
+	w.WriteHeader(status)
+	json.NewEncoder(w).Encode(v)
+}
+
 func place_order(w http.ResponseWriter, r *http.Request) {
 	fmt.Printf("Placing an order\n")
 	
@@ -47,6 +53,7 @@ func place_order(w http.ResponseWriter, r *http.Request) {
 
 	if err != nil {
 		fmt.Printf("POST /order Error: %v\n", err)
+		write_json(w, http.StatusBadRequest, map[string]string{"error": err.Error()})
 		return
 	}
 
@@ -57,6 +64,7 @@ func place_order(w http.ResponseWriter, r *http.Request) {
 
 	if err != nil {
 		fmt.Println("Failed to marshall json string")
+		write_json(w, http.StatusBadRequest, map[string]string{"error": err.Error()})
 		return
 	}
 	
@@ -64,7 +72,8 @@ func place_order(w http.ResponseWriter, r *http.Request) {
 	exchange, ok := result["exchange"].(string)
 	trading_symbol, ok := result["trading_symbol"].(string)
 	transaction_type, ok := result["transaction_type"].(string)
-	quantity, ok := result["quantity"].(int)
+	// JSON numbers decode as float64
+	quantity, ok := result["quantity"].(float64)
 	product, ok := result["product"].(string)
 	order_type, ok := result["order_type"].(string)
 	validity, ok := result["validity"].(string)
@@ -77,23 +86,25 @@ func place_order(w http.ResponseWriter, r *http.Request) {
 		Exchange: exchange,
 		Tradingsymbol: trading_symbol,
 		TransactionType: strings.ToUpper(transaction_type),
-		Quantity: quantity,
+		Quantity: int(quantity),
 		Product: product,
 		OrderType: order_type,
 		Validity: validity,
 	}
 
-	_, err = g_kc.PlaceOrder(
+	resp, err := g_kc.PlaceOrder(
 		variety,
 		orderParams,
 	)
 
 	if err != nil {
 		fmt.Println("Failed to place order")
+		write_json(w, http.StatusBadGateway, map[string]string{"error": err.Error()})
 		return
 	}
 
 	fmt.Println("Successfuly placed order")
+	write_json(w, http.StatusCreated, map[string]string{"order_id": resp.OrderID})
 }
 
 func get_orders(w http.ResponseWriter, r *http.Request) {
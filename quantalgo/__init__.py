@@ -0,0 +1,58 @@
+"""
+Backtests, indicators and live trading tools for QuantInABox.
+
+Submodules and the names below are imported on first use, so
+`import quantalgo` costs nothing until something is actually needed:
+
+    import quantalgo
+    df = quantalgo.fetch_history("TCS.NS")
+    df, gains = quantalgo.run_adaptive_backtest(quantalgo.backtestm.calculate_advanced_indicators(df))
+
+`python -m quantalgo` lists the command line tools.
+"""
+import importlib
+
+
+SUBMODULES = (
+    "backtestm", "benchmark", "breakout", "charts", "chunked", "cli", "engine", "execution", "indicators",
+    "metrics", "montecarlo", "pairs", "pricestore", "rsi", "sharedmem", "streaming", "sweep", "test",
+    "ticks", "universe", "walkforward",
+)
+
+# Public name -> submodule defining it
+EXPORTS = {
+    "PriceStore": "pricestore",
+    "default_store": "pricestore",
+    "fetch_history": "pricestore",
+    "run_adaptive_backtest": "engine",
+    "close_matrix": "universe",
+    "screen_universe": "universe",
+    "scan_pairs": "pairs",
+    "monte_carlo": "montecarlo",
+    "walk_forward": "walkforward",
+    "run_chunked_backtest": "chunked",
+    "AdvancedSignal": "streaming",
+    "SignalBook": "streaming",
+    "ExecutionLoop": "execution",
+    "downsample": "charts",
+    "render_report": "charts",
+    "stage": "metrics",
+    "timed": "metrics",
+}
+
+__all__ = sorted(EXPORTS) + list(SUBMODULES)
+
+
+def __getattr__(name):
+    if name in EXPORTS:
+        value = getattr(importlib.import_module(f".{EXPORTS[name]}", __name__), name)
+    elif name in SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
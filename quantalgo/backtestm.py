@@ -1,13 +1,17 @@
-import yfinance as yf
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from .pricestore import fetch_history
+from .engine import run_adaptive_backtest
+from .indicators import sma, rsi, macd, combined_signal
+from .metrics import timed
+from .charts import downsample, figure, finish, output_path
 
+@timed("backtest.fetch_data")
 def fetch_data(symbol, period="2y"):
     """Fetch extended historical stock data."""
     try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period=period)
+        df = fetch_history(symbol, period=period)
         
         if df.empty:
             raise ValueError(f"No data retrieved for {symbol}")
@@ -17,6 +21,7 @@ def fetch_data(symbol, period="2y"):
         print(f"Error fetching data: {e}")
         return None
 
+@timed("backtest.indicators")
 def calculate_advanced_indicators(df, 
                                   short_window=10, 
                                   long_window=50, 
@@ -34,42 +39,18 @@ def calculate_advanced_indicators(df,
     df = df.copy()
     
     # Simple Moving Averages
-    df['SMA_Short'] = df['Close'].rolling(window=short_window, min_periods=1).mean()
-    df['SMA_Long'] = df['Close'].rolling(window=long_window, min_periods=1).mean()
+    df['SMA_Short'] = sma(df['Close'], short_window)
+    df['SMA_Long'] = sma(df['Close'], long_window)
     
     # RSI with more nuanced calculation
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=rsi_window, min_periods=1).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_window, min_periods=1).mean()
-    
-    rs = gain / (loss + 1e-10)  # Prevent division by zero
-    df['RSI'] = 100 - (100 / (1 + rs))
+    df['RSI'] = rsi(df['Close'], rsi_window)
     
     # MACD Calculation
-    exp1 = df['Close'].ewm(span=macd_short, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=macd_long, adjust=False).mean()
-    df['MACD'] = exp1 - exp2
-    df['MACD_Signal'] = df['MACD'].ewm(span=macd_signal, adjust=False).mean()
+    df['MACD'], df['MACD_Signal'] = macd(df['Close'], macd_short, macd_long, macd_signal)
     
     # Advanced Signal Generation
-    df['Signal'] = np.where(
-        # Buy Conditions (more comprehensive)
-        (df['SMA_Short'] > df['SMA_Long']) &  # Bullish moving average crossover
-        (df['RSI'] > 50) &  # RSI above 50 (bullish momentum)
-        (df['MACD'] > df['MACD_Signal']) &  # Bullish MACD
-        (df['Close'] > df['SMA_Long']),  # Price above long-term moving average
-        1,
-        
-        # Sell Conditions
-        np.where(
-            (df['SMA_Short'] < df['SMA_Long']) &  # Bearish moving average crossover
-            (df['RSI'] < 50) &  # RSI below 50 (bearish momentum)
-            (df['MACD'] < df['MACD_Signal']) &  # Bearish MACD
-            (df['Close'] < df['SMA_Long']),  # Price below long-term moving average
-            -1, 
-            0  # Neutral
-        )
-    )
+    df['Signal'] = combined_signal(df['Close'], df['SMA_Short'], df['SMA_Long'],
+                                   df['RSI'], df['MACD'], df['MACD_Signal'])
     
     return df
 
@@ -147,34 +128,45 @@ def backtest_with_adaptive_strategy(df,
     
     return df, realized_gains
 
-def plot_comprehensive_performance(df, symbol):
-    """Enhanced performance visualization."""
-    plt.figure(figsize=(15, 12))
+@timed("backtest.plot")
+def plot_comprehensive_performance(df, symbol, path=None):
+    """
+    Enhanced performance visualization. With `path` (or QIAB_PLOT_DIR set)
+    the chart is written to a file instead of shown; long series are
+    downsampled for drawing either way.
+    """
+    path = output_path(path, f"{symbol}_performance")
+    fig = figure((15, 12), path)
     
     # Price and Technical Indicators
-    plt.subplot(3, 1, 1)
-    plt.title(f"{symbol} - Technical Analysis")
-    plt.plot(df.index, df["Close"], label="Close Price", color='blue')
-    plt.plot(df.index, df["SMA_Short"], label="Short SMA", linestyle="--", color='green')
-    plt.plot(df.index, df["SMA_Long"], label="Long SMA", linestyle="--", color='red')
-    plt.legend()
+    ax = fig.add_subplot(3, 1, 1)
+    ax.set_title(f"{symbol} - Technical Analysis")
+    view = downsample(df[["Close", "SMA_Short", "SMA_Long"]])
+    ax.plot(view.index, view["Close"], label="Close Price", color='blue')
+    ax.plot(view.index, view["SMA_Short"], label="Short SMA", linestyle="--", color='green')
+    ax.plot(view.index, view["SMA_Long"], label="Long SMA", linestyle="--", color='red')
+    ax.legend()
     
     # MACD and Signal
-    plt.subplot(3, 1, 2)
-    plt.title("MACD Indicator")
-    plt.plot(df.index, df["MACD"], label="MACD", color='blue')
-    plt.plot(df.index, df["MACD_Signal"], label="Signal Line", color='red')
-    plt.legend()
+    ax = fig.add_subplot(3, 1, 2)
+    ax.set_title("MACD Indicator")
+    view = downsample(df[["MACD", "MACD_Signal"]])
+    ax.plot(view.index, view["MACD"], label="MACD", color='blue')
+    ax.plot(view.index, view["MACD_Signal"], label="Signal Line", color='red')
+    ax.legend()
     
     # Portfolio Performance
-    plt.subplot(3, 1, 3)
-    plt.title("Portfolio Performance")
-    plt.plot(df.index, df["Portfolio_Value"], label="Portfolio Value", color='purple')
-    plt.legend()
-    
-    plt.tight_layout()
-    plt.show()
+    ax = fig.add_subplot(3, 1, 3)
+    ax.set_title("Portfolio Performance")
+    view = downsample(df["Portfolio_Value"])
+    ax.plot(view.index, view, label="Portfolio Value", color='purple')
+    ax.legend()
+    
+    # Fixed margins: tight_layout() costs a second full draw of the figure
+    fig.subplots_adjust(left=0.05, right=0.98, bottom=0.04, top=0.96, hspace=0.3)
+    return finish(fig, path)
 
+@timed("backtest.report")
 def analyze_strategy_performance(df, initial_capital=100000, realized_gains=None):
     """Comprehensive strategy performance analysis."""
     final_portfolio_value = df['Portfolio_Value'].iloc[-1]
@@ -190,16 +182,16 @@ def analyze_strategy_performance(df, initial_capital=100000, realized_gains=None
         print(f"Total Realized Gains: ₹{sum(realized_gains):,.2f}")
         print(f"Average Trade Profit: ₹{np.mean(realized_gains):,.2f}")
 
-def main(symbol="TCS.NS", initial_capital=100000):
+def run_strategy(symbol="TCS.NS", initial_capital=100000, period="2y"):
     """Main strategy execution."""
-    df = fetch_data(symbol)
+    df = fetch_data(symbol, period)
     
     if df is not None:
         # Calculate advanced indicators
         df = calculate_advanced_indicators(df)
         
         # Backtest with adaptive strategy
-        df, realized_gains = backtest_with_adaptive_strategy(df, initial_capital)
+        df, realized_gains = run_adaptive_backtest(df, initial_capital)
         
         # Visualize performance
         plot_comprehensive_performance(df, symbol)
@@ -207,6 +199,14 @@ def main(symbol="TCS.NS", initial_capital=100000):
         # Analyze performance
         analyze_strategy_performance(df, initial_capital, realized_gains)
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Adaptive SMA/RSI/MACD backtest of one symbol.")
+    parser.add_argument("symbol", nargs="?", default="TCS.NS")
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--capital", type=float, default=100000)
+    args = parser.parse_args(argv)
+    run_strategy(args.symbol, args.capital, args.period)
+
 # Execute strategy
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import sys
+import time
+import subprocess
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+
+from .backtestm import calculate_advanced_indicators, backtest_with_adaptive_strategy
+from .breakout import compute_pair_spread, pairs_trading_strategy, backtest_pairs_trading
+from .engine import run_adaptive_backtest, mean_reversion_kernel
+from .rsi import compute_rsi
+from .test import mean_reversion_strategy, backtest
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+STARTUP_BUDGET = 0.15  # Seconds for `python -m quantalgo --help`
+
+
+def synthetic_ohlcv(n_bars, seed=0, start_price=100.0, drift=0.05, volatility=0.2,
+                    bars_per_day=375, gap_scale=0.01,
+                    halt_prob=0.0005, halt_length=30, freq="min"):
+    """
+    Deterministic OHLCV bars from geometric Brownian motion.
+
+    Defaults model NSE minute bars (375 per session). The first bar of every
+    session opens with a N(0, `gap_scale`) log gap from the previous close.
+    Trading halts, starting with probability `halt_prob`, freeze the price
+    and zero the volume for `halt_length` bars. The same seed always gives
+    the same bars.
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / (252 * bars_per_day)
+
+    body = (drift - 0.5 * volatility ** 2) * dt + volatility * np.sqrt(dt) * rng.standard_normal(n_bars)
+    gaps = np.where(np.arange(n_bars) % bars_per_day == 0, rng.normal(0.0, gap_scale, n_bars), 0.0)
+    gaps[0] = 0.0
+
+    halted = np.zeros(n_bars, dtype=bool)
+    starts = np.flatnonzero(rng.random(n_bars) < halt_prob)
+    for k in range(halt_length):
+        halted[np.minimum(starts + k, n_bars - 1)] = True
+    body[halted] = 0.0
+    gaps[halted] = 0.0
+
+    log_close = np.log(start_price) + np.cumsum(gaps + body)
+    close = np.exp(log_close)
+    open_ = np.exp(log_close - body)
+    wick = volatility * np.sqrt(dt) * 0.5
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.standard_normal(n_bars)) * wick * ~halted)
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.standard_normal(n_bars)) * wick * ~halted)
+    volume = np.where(halted, 0, rng.lognormal(10, 1, n_bars).astype(np.int64))
+
+    index = pd.date_range("2000-01-03", periods=n_bars, freq=freq, name="Date")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+def _pairs_input(df):
+    other = synthetic_ohlcv(len(df), seed=1)
+    other.index = df.index
+    return pairs_trading_strategy(compute_pair_spread(df["Close"], other["Close"] * 0.9, "A", "B"))
+
+
+# name, setup (not timed), timed function, largest size worth running
+BENCHMARKS = [
+    ("calculate_advanced_indicators", lambda df: df, calculate_advanced_indicators, None),
+    ("backtest_with_adaptive_strategy", calculate_advanced_indicators, backtest_with_adaptive_strategy, 200_000),
+    ("run_adaptive_backtest", calculate_advanced_indicators, run_adaptive_backtest, None),
+    ("compute_rsi", lambda df: df[["Close"]].copy(), compute_rsi, None),
+    ("mean_reversion_strategy", lambda df: df[["Close"]].copy(), mean_reversion_strategy, None),
+    ("backtest", lambda df: mean_reversion_strategy(df[["Close"]].copy()),
+     lambda df: backtest(df.copy()), 50_000),
+    ("mean_reversion_kernel", lambda df: mean_reversion_strategy(df[["Close"]].copy()),
+     lambda df: mean_reversion_kernel(df["Close"].to_numpy(), df["Signal"].to_numpy()), None),
+    ("backtest_pairs_trading", _pairs_input, lambda df: backtest_pairs_trading(df.copy()), 50_000),
+]
+
+
+def run_benchmarks(sizes=(1_000, 10_000, 100_000), repeat=3, only=None, seed=0):
+    """Time every benchmark at every size; returns one row per (benchmark, size)."""
+    rows = []
+    for n_bars in sizes:
+        df = synthetic_ohlcv(n_bars, seed=seed)
+        for name, setup, func, max_bars in BENCHMARKS:
+            if only and name not in only:
+                continue
+            if max_bars is not None and n_bars > max_bars:
+                rows.append({"benchmark": name, "bars": n_bars, "seconds": np.nan,
+                             "bars_per_sec": np.nan, "peak_mb": np.nan, "note": "skipped"})
+                continue
+
+            data = setup(df)
+            with warnings.catch_warnings():
+                # The row-by-row reference loops warn on every chained assignment
+                warnings.simplefilter("ignore")
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    func(data)
+                    timings.append(time.perf_counter() - start)
+
+                tracemalloc.start()
+                func(data)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            best = min(timings)
+            rows.append({"benchmark": name, "bars": n_bars, "seconds": best,
+                         "bars_per_sec": n_bars / best, "peak_mb": peak / 2 ** 20, "note": ""})
+            print(f"{name:32s} {n_bars:>10,d} bars {best:10.4f}s {n_bars / best:14,.0f} bars/s "
+                  f"{peak / 2 ** 20:9.1f} MB", file=sys.stderr)
+    return pd.DataFrame(rows)
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """Mark rows whose throughput fell more than `tolerance` below the stored baseline."""
+    results = results.copy()
+    keys = results["benchmark"] + "@" + results["bars"].astype(str)
+    results["baseline_bars_per_sec"] = [baseline.get(key, np.nan) for key in keys]
+    results["change_pct"] = (results["bars_per_sec"] / results["baseline_bars_per_sec"] - 1) * 100
+    results["regression"] = results["change_pct"] < -tolerance * 100
+    return results
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    done = results.dropna(subset=["bars_per_sec"])
+    baseline = load_baseline(path)
+    baseline.update({f"{row.benchmark}@{row.bars}": row.bars_per_sec for row in done.itertuples()})
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def startup_time(args=("--help",), repeat=5):
+    """
+    Best wall time of `python -m quantalgo <args>` in a fresh interpreter,
+    and of a bare `python -c pass` for comparison.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def best(command):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=root, stdout=subprocess.DEVNULL, check=True)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    return best([sys.executable, "-m", "quantalgo", *args]), best([sys.executable, "-c", "pass"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark quantalgo indicators and backtests on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="benchmark names to run")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop before flagging")
+    parser.add_argument("--startup", action="store_true", help="only time `python -m quantalgo --help` instead")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET, help="seconds allowed for it")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        seconds, interpreter = startup_time(repeat=args.repeat)
+        print(f"python -m quantalgo --help: {seconds * 1000:.0f} ms "
+              f"(bare interpreter {interpreter * 1000:.0f} ms, budget {args.startup_budget * 1000:.0f} ms)")
+        return int(seconds > args.startup_budget)
+
+    results = run_benchmarks(args.sizes, args.repeat, args.only)
+    results = compare_to_baseline(results, load_baseline(args.baseline), args.tolerance)
+    print(results.to_string(index=False, float_format=lambda x: f"{x:,.3f}"))
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if results["regression"].any():
+        print("Throughput regressions:", ", ".join(results.loc[results["regression"], "benchmark"]))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
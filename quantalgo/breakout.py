@@ -1,14 +1,22 @@
+import argparse
 import numpy as np
 import pandas as pd
-import yfinance as yf
-import matplotlib.pyplot as plt
+from .pricestore import fetch_history
+from .metrics import timed
+from .charts import downsample, figure, finish, output_path
 
+@timed("pairs.fetch_data")
 def fetch_pair_data(stock1, stock2, period="6mo"):
     """Fetch historical stock data for two stocks and compute spread & Z-score."""
-    df1 = yf.Ticker(stock1).history(period=period)["Close"]
-    df2 = yf.Ticker(stock2).history(period=period)["Close"]
+    df1 = fetch_history(stock1, period=period)["Close"]
+    df2 = fetch_history(stock2, period=period)["Close"]
 
-    df = pd.DataFrame({stock1: df1, stock2: df2})
+    return compute_pair_spread(df1, df2, stock1, stock2)
+
+@timed("pairs.spread")
+def compute_pair_spread(close1, close2, stock1, stock2):
+    """Align two close series and compute spread & Z-score."""
+    df = pd.DataFrame({stock1: close1, stock2: close2})
     df.dropna(inplace=True)  # Remove NaNs to avoid errors
 
     # Compute spread
@@ -21,6 +29,7 @@ def fetch_pair_data(stock1, stock2, period="6mo"):
 
     return df
 
+@timed("pairs.signals")
 def pairs_trading_strategy(df, entry_threshold=2, exit_threshold=0.5):
     """Generate trading signals based on Z-score thresholds."""
     df["Signal"] = np.where(df["Z-Score"] > entry_threshold, -1, 
@@ -28,6 +37,7 @@ def pairs_trading_strategy(df, entry_threshold=2, exit_threshold=0.5):
 
     return df
 
+@timed("pairs.backtest")
 def backtest_pairs_trading(df, capital=100000):
     """Simulate pairs trading strategy and calculate portfolio performance."""
     position = 0
@@ -51,30 +61,65 @@ def backtest_pairs_trading(df, capital=100000):
 
     return df
 
-# Fetch and process data for TCS & INFY
-df = fetch_pair_data("TCS.NS", "INFY.NS")
-df = pairs_trading_strategy(df)
-df = backtest_pairs_trading(df)
-
-# Plot Spread with Z-Score bands
-plt.figure(figsize=(12,6))
-plt.plot(df.index, df["Spread"], label="Spread", color="blue")
-plt.axhline(df["Spread"].mean(), color="black", linestyle="--", label="Mean Spread")
-plt.axhline(df["Spread"].mean() + 2*df["Spread_Std"].mean(), color="red", linestyle="--", label="Upper Band")
-plt.axhline(df["Spread"].mean() - 2*df["Spread_Std"].mean(), color="green", linestyle="--", label="Lower Band")
-plt.scatter(df[df["Signal"] == 1].index, df[df["Signal"] == 1]["Spread"], marker="^", color="green", label="Long Signal", alpha=1)
-plt.scatter(df[df["Signal"] == -1].index, df[df["Signal"] == -1]["Spread"], marker="v", color="red", label="Short Signal", alpha=1)
-plt.title("Pairs Trading Strategy (TCS vs INFY)")
-plt.legend()
-plt.show()
-
-# Plot Portfolio Performance
-plt.figure(figsize=(12,6))
-plt.plot(df.index, df["Portfolio"], label="Portfolio Value", color="purple")
-plt.title("Pairs Trading Portfolio Performance")
-plt.xlabel("Date")
-plt.ylabel("Portfolio Value (₹)")
-plt.legend()
-plt.show()
-
-print(f"Final Portfolio Value: ₹{df['Portfolio'].iloc[-1]:,.2f}")
+def plot_pairs(df, stock1, stock2, path=None):
+    """Spread with its bands and signals; written to `path` (or QIAB_PLOT_DIR) instead of shown when given."""
+    path = output_path(path, f"{stock1}_{stock2}_pairs")
+    fig = figure((12,6), path)
+    ax = fig.add_subplot()
+    view = downsample(df["Spread"])
+    ax.plot(view.index, view, label="Spread", color="blue")
+    ax.axhline(df["Spread"].mean(), color="black", linestyle="--", label="Mean Spread")
+    ax.axhline(df["Spread"].mean() + 2*df["Spread_Std"].mean(), color="red", linestyle="--", label="Upper Band")
+    ax.axhline(df["Spread"].mean() - 2*df["Spread_Std"].mean(), color="green", linestyle="--", label="Lower Band")
+    ax.scatter(df[df["Signal"] == 1].index, df[df["Signal"] == 1]["Spread"], marker="^", color="green", label="Long Signal", alpha=1)
+    ax.scatter(df[df["Signal"] == -1].index, df[df["Signal"] == -1]["Spread"], marker="v", color="red", label="Short Signal", alpha=1)
+    ax.set_title(f"Pairs Trading Strategy ({stock1.split('.')[0]} vs {stock2.split('.')[0]})")
+    ax.legend()
+    return finish(fig, path)
+
+def plot_pairs_portfolio(df, stock1, stock2, path=None):
+    """Portfolio value of the pairs backtest, shown or written like plot_pairs."""
+    path = output_path(path, f"{stock1}_{stock2}_pairs_portfolio")
+    fig = figure((12,6), path)
+    ax = fig.add_subplot()
+    view = downsample(df["Portfolio"])
+    ax.plot(view.index, view, label="Portfolio Value", color="purple")
+    ax.set_title("Pairs Trading Portfolio Performance")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Portfolio Value (₹)")
+    ax.legend()
+    return finish(fig, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pairs trading backtest of two symbols, or pairs discovery across more.")
+    parser.add_argument("symbols", nargs="*", default=["TCS.NS", "INFY.NS"])
+    parser.add_argument("--period", default="6mo")
+    parser.add_argument("--top", type=int, default=20, help="pairs listed in discovery")
+    args = parser.parse_args(argv)
+
+    if len(args.symbols) > 2:
+        # Pairs discovery across every symbol given on the command line
+        from .pairs import scan_pairs
+        from .universe import close_matrix
+
+        candidates = scan_pairs(close_matrix(args.symbols, period=args.period), top=args.top)
+        print(f"Pairs as of {candidates.attrs['as_of']}")
+        print(candidates.to_string(index=False))
+    elif len(args.symbols) == 2:
+        stock1, stock2 = args.symbols
+        df = fetch_pair_data(stock1, stock2, args.period)
+        df = pairs_trading_strategy(df)
+        df = backtest_pairs_trading(df)
+
+        # Plot Spread with Z-Score bands
+        plot_pairs(df, stock1, stock2)
+
+        # Plot Portfolio Performance
+        plot_pairs_portfolio(df, stock1, stock2)
+
+        print(f"Final Portfolio Value: ₹{df['Portfolio'].iloc[-1]:,.2f}")
+    else:
+        parser.error("give two symbols to backtest, or more to scan for pairs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import os
+import html
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# With QIAB_PLOT_DIR set, plots are written there instead of shown
+PLOT_DIR = os.getenv("QIAB_PLOT_DIR", "")
+PLOT_FORMAT = os.getenv("QIAB_PLOT_FORMAT", "png")
+MAX_POINTS = int(os.getenv("QIAB_PLOT_POINTS", 2000))
+DPI = 80
+
+
+def minmax_indices(y, n):
+    """
+    Positions of the lowest and highest value in each of n/2 equal buckets
+    of `y`, in order, plus both ends. Keeps every spike a line would show.
+    """
+    m = len(y)
+    if m <= n:
+        return np.arange(m)
+    buckets = max(n // 2, 1)
+    edges = np.linspace(0, m, buckets + 1).astype(np.int64)
+    width = int(np.diff(edges).max())
+    positions = edges[:-1, None] + np.arange(width)
+    valid = positions < edges[1:, None]
+    positions = np.minimum(positions, m - 1)
+    values = y[positions]
+    lows = np.where(valid, values, np.inf).argmin(axis=1)
+    highs = np.where(valid, values, -np.inf).argmax(axis=1)
+    rows = np.arange(buckets)
+    return np.unique(np.r_[0, positions[rows, lows], positions[rows, highs], m - 1])
+
+
+def lttb_indices(x, y, n):
+    """Positions of `n` points chosen by Largest-Triangle-Three-Buckets."""
+    m = len(y)
+    if m <= n or n < 3:
+        return np.arange(m)
+    edges = np.linspace(1, m - 1, n - 1).astype(np.int64)
+    picks = np.empty(n, dtype=np.int64)
+    picks[0], picks[-1] = 0, m - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < n - 1 else m
+        cx, cy = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        picks[i + 1] = a
+    return picks
+
+
+def downsample(data, n=MAX_POINTS, method="minmax"):
+    """
+    Rows of `data` (a Series or DataFrame) worth drawing: about `n` per
+    numeric column, chosen by "minmax" bucketing or "lttb", and the union
+    taken across columns. Short data comes back unchanged.
+    """
+    if len(data) <= n:
+        return data
+    frame = data.to_frame() if isinstance(data, pd.Series) else data.select_dtypes("number")
+    if method == "lttb":
+        index = frame.index
+        x = index.asi8.astype(np.float64) if isinstance(index, pd.DatetimeIndex) else np.arange(len(frame), dtype=np.float64)
+    keep = np.zeros(len(frame), dtype=bool)
+    for column in frame.columns:
+        y = frame[column].to_numpy(dtype=np.float64)
+        present = np.flatnonzero(~np.isnan(y))
+        if len(present) == 0:
+            continue
+        if method == "lttb":
+            picks = lttb_indices(x[present], y[present], n)
+        else:
+            picks = minmax_indices(y[present], n)
+        keep[present[picks]] = True
+    return data.iloc[np.flatnonzero(keep)]
+
+
+def output_path(path=None, name=None):
+    """`path`, or where QIAB_PLOT_DIR puts a plot called `name`; None means show it."""
+    if path is None and PLOT_DIR and name:
+        path = os.path.join(PLOT_DIR, f"{name}.{PLOT_FORMAT}")
+    return path
+
+
+def figure(figsize, path=None):
+    """
+    A pyplot figure to show, or when saving to `path` a standalone Agg
+    figure that needs no display and isn't kept by pyplot.
+    """
+    if path is None:
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize)
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+
+def finish(fig, path=None):
+    """Save `fig` to `path` (the format follows the extension), or show it. Returns the path."""
+    if path is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+        return None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fig.savefig(path, dpi=DPI)
+    return path
+
+
+def _render_symbol(task):
+    from .backtestm import fetch_data, calculate_advanced_indicators, plot_comprehensive_performance
+    from .engine import run_adaptive_backtest
+
+    symbol, path, period, initial_capital = task
+    try:
+        df = fetch_data(symbol, period)
+        if df is None:
+            return symbol, None, "no data"
+        df, _ = run_adaptive_backtest(calculate_advanced_indicators(df), initial_capital)
+        return symbol, plot_comprehensive_performance(df, symbol, path=path), None
+    except Exception as e:
+        return symbol, None, str(e)
+
+
+def render_report(symbols, out_dir, fmt=PLOT_FORMAT, period="2y", initial_capital=100000, processes=None):
+    """
+    Backtest every symbol and write its performance chart to `out_dir`,
+    spread over a process pool, plus an index.html showing them all.
+    Returns {symbol: chart path or None}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(symbol, os.path.join(out_dir, f"{symbol}_performance.{fmt}"), period, initial_capital)
+             for symbol in symbols]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        results = list(map(_render_symbol, tasks))
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(_render_symbol, tasks, chunksize=max(1, len(tasks) // (processes * 4))))
+
+    charts = {}
+    rows = []
+    for symbol, path, error in results:
+        charts[symbol] = path
+        if path is None:
+            print(f"Error rendering {symbol}: {error}")
+            rows.append(f"<h3>{html.escape(symbol)}</h3><p>{html.escape(error or '')}</p>")
+        else:
+            rows.append(f'<h3>{html.escape(symbol)}</h3><img src="{html.escape(os.path.basename(path))}" width="900">')
+    with open(os.path.join(out_dir, "index.html"), "w") as f:
+        f.write("<!doctype html><title>Backtest report</title>\n" + "\n".join(rows) + "\n")
+    return charts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render backtest charts for many symbols without a display.")
+    parser.add_argument("symbols", nargs="+", help="symbols, or a file with one per line")
+    parser.add_argument("--out", default="report")
+    parser.add_argument("--format", default=PLOT_FORMAT, choices=["png", "svg"])
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    symbols = args.symbols
+    if len(symbols) == 1 and os.path.isfile(symbols[0]):
+        with open(symbols[0]) as f:
+            symbols = [line.strip() for line in f if line.strip()]
+    charts = render_report(symbols, args.out, args.format, args.period, processes=args.processes)
+    print(f"Rendered {sum(path is not None for path in charts.values())} of {len(symbols)} charts "
+          f"into {os.path.join(args.out, 'index.html')}")
+
+
+if __name__ == "__main__":
+    main()
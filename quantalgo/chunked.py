@@ -0,0 +1,121 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from .engine import adaptive_strategy_kernel, new_adaptive_state
+from .pricestore import default_store
+from .streaming import AdvancedSignal
+
+
+def iter_csv_chunks(path, chunksize=100_000):
+    """Read a bar CSV (index in the first column) a chunk at a time."""
+    for chunk in pd.read_csv(path, index_col=0, chunksize=chunksize):
+        chunk.index = pd.to_datetime(chunk.index)
+        yield chunk
+
+
+def iter_parquet_chunks(path, chunksize=100_000):
+    """Read a bar Parquet file a row batch at a time (needs pyarrow)."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet needs pyarrow: pip install pyarrow")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def iter_chunks(source, chunksize=100_000, interval="1d"):
+    """Chunks from a .csv/.parquet path, or from the price store for a symbol."""
+    if source.endswith(".csv"):
+        return iter_csv_chunks(source, chunksize)
+    if source.endswith(".parquet"):
+        return iter_parquet_chunks(source, chunksize)
+    return default_store().iter_chunks(source, interval, chunksize, columns=["Close"])
+
+
+def stream_adaptive_backtest(chunks,
+                             initial_capital=100000,
+                             risk_per_trade=0.02,
+                             trailing_stop_loss_pct=0.05,
+                             realized_gains=None,
+                             **indicator_params):
+    """
+    calculate_advanced_indicators + the adaptive backtest over a stream of bar chunks.
+
+    Indicator state (streaming.AdvancedSignal) and the open position
+    (engine state) carry across chunk boundaries, so the concatenated output
+    is identical to the in-memory path while only one chunk is held at a time.
+    Yields one DataFrame per input chunk with the indicator columns and
+    Portfolio_Value. Trade profits are appended to `realized_gains` if given.
+    """
+    indicators = AdvancedSignal(**indicator_params)
+    state = new_adaptive_state(initial_capital)
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        columns = indicators.update_many(chunk["Close"].to_numpy())
+        values, gains = adaptive_strategy_kernel(columns["Close"], columns["Signal"], initial_capital,
+                                                 risk_per_trade, trailing_stop_loss_pct, state)
+        if realized_gains is not None:
+            realized_gains.extend(gains)
+        out = pd.DataFrame(columns, index=chunk.index)
+        out["Portfolio_Value"] = values
+        yield out
+
+
+def run_chunked_backtest(chunks, initial_capital=100000, **params):
+    """Consume the chunked backtest, keeping only summary figures in memory."""
+    realized_gains = []
+    bars, final_value, peak, max_drawdown = 0, initial_capital, initial_capital, 0.0
+    for out in stream_adaptive_backtest(chunks, initial_capital, realized_gains=realized_gains, **params):
+        values = out["Portfolio_Value"].to_numpy()
+        running_peak = np.maximum.accumulate(np.maximum(values, peak))
+        max_drawdown = min(max_drawdown, ((values - running_peak) / running_peak).min())
+        peak = running_peak[-1]
+        bars += len(values)
+        final_value = values[-1]
+    return {
+        "bars": bars,
+        "final_value": final_value,
+        "total_return_pct": (final_value - initial_capital) / initial_capital * 100,
+        "max_drawdown_pct": max_drawdown * 100,
+        "realized_gains": realized_gains,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bounded-memory backtest over long bar histories.")
+    parser.add_argument("source", help="bar .csv/.parquet file, or a symbol already in the price store")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--capital", type=float, default=100000)
+    parser.add_argument("--output", help="append every result chunk to this CSV")
+    args = parser.parse_args(argv)
+
+    chunks = iter_chunks(args.source, args.chunksize, args.interval)
+    if args.output:
+        if os.path.exists(args.output):
+            os.remove(args.output)
+        realized_gains = []
+        final_value = args.capital
+        for out in stream_adaptive_backtest(chunks, args.capital, realized_gains=realized_gains):
+            out.to_csv(args.output, mode="a", header=not os.path.exists(args.output))
+            final_value = out["Portfolio_Value"].iloc[-1]
+        summary = {"final_value": final_value, "realized_gains": realized_gains}
+    else:
+        summary = run_chunked_backtest(chunks, args.capital)
+
+    realized_gains = summary["realized_gains"]
+    print("\n--- Strategy Performance Report ---")
+    print(f"Initial Capital: ₹{args.capital:,.2f}")
+    print(f"Final Portfolio Value: ₹{summary['final_value']:,.2f}")
+    print(f"Total Return: {(summary['final_value'] - args.capital) / args.capital * 100:.2f}%")
+    if realized_gains:
+        print(f"Number of Trades: {len(realized_gains)}")
+        print(f"Total Realized Gains: ₹{sum(realized_gains):,.2f}")
+        print(f"Average Trade Profit: ₹{np.mean(realized_gains):,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import sys
+import argparse
+import importlib
+
+
+# Command -> (module, summary). A command's module, and with it pandas,
+# matplotlib and the rest, is only imported once the command runs.
+COMMANDS = {
+    "backtest": ("backtestm", "adaptive SMA/RSI/MACD backtest of one symbol"),
+    "rsi": ("rsi", "RSI mean reversion signals for one symbol"),
+    "mean-reversion": ("test", "Bollinger band mean reversion backtest of one symbol"),
+    "pairs": ("breakout", "pairs trading backtest, or pairs discovery across many symbols"),
+    "report": ("charts", "render backtest charts for many symbols without a display"),
+    "montecarlo": ("montecarlo", "bootstrap robustness run of a strategy"),
+    "chunked": ("chunked", "bounded-memory backtest over long bar histories"),
+    "benchmark": ("benchmark", "indicator and backtest throughput against the baseline"),
+    "ticks": ("ticks", "live tick ingestion into shared memory rings"),
+    "execute": ("execution", "turn streaming signal changes into qiab orders"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="quantalgo",
+        description="QuantInABox strategies and tools.",
+        epilog="Run `python -m quantalgo <command> --help` for a command's options.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    sub = parser.add_subparsers(dest="command", metavar="<command>", required=True)
+    for name, (_, summary) in COMMANDS.items():
+        # Each command parses its own options
+        sub.add_parser(name, help=summary, add_help=False)
+    args, rest = parser.parse_known_args(argv)
+
+    module = importlib.import_module(f".{COMMANDS[args.command][0]}", __package__)
+    sys.argv[0] = f"quantalgo {args.command}"  # Shown by the command's own usage and --help
+    return module.main(rest)
@@ -0,0 +1,140 @@
+import numpy as np
+
+from .metrics import timed
+
+
+def adaptive_strategy_kernel(close, signal,
+                             initial_capital=100000,
+                             risk_per_trade=0.02,
+                             trailing_stop_loss_pct=0.05,
+                             state=None):
+    """
+    Array version of the backtest_with_adaptive_strategy state machine.
+
+    Takes the Close and Signal columns as 1-D arrays and returns the
+    portfolio value for every bar plus the realized gain of every trade,
+    computed with exactly the same floating point operations as the
+    DataFrame loop.
+
+    Pass a `state` dict (see new_adaptive_state) to split one run over
+    several calls: each call starts from the stored cash and position and
+    updates the dict in place, so consecutive slices give the same result
+    as a single call over the whole series.
+    """
+    n = len(close)
+    portfolio_values = np.empty(n, dtype=np.float64)
+    realized_gains = []
+    if n == 0:
+        return portfolio_values, realized_gains
+
+    # Plain Python floats are much cheaper to step through than array scalars
+    prices = np.ascontiguousarray(close, dtype=np.float64).tolist()
+    signals = np.ascontiguousarray(signal).tolist()
+    out = [0.0] * n
+
+    if state is None:
+        state = new_adaptive_state(initial_capital)
+    cash, shares, buy_price, trailing_stop = (
+        state["cash"], state["shares"], state["buy_price"], state["trailing_stop"])
+    # The very first bar of a run only records the starting capital
+    first = 1 if state["bars"] == 0 else 0
+    if first:
+        out[0] = cash
+    stop_factor = 1 - trailing_stop_loss_pct
+    trail_factor = 1 + trailing_stop_loss_pct
+
+    for i in range(first, n):
+        current_price = prices[i]
+        sig = signals[i]
+
+        # Buy Signal
+        if sig == 1 and shares == 0:
+            shares = int(cash * risk_per_trade / current_price)
+            buy_price = current_price
+            cash -= shares * buy_price
+            trailing_stop = buy_price * stop_factor
+
+        # Sell on explicit signal or trailing stop
+        if shares > 0 and (sig == -1 or current_price <= trailing_stop):
+            sell_value = shares * current_price
+            cash += sell_value
+            realized_gains.append(sell_value - (shares * buy_price))
+
+            shares = 0
+            buy_price = 0
+            trailing_stop = 0
+
+        # Update trailing stop if position is active
+        if shares > 0 and current_price > buy_price * trail_factor:
+            trailing_stop = current_price * stop_factor
+
+        out[i] = cash + (shares * current_price)
+
+    state.update(cash=cash, shares=shares, buy_price=buy_price, trailing_stop=trailing_stop,
+                 bars=state["bars"] + n)
+    portfolio_values[:] = out
+    return portfolio_values, realized_gains
+
+
+def new_adaptive_state(initial_capital=100000):
+    """Flat position state for chaining adaptive_strategy_kernel runs."""
+    return {"cash": initial_capital, "shares": 0, "buy_price": 0, "trailing_stop": 0, "bars": 0}
+
+
+@timed("backtest.run")
+def run_adaptive_backtest(df,
+                          initial_capital=100000,
+                          risk_per_trade=0.02,
+                          trailing_stop_loss_pct=0.05):
+    """Drop-in replacement for backtest_with_adaptive_strategy built on the array kernel."""
+    df = df.copy()
+    portfolio_values, realized_gains = adaptive_strategy_kernel(
+        df['Close'].to_numpy(), df['Signal'].to_numpy(),
+        initial_capital, risk_per_trade, trailing_stop_loss_pct
+    )
+    df['Portfolio_Value'] = portfolio_values
+    return df, realized_gains
+
+
+def mean_reversion_kernel(close, signal, initial_capital=100000, state=None):
+    """
+    Array version of the test.py backtest loop for the Bollinger strategy.
+
+    Returns the portfolio value of every bar. `state` works as in
+    adaptive_strategy_kernel (see new_mean_reversion_state).
+    """
+    n = len(close)
+    portfolio_values = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return portfolio_values
+
+    prices = np.ascontiguousarray(close, dtype=np.float64).tolist()
+    signals = np.ascontiguousarray(signal).tolist()
+    out = [0.0] * n
+
+    if state is None:
+        state = new_mean_reversion_state(initial_capital)
+    capital, position = state["capital"], state["position"]
+    first = 1 if state["bars"] == 0 else 0
+    if first:
+        out[0] = capital
+
+    for i in range(first, n):
+        price = prices[i]
+        sig = signals[i]
+        if sig == 1:  # Buy
+            position = capital // price
+            capital -= position * price
+        elif sig == -1 and position > 0:  # Sell
+            capital += position * price
+            position = 0
+        out[i] = capital + (position * price)
+
+    state.update(capital=capital, position=position, bars=state["bars"] + n)
+    portfolio_values[:] = out
+    return portfolio_values
+
+
+def new_mean_reversion_state(initial_capital=100000):
+    """Flat position state for chaining mean_reversion_kernel runs."""
+    return {"capital": initial_capital, "position": 0, "bars": 0}
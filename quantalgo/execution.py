@@ -0,0 +1,361 @@
+import os
+import csv
+import json
+import time
+import socket
+import bisect
+import argparse
+import threading
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from .streaming import SignalBook
+
+
+ORDER_URL = os.getenv("QIAB_ORDER_URL", "http://127.0.0.1:8000/order")
+
+
+class LatencyHistogram:
+    """Counts of latencies per bucket (upper bounds in seconds), with the recent samples kept for percentiles."""
+
+    BOUNDS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+    def __init__(self, bounds=BOUNDS, keep=10000):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.samples = deque(maxlen=keep)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+            self.samples.append(seconds)
+
+    def summary(self):
+        """Count and p50/p90/p99/max in milliseconds."""
+        with self.lock:
+            samples = np.array(self.samples)
+            count = sum(self.counts)
+        if not len(samples):
+            return {"count": 0}
+        p50, p90, p99 = (np.percentile(samples, [50, 90, 99]) * 1000).tolist()
+        return {"count": count, "p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "max_ms": float(samples.max()) * 1000}
+
+    def __str__(self):
+        with self.lock:
+            counts = list(self.counts)
+        total = max(sum(counts), 1)
+        labels = [f"<= {bound * 1000:g} ms" for bound in self.bounds] + [f"> {self.bounds[-1] * 1000:g} ms"]
+        return "\n".join(f"{label:>12} {count:7d} {'#' * round(40 * count / total)}"
+                         for label, count in zip(labels, counts) if count)
+
+
+class HttpBroker:
+    """Orders to the qiab POST /order endpoint over one pooled, keep-alive session."""
+
+    def __init__(self, url=ORDER_URL, pool_size=8, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def place(self, order):
+        response = self.session.post(self.url, json=order, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    def close(self):
+        self.session.close()
+
+
+class PaperBroker:
+    """Acknowledges every order at once without sending it anywhere."""
+
+    def __init__(self):
+        self.orders = []
+        self.ids = itertools.count(1)
+
+    def place(self, order):
+        self.orders.append(order)
+        return {"order_id": f"paper-{next(self.ids)}"}
+
+    def close(self):
+        pass
+
+
+class ExecutionLoop:
+    """
+    Streaming signal changes into orders.
+
+    A Signal of 1 means hold `quantity` shares of the symbol and -1 means hold
+    none, as in the backtests; 0 keeps the position. Signals are collected for
+    `window` seconds after the first one, then every symbol whose target
+    differs from its position gets one order for the difference, so repeated
+    or flip-flopping signals within a window cost nothing. At most
+    `max_in_flight` orders are outstanding at a time, and the time from a
+    signal to its order's acknowledgement goes into `latency`.
+    """
+
+    def __init__(self, broker, quantity=1, window=0.05, max_in_flight=8, exchange="NSE", product="MIS",
+                 variety="regular"):
+        self.broker = broker
+        self.quantity = quantity
+        self.window = window
+        self.exchange = exchange
+        self.product = product
+        self.variety = variety
+        self.positions = {}  # Shares held, including orders not yet acknowledged
+        self.targets = {}
+        self.pending = {}  # Symbol -> time of its oldest signal not yet ordered
+        self.latency = LatencyHistogram()
+        self.stats = {"signals": 0, "orders": 0, "acked": 0, "failed": 0, "coalesced": 0}
+        self.acks = []
+        self.pool = ThreadPoolExecutor(max_in_flight)
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.thread = None
+
+    def on_signal(self, symbol, signal, when=None):
+        """Take one signal change; `when` is its time.perf_counter() if it happened earlier."""
+        if signal == 1:
+            target = self.quantity
+        elif signal == -1:
+            target = 0
+        else:
+            return
+        with self.cond:
+            self.stats["signals"] += 1
+            if self.targets.get(symbol, self.positions.get(symbol, 0)) == target:
+                return
+            self.targets[symbol] = target
+            self.pending.setdefault(symbol, time.perf_counter() if when is None else when)
+            self.cond.notify()
+
+    def order(self, symbol, quantity):
+        """Request body for qiab's POST /order."""
+        return {
+            "exchange": self.exchange,
+            "trading_symbol": symbol,
+            "transaction_type": "buy" if quantity > 0 else "sell",
+            "quantity": abs(quantity),
+            "product": self.product,
+            "order_type": "MARKET",
+            "validity": "DAY",
+            "variety": self.variety,
+        }
+
+    def flush(self):
+        """Order the net change of every pending symbol now. Returns the futures of the acks."""
+        with self.cond:
+            pending, self.pending = self.pending, {}
+            orders = []
+            for symbol, since in pending.items():
+                quantity = self.targets[symbol] - self.positions.get(symbol, 0)
+                if quantity == 0:
+                    self.stats["coalesced"] += 1
+                    continue
+                self.positions[symbol] = self.targets[symbol]
+                self.stats["orders"] += 1
+                orders.append((symbol, quantity, since))
+        return [self.pool.submit(self._send, *order) for order in orders]
+
+    def _send(self, symbol, quantity, since):
+        try:
+            ack = self.broker.place(self.order(symbol, quantity))
+        except Exception as e:
+            print(f"Order for {symbol} failed: {e}")
+            with self.cond:
+                self.positions[symbol] -= quantity
+                # A target queued meanwhile is ordered from the rolled back
+                # position; otherwise the next signal for the symbol orders again
+                if symbol not in self.pending:
+                    self.targets[symbol] = self.positions[symbol]
+                self.stats["failed"] += 1
+            return None
+        self.latency.record(time.perf_counter() - since)
+        with self.cond:
+            self.stats["acked"] += 1
+            self.acks.append((symbol, quantity, ack))
+        return ack
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.stopped:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                oldest = min(self.pending.values())
+            time.sleep(max(0.0, oldest + self.window - time.perf_counter()))
+            self.flush()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Send what is pending, wait for every ack and release the connections."""
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+        self.pool.shutdown(wait=True)
+        self.broker.close()
+
+
+def trade_signals(loop, book, instrument, close, symbol=None):
+    """Feed one bar close to `book` (a streaming.SignalBook) and pass a changed Signal on to `loop`."""
+    row = book.update(instrument, close)
+    if row["Changed"]:
+        loop.on_signal(symbol or str(instrument), row["Signal"])
+    return row
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the Go server
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this each ack waits on a delayed ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        order = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.orders.append(order)
+            order_id = str(len(self.server.orders))
+        body = json.dumps({"order_id": order_id}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0, delay=0.0):
+    """
+    Local stand-in for qiab's POST /order that acknowledges every order
+    after `delay` seconds. The server runs in a background thread; its
+    `orders` list keeps what it received and `url` is where to send them.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), _StubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.orders = []
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/order"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def read_symbols(path):
+    """{instrument token: trading symbol} from a CSV file with token and trading_symbol columns."""
+    with open(path, newline="") as f:
+        return {int(row["token"]): row["trading_symbol"] for row in csv.DictReader(f)}
+
+
+def simulate(loop, instruments=50, bars=500, pace=0.01, seed=0):
+    """Random-walk closes for `instruments` through AdvancedSignal into `loop`, one bar every `pace` seconds."""
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (bars, instruments)), axis=0))
+    book = SignalBook()
+    for row in closes.tolist():
+        for instrument, close in enumerate(row):
+            trade_signals(loop, book, instrument, close, f"SIM{instrument}")
+        time.sleep(pace)
+
+
+def live(loop, interval=60, symbols=None, poll=0.2):
+    """
+    Trade the bars the tick ingestor (ticks.py) completes, until interrupted.
+
+    `symbols` maps instrument tokens to trading symbols; bars of tokens it
+    doesn't have are skipped. Without it (paper trading) orders name the
+    token itself.
+    """
+    from .ticks import attach_bars
+
+    bars = attach_bars(interval)
+    book = SignalBook()
+    cursor = bars.count
+    unknown = set()
+    try:
+        while True:
+            records, cursor = bars.read(cursor)
+            for token, close in zip(records["token"].tolist(), records["close"].tolist()):
+                symbol = str(token) if symbols is None else symbols.get(token)
+                if symbol is None:
+                    if token not in unknown:
+                        unknown.add(token)
+                        print(f"No trading symbol for instrument {token}, skipping it")
+                    continue
+                trade_signals(loop, book, token, close, symbol)
+            time.sleep(poll)
+    finally:
+        bars.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Turn streaming signal changes into qiab orders.")
+    parser.add_argument("mode", choices=["simulate", "live"],
+                        help="simulate: random bars against a local stub, live: bars from ticks.py")
+    parser.add_argument("--url", default=None, help=f"order endpoint (live default {ORDER_URL})")
+    parser.add_argument("--paper", action="store_true", help="acknowledge orders locally instead of sending them")
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--window", type=float, default=0.05, help="seconds signals are coalesced over")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--interval", type=int, default=60, help="bar interval traded live")
+    parser.add_argument("--symbols", help="CSV of token,trading_symbol, required for live trading")
+    parser.add_argument("--instruments", type=int, default=50)
+    parser.add_argument("--bars", type=int, default=500)
+    parser.add_argument("--pace", type=float, default=0.01, help="seconds between simulated bars")
+    args = parser.parse_args(argv)
+    if args.mode == "live" and not args.paper and not args.symbols:
+        parser.error("live trading needs --symbols to name the instruments, unless --paper is set")
+
+    stub = None
+    if args.paper:
+        broker = PaperBroker()
+    else:
+        url = args.url
+        if url is None and args.mode == "simulate":
+            stub = start_stub(delay=0.002)
+            url = stub.url
+        broker = HttpBroker(url or ORDER_URL, pool_size=args.max_in_flight)
+
+    loop = ExecutionLoop(broker, args.quantity, args.window, args.max_in_flight).start()
+    try:
+        if args.mode == "simulate":
+            simulate(loop, args.instruments, args.bars, args.pace)
+        else:
+            live(loop, args.interval, read_symbols(args.symbols) if args.symbols else None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.stop()
+        if stub is not None:
+            stub.shutdown()
+
+    print(loop.stats)
+    print(loop.latency.summary())
+    print(loop.latency)
+
+
+if __name__ == "__main__":
+    main()
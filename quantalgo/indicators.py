@@ -0,0 +1,51 @@
+import numpy as np
+
+
+# These work on a Series or, column by column, on a DataFrame of closes.
+
+def sma(close, window):
+    """Simple moving average over whatever bars are available at the start."""
+    return close.rolling(window=window, min_periods=1).mean()
+
+
+def ema(close, span):
+    """Recursive exponential moving average."""
+    return close.ewm(span=span, adjust=False).mean()
+
+
+def rsi(close, window):
+    """RSI from simple rolling averages of gains and losses."""
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window, min_periods=1).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window, min_periods=1).mean()
+
+    rs = gain / (loss + 1e-10)  # Prevent division by zero
+    return 100 - (100 / (1 + rs))
+
+
+def macd(close, macd_short=12, macd_long=26, macd_signal=9):
+    """MACD line and its signal line."""
+    line = ema(close, macd_short) - ema(close, macd_long)
+    return line, ema(line, macd_signal)
+
+
+def combined_signal(close, sma_short, sma_long, rsi, macd, macd_signal):
+    """1 when trend, momentum and MACD all agree bullish, -1 when all bearish, else 0."""
+    return np.where(
+        # Buy Conditions (more comprehensive)
+        (sma_short > sma_long) &  # Bullish moving average crossover
+        (rsi > 50) &  # RSI above 50 (bullish momentum)
+        (macd > macd_signal) &  # Bullish MACD
+        (close > sma_long),  # Price above long-term moving average
+        1,
+
+        # Sell Conditions
+        np.where(
+            (sma_short < sma_long) &  # Bearish moving average crossover
+            (rsi < 50) &  # RSI below 50 (bearish momentum)
+            (macd < macd_signal) &  # Bearish MACD
+            (close < sma_long),  # Price below long-term moving average
+            -1,
+            0  # Neutral
+        )
+    )
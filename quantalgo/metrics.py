@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import atexit
+import cProfile
+import functools
+import threading
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# QIAB_METRICS=json or prometheus turns the hooks on; QIAB_PROFILE_DIR alone
+# turns them on too, with JSON output
+METRICS = os.getenv("QIAB_METRICS", "").lower()
+if METRICS in ("0", "off", "false"):
+    METRICS = ""
+METRICS_PATH = os.getenv("QIAB_METRICS_PATH", "")
+PROFILE_DIR = os.getenv("QIAB_PROFILE_DIR", "")
+TRACK_MEMORY = os.getenv("QIAB_METRICS_MEMORY", "") not in ("", "0")
+
+
+class _Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.format = "json"
+        self.path = ""
+        self.profile_dir = ""
+        self.memory = False
+        self.stages = {}
+        self.profiles = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.registered = False
+
+
+_metrics = _Metrics()
+
+
+def enable(format="json", path="", profile_dir="", memory=False):
+    """
+    Turn the stage hooks on: timings (and with `memory` traced allocation
+    peaks) are written as `format` "json" or "prometheus" to `path` (stderr
+    if empty) when the process exits. With `profile_dir` every stage also
+    runs under cProfile and its profile is dumped there as <stage>.prof.
+    """
+    _metrics.format = "prometheus" if format.startswith("prom") else "json"
+    _metrics.path = path
+    _metrics.profile_dir = profile_dir
+    _metrics.memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if not _metrics.registered:
+        atexit.register(dump)
+        _metrics.registered = True
+    _metrics.enabled = True
+
+
+def disable():
+    _metrics.enabled = False
+
+
+def enabled():
+    return _metrics.enabled
+
+
+def _max_rss():
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class _Stage:
+    __slots__ = ("name", "start", "base", "peak", "profile")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_metrics.local, "stack", None)
+        if stack is None:
+            stack = _metrics.local.stack = []
+        self.base = self.peak = 0
+        if _metrics.memory:
+            # Each stage measures its own peak; the parent's is carried on in its frame
+            self.base, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+        self.profile = None
+        if _metrics.profile_dir and not any(frame.profile for frame in stack):
+            # cProfile doesn't nest; an inner stage shows up in the outer one's profile
+            with _metrics.lock:
+                self.profile = _metrics.profiles.setdefault(self.name, cProfile.Profile())
+            self.profile.enable()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        if self.profile is not None:
+            self.profile.disable()
+        stack = _metrics.local.stack
+        # Not necessarily the top one when generators interleave
+        stack.remove(self)
+        if _metrics.memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+        _record(self.name, seconds, max(self.peak - self.base, 0))
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullStage()
+
+
+def _record(name, seconds, peak):
+    with _metrics.lock:
+        entry = _metrics.stages.get(name)
+        if entry is None:
+            entry = _metrics.stages[name] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "peak_bytes": 0}
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        entry["peak_bytes"] = max(entry["peak_bytes"], peak)
+
+
+def stage(name):
+    """
+    Context manager timing the block as stage `name`:
+
+        with stage("backtest.fetch_data"):
+            ...
+
+    A shared no-op while the hooks are off.
+    """
+    return _Stage(name) if _metrics.enabled else _NULL
+
+
+def timed(name):
+    """Decorator running the whole function as stage `name`; one flag check per call while off."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _metrics.enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    """{stage: {calls, seconds, max_seconds, peak_bytes}} recorded so far."""
+    with _metrics.lock:
+        return {name: dict(entry) for name, entry in _metrics.stages.items()}
+
+
+def render(format=None):
+    """The recorded stages as a JSON document or Prometheus text exposition."""
+    stages = snapshot()
+    if (format or _metrics.format) == "json":
+        return json.dumps({"time": time.time(), "pid": os.getpid(), "max_rss_bytes": _max_rss(),
+                           "stages": stages}, indent=2)
+
+    lines = []
+    metrics = [("calls", "counter", "calls_total", "Calls of the stage"),
+               ("seconds", "counter", "seconds_total", "Wall time spent in the stage"),
+               ("max_seconds", "gauge", "seconds_max", "Longest single call of the stage"),
+               ("peak_bytes", "gauge", "peak_bytes", "Peak traced allocations above those at the start of the stage")]
+    for key, kind, suffix, help_text in metrics:
+        lines.append(f"# HELP qiab_stage_{suffix} {help_text}")
+        lines.append(f"# TYPE qiab_stage_{suffix} {kind}")
+        for name, entry in stages.items():
+            lines.append(f'qiab_stage_{suffix}{{stage="{name}"}} {entry[key]}')
+    lines.append("# HELP qiab_max_rss_bytes Peak resident memory of the process")
+    lines.append("# TYPE qiab_max_rss_bytes gauge")
+    lines.append(f"qiab_max_rss_bytes {_max_rss()}")
+    return "\n".join(lines) + "\n"
+
+
+def dump():
+    """Write the metrics and per-stage profiles where enable() was told to."""
+    if not _metrics.stages:
+        return
+    text = render()
+    if _metrics.path:
+        with open(_metrics.path, "w") as f:
+            f.write(text)
+    else:
+        sys.stderr.write(text + "\n")
+    if _metrics.profile_dir:
+        os.makedirs(_metrics.profile_dir, exist_ok=True)
+        with _metrics.lock:
+            profiles = dict(_metrics.profiles)
+        for name, profile in profiles.items():
+            profile.dump_stats(os.path.join(_metrics.profile_dir, f"{name}.prof"))
+
+
+if METRICS or PROFILE_DIR:
+    enable(METRICS or "json", METRICS_PATH, PROFILE_DIR, TRACK_MEMORY)
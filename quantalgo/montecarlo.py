@@ -0,0 +1,249 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from .pricestore import fetch_history
+from .sharedmem import share_array, attach_array
+from .universe import calculate_universe_indicators
+
+
+def bootstrap_paths(close, n_paths=10_000, n_bars=None, block_size=20, seed=0):
+    """
+    Resampled price paths (paths x time) from the log returns of `close`.
+
+    Returns are drawn in contiguous blocks of `block_size` bars (block
+    bootstrap), which keeps short-range autocorrelation and volatility
+    clustering. block_size=1 is a plain iid bootstrap. Every path starts at
+    the first historical close.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.diff(np.log(close))
+    n_bars = n_bars or len(close)
+    n_steps = n_bars - 1
+    block_size = min(block_size, len(returns))
+
+    rng = np.random.default_rng(seed)
+    n_blocks = -(-n_steps // block_size)
+    starts = rng.integers(0, len(returns) - block_size + 1, size=(n_paths, n_blocks))
+    picks = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :n_steps]
+
+    log_paths = np.empty((n_paths, n_bars))
+    log_paths[:, 0] = np.log(close[0])
+    np.cumsum(returns[picks], axis=1, out=log_paths[:, 1:])
+    log_paths[:, 1:] += log_paths[:, :1]
+    return np.exp(log_paths)
+
+
+def adaptive_signals(paths, **indicator_params):
+    """Signal of calculate_advanced_indicators for every path."""
+    return calculate_universe_indicators(pd.DataFrame(paths.T), **indicator_params)["Signal"].to_numpy().T
+
+
+def bollinger_signals(paths, window=20):
+    """Signal of test.mean_reversion_strategy for every path."""
+    close = pd.DataFrame(paths.T)
+    sma = close.rolling(window=window).mean()
+    std = close.rolling(window=window).std()
+    upper = (sma + (2 * std)).to_numpy().T
+    lower = (sma - (2 * std)).to_numpy().T
+    return np.where(paths < lower, 1, np.where(paths > upper, -1, 0))
+
+
+def adaptive_backtest_paths(paths, signals, initial_capital=100000,
+                            risk_per_trade=0.02, trailing_stop_loss_pct=0.05):
+    """
+    The backtest_with_adaptive_strategy state machine run on all paths at once.
+
+    Steps through time once, updating every path's cash, position and
+    trailing stop with array operations. Returns (portfolio values, trades,
+    winning trades) for every path.
+    """
+    n_paths, n_bars = paths.shape
+    values = np.empty((n_paths, n_bars))
+    values[:, 0] = initial_capital
+    cash = np.full(n_paths, float(initial_capital))
+    shares = np.zeros(n_paths)
+    buy_price = np.zeros(n_paths)
+    trailing_stop = np.zeros(n_paths)
+    trades = np.zeros(n_paths, dtype=np.int64)
+    wins = np.zeros(n_paths, dtype=np.int64)
+    stop_factor = 1 - trailing_stop_loss_pct
+    trail_factor = 1 + trailing_stop_loss_pct
+
+    for i in range(1, n_bars):
+        price = paths[:, i]
+        signal = signals[:, i]
+
+        buy = (signal == 1) & (shares == 0)
+        if buy.any():
+            new_shares = np.floor(cash[buy] * risk_per_trade / price[buy])
+            shares[buy] = new_shares
+            buy_price[buy] = price[buy]
+            cash[buy] -= new_shares * price[buy]
+            trailing_stop[buy] = price[buy] * stop_factor
+
+        sell = (shares > 0) & ((signal == -1) | (price <= trailing_stop))
+        if sell.any():
+            sell_value = shares[sell] * price[sell]
+            cash[sell] += sell_value
+            trades[sell] += 1
+            wins[sell] += sell_value - shares[sell] * buy_price[sell] > 0
+            shares[sell] = 0
+            buy_price[sell] = 0
+            trailing_stop[sell] = 0
+
+        trail = (shares > 0) & (price > buy_price * trail_factor)
+        trailing_stop[trail] = price[trail] * stop_factor
+        values[:, i] = cash + shares * price
+
+    return values, trades, wins
+
+
+def mean_reversion_backtest_paths(paths, signals, initial_capital=100000):
+    """The test.py backtest loop run on all paths at once; returns (values, trades, wins)."""
+    n_paths, n_bars = paths.shape
+    values = np.empty((n_paths, n_bars))
+    values[:, 0] = initial_capital
+    capital = np.full(n_paths, float(initial_capital))
+    position = np.zeros(n_paths)
+    cost = np.zeros(n_paths)
+    trades = np.zeros(n_paths, dtype=np.int64)
+    wins = np.zeros(n_paths, dtype=np.int64)
+
+    for i in range(1, n_bars):
+        price = paths[:, i]
+        signal = signals[:, i]
+
+        buy = signal == 1
+        if buy.any():
+            position[buy] = capital[buy] // price[buy]
+            cost[buy] = position[buy] * price[buy]
+            capital[buy] -= cost[buy]
+
+        sell = (signal == -1) & (position > 0)
+        if sell.any():
+            proceeds = position[sell] * price[sell]
+            capital[sell] += proceeds
+            trades[sell] += 1
+            wins[sell] += proceeds > cost[sell]
+            position[sell] = 0
+
+        values[:, i] = capital + position * price
+
+    return values, trades, wins
+
+
+def path_results(paths, strategy="adaptive", initial_capital=100000, **params):
+    """Final value, max drawdown, trades and winning trades of `strategy` on every path."""
+    if strategy == "adaptive":
+        backtest_params = {name: params.pop(name) for name in ("risk_per_trade", "trailing_stop_loss_pct")
+                           if name in params}
+        signals = adaptive_signals(paths, **params)
+        values, trades, wins = adaptive_backtest_paths(paths, signals, initial_capital, **backtest_params)
+    elif strategy == "bollinger":
+        signals = bollinger_signals(paths, **params)
+        values, trades, wins = mean_reversion_backtest_paths(paths, signals, initial_capital)
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    peak = np.maximum.accumulate(values, axis=1)
+    return {
+        "final_value": values[:, -1],
+        "max_drawdown_pct": ((values - peak) / peak).min(axis=1) * 100,
+        "trades": trades,
+        "wins": wins,
+    }
+
+
+def summarize_paths(results, initial_capital=100000):
+    """Per-path results and the distribution of final value, drawdown and trade count."""
+    final_value = results["final_value"]
+    trades = results["trades"]
+    per_path = pd.DataFrame({
+        "final_value": final_value,
+        "total_return_pct": (final_value - initial_capital) / initial_capital * 100,
+        "max_drawdown_pct": results["max_drawdown_pct"],
+        "trades": trades,
+        "win_rate": np.divide(results["wins"], trades, out=np.full(len(trades), np.nan), where=trades > 0),
+    })
+    summary = per_path.quantile([0.05, 0.25, 0.5, 0.75, 0.95]).T
+    summary.columns = ["p5", "p25", "median", "p75", "p95"]
+    summary.insert(0, "mean", per_path.mean())
+    summary.loc["prob_loss", "mean"] = (final_value < initial_capital).mean()
+    return summary, per_path
+
+
+_worker = {}
+
+
+def _init_worker(spec):
+    _worker["shm"], _worker["paths"] = attach_array(spec)
+
+
+def _run_block(task):
+    lo, hi, strategy, initial_capital, params = task
+    return path_results(_worker["paths"][lo:hi], strategy, initial_capital, **params)
+
+
+def monte_carlo(df, strategy="adaptive", n_paths=10_000, n_bars=None, block_size=20, seed=0,
+                initial_capital=100000, processes=None, paths_per_task=1000, **params):
+    """
+    Robustness run of the backtestm.py ("adaptive") or test.py ("bollinger")
+    strategy over `n_paths` block-bootstrapped versions of `df`'s history.
+
+    Extra keyword arguments go to the indicator and backtest functions
+    (e.g. short_window, risk_per_trade, window). Blocks of paths are spread
+    over a process pool that reads them from shared memory. Returns
+    (distribution summary, per-path results).
+    """
+    paths = bootstrap_paths(df["Close"].to_numpy(), n_paths, n_bars, block_size, seed)
+    tasks = [(lo, lo + paths_per_task, strategy, initial_capital, params)
+             for lo in range(0, n_paths, paths_per_task)]
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or len(tasks) <= 1:
+        _worker["paths"] = paths
+        try:
+            results = [_run_block(task) for task in tasks]
+        finally:
+            _worker.clear()
+    else:
+        shm, spec = share_array(paths)
+        try:
+            with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(spec,)) as pool:
+                results = list(pool.map(_run_block, tasks))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    results = {name: np.concatenate([r[name] for r in results]) for name in results[0]}
+    return summarize_paths(results, initial_capital)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bootstrap robustness run of a strategy.")
+    parser.add_argument("symbol")
+    parser.add_argument("--strategy", choices=["adaptive", "bollinger"], default="adaptive")
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--block-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--capital", type=float, default=100000)
+    parser.add_argument("--processes", type=int)
+    args = parser.parse_args(argv)
+
+    df = fetch_history(args.symbol, period=args.period)
+    if df.empty:
+        print(f"Error fetching data: No data retrieved for {args.symbol}")
+        return
+    summary, _ = monte_carlo(df, args.strategy, args.paths, block_size=args.block_size, seed=args.seed,
+                             initial_capital=args.capital, processes=args.processes)
+    print(f"\n--- {args.strategy} strategy over {args.paths} bootstrap paths of {args.symbol} ---")
+    with pd.option_context("display.width", 120, "display.float_format", "{:,.2f}".format):
+        print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import math
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from .sharedmem import share_array, attach_array
+from .metrics import stage, timed
+
+
+@timed("pairs.correlate")
+def correlated_pairs(closes, min_corr=0.8, block_size=256, since=0):
+    """
+    Pre-screen: every pair (i < j) whose daily returns correlate at least `min_corr`.
+
+    Only pairs whose second symbol is column `since` or later are screened.
+    The correlation matrix is built one block of rows at a time, so memory
+    stays at block_size x N no matter how large the universe is.
+    """
+    returns = np.diff(closes, axis=0) / closes[:-1]
+    z = (returns - returns.mean(axis=0)) / returns.std(axis=0, ddof=1)
+    z /= math.sqrt(len(z) - 1)
+
+    firsts, seconds, corrs = [], [], []
+    n = z.shape[1]
+    for lo in range(0, n, block_size):
+        start = max(lo, since)
+        block = z[:, lo:lo + block_size].T @ z[:, start:]
+        rows, cols = np.nonzero(block >= min_corr)
+        keep = cols + start > rows + lo  # upper triangle only
+        firsts.append(rows[keep] + lo)
+        seconds.append(cols[keep] + start)
+        corrs.append(block[rows[keep], cols[keep]])
+    return np.concatenate(firsts), np.concatenate(seconds), np.concatenate(corrs)
+
+
+def spread_statistics(spread, window=30):
+    """
+    Rolling z-score and mean-reversion statistics of a time x pairs spread matrix.
+
+    The z-score has the same definition as breakout.fetch_pair_data (30 bar
+    rolling mean and sample std). It is computed from running sums of the
+    mean-centred spread for all pairs at once, so it agrees with pandas up
+    to rounding.
+    The Dickey-Fuller t-statistic regresses the spread's change on its lagged
+    level. It is the stationarity (unit hedge ratio cointegration) screen, and
+    the more negative the better. The half-life comes from the same regression.
+    """
+    centred = spread - spread.mean(axis=0)
+    sums = np.cumsum(np.vstack([np.zeros((1, centred.shape[1])), centred]), axis=0)
+    squares = np.cumsum(np.vstack([np.zeros((1, centred.shape[1])), centred * centred]), axis=0)
+    s1 = sums[window:] - sums[:-window]
+    s2 = squares[window:] - squares[:-window]
+    mean = s1 / window
+    var = np.maximum(s2 - s1 * mean, 0) / (window - 1)
+    zscore = np.full(spread.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zscore[window - 1:] = (centred[window - 1:] - mean) / np.sqrt(var)
+
+    x = spread[:-1] - spread[:-1].mean(axis=0)
+    y = np.diff(spread, axis=0)
+    y = y - y.mean(axis=0)
+    sxx = (x * x).sum(axis=0)
+    beta = (x * y).sum(axis=0) / sxx
+    resid = y - beta * x
+    se = np.sqrt((resid * resid).sum(axis=0) / (len(y) - 2) / sxx)
+    with np.errstate(divide="ignore"):
+        half_life = np.where(beta < 0, -math.log(2) / beta, np.inf)
+    return zscore, beta / se, half_life
+
+
+_worker = {}
+
+
+def _init_worker(spec):
+    _worker["shm"], _worker["closes"] = attach_array(spec)
+
+
+def _score_block(task):
+    start, firsts, seconds, window, entry_threshold = task
+    closes = _worker["closes"][start:]
+    spread = closes[:, firsts] - closes[:, seconds]
+    zscore, adf_t, half_life = spread_statistics(spread, window)
+    last_z = zscore[-1]
+    signal = np.where(last_z > entry_threshold, -1, np.where(last_z < -entry_threshold, 1, 0))
+    return adf_t, half_life, last_z, signal
+
+
+@timed("pairs.scan")
+def scan_pairs(closes, window=30, min_corr=0.8, entry_threshold=2,
+               block_size=256, processes=None, top=None):
+    """
+    Rank every pair of a universe for pairs trading.
+
+    `closes` is a time x symbols DataFrame (e.g. universe.close_matrix).
+    Pairs passing the correlation pre-screen are scored in blocks of
+    `block_size` over a process pool that reads the prices from shared
+    memory. Returns one row per candidate, most mean-reverting spread first,
+    with the current z-score and the pairs_trading_strategy signal for it.
+
+    Symbols without a price on the last date, or with fewer than 2 x
+    `window` bars, are left out and printed. Every other pair is scored over
+    the dates both of its symbols have prices for, so a late lister doesn't
+    shorten the history of the others. The date the z-scores and signals
+    are for is in the table's attrs["as_of"].
+    """
+    as_of = closes.index[-1]
+    stale = closes.iloc[-1].isna()
+    if stale.any():
+        print(f"Pairs scan skips {', '.join(map(str, closes.columns[stale]))}: no price on {as_of}")
+    closes = closes.loc[:, ~stale]
+    short = closes.notna().sum() < 2 * window
+    if short.any():
+        print(f"Pairs scan skips {', '.join(map(str, closes.columns[short]))}: fewer than {2 * window} bars")
+    closes = closes.loc[:, ~short].ffill()
+
+    # Symbols ordered by their first bar, so the pairs involving the ones
+    # listed at `start` are those with a second column from `since` on
+    first = closes.notna().to_numpy().argmax(axis=0)
+    order = np.argsort(first, kind="stable")
+    first = first[order]
+    symbols = np.asarray(closes.columns)[order]
+    prices = closes.to_numpy(dtype=np.float64)[:, order]
+
+    firsts, seconds, corrs, tasks = [], [], [], []
+    for start in np.unique(first):
+        since = np.searchsorted(first, start)
+        listed = np.searchsorted(first, start, side="right")
+        f, s, c = correlated_pairs(prices[start:, :listed], min_corr, block_size, since)
+        tasks += [(start, f[lo:lo + block_size], s[lo:lo + block_size], window, entry_threshold)
+                  for lo in range(0, len(f), block_size)]
+        firsts.append(f)
+        seconds.append(s)
+        corrs.append(c)
+    firsts, seconds, corrs = (np.concatenate(parts or [np.empty(0, dtype=int)]) for parts in (firsts, seconds, corrs))
+    processes = processes or os.cpu_count() or 1
+
+    with stage("pairs.score"):
+        if processes == 1 or len(tasks) <= 1:
+            _worker["closes"] = prices
+            try:
+                results = [_score_block(task) for task in tasks]
+            finally:
+                _worker.clear()
+        else:
+            shm, spec = share_array(prices)
+            try:
+                with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(spec,)) as pool:
+                    results = list(pool.map(_score_block, tasks))
+            finally:
+                shm.close()
+                shm.unlink()
+
+    columns = ["ADF_t", "Half_Life", "Z-Score", "Signal"]
+    scores = [np.concatenate([r[k] for r in results]) if results else np.empty(0) for k in range(len(columns))]
+    table = pd.DataFrame({"Stock1": symbols[firsts], "Stock2": symbols[seconds], "Correlation": corrs,
+                          **dict(zip(columns, scores))})
+    table = table.sort_values("ADF_t", kind="stable").reset_index(drop=True)
+    table.attrs["as_of"] = as_of
+    return table if top is None else table.head(top)
@@ -0,0 +1,257 @@
+import os
+import re
+import json
+import time
+import numpy as np
+import pandas as pd
+
+STORE_DIR = os.environ.get(
+    "QIAB_STORE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "qiab", "prices")
+)
+FIXTURE_DIR = os.environ.get("QIAB_FIXTURE_DIR")
+MAX_AGE = float(os.environ.get("QIAB_STORE_MAX_AGE", 6 * 3600))
+
+_PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+
+def period_start(end, period):
+    """Start of a yfinance style `period` ("6mo", "2y", "ytd", "max") ending at `end`."""
+    if period == "max":
+        return None
+    if period == "ytd":
+        return end.normalize().replace(month=1, day=1)
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if match is None:
+        raise ValueError(f"Unsupported period: {period}")
+    return end - pd.DateOffset(**{_PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+
+
+class YahooProvider:
+    """Download history from Yahoo Finance."""
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        import yfinance as yf
+        if start is not None:
+            return yf.Ticker(symbol).history(start=start, interval=interval)
+        return yf.Ticker(symbol).history(period=period, interval=interval)
+
+
+class FixtureProvider:
+    """
+    Serve history from `<fixture_dir>/<symbol>.csv` instead of the network.
+
+    Periods are measured back from the last row of the fixture, so an old
+    fixture keeps producing the same window on every run.
+    """
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        path = os.path.join(self.fixture_dir, f"{symbol}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True)
+        if start is not None:
+            return df[df.index >= start]
+        first = period_start(df.index[-1], period) if period else None
+        return df if first is None else df[df.index >= first]
+
+
+def default_provider():
+    if FIXTURE_DIR:
+        return FixtureProvider(FIXTURE_DIR)
+    return YahooProvider()
+
+
+class PriceStore:
+    """
+    Per-symbol columnar OHLCV store.
+
+    Every symbol lives in `<root>/<interval>/<symbol>/` as one raw little-endian
+    file per column plus an int64 UTC nanosecond index, all readable with
+    `np.memmap`. Refreshing only downloads bars from the last stored date on,
+    overwriting the overlapping bars and appending the new ones in place.
+    """
+
+    def __init__(self, root=STORE_DIR, provider=None, max_age=MAX_AGE):
+        self.root = root
+        self.provider = provider or default_provider()
+        self.max_age = max_age
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, interval, symbol.replace("/", "_"))
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, path, meta):
+        tmp = os.path.join(path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "meta.json"))
+
+    def _mapped(self, symbol, interval):
+        """Metadata plus memory maps of the index and every column, or None."""
+        path = self._dir(symbol, interval)
+        meta = self._read_meta(path)
+        if meta is None or meta["rows"] == 0:
+            return None
+
+        rows = meta["rows"]
+        files = [("index.i8", "<i8")] + [(f"c{i}.bin", dtype) for i, (_, dtype) in enumerate(meta["columns"])]
+        try:
+            short = any(os.path.getsize(os.path.join(path, fname)) < rows * np.dtype(dtype).itemsize
+                        for fname, dtype in files)
+        except OSError:
+            short = True
+        if short:
+            # Left behind by an interrupted write, the next refresh downloads it again
+            return None
+
+        index = np.memmap(os.path.join(path, "index.i8"), dtype="<i8", mode="r", shape=(rows,))
+        data = {
+            name: np.memmap(os.path.join(path, f"c{i}.bin"), dtype=dtype, mode="r", shape=(rows,))
+            for i, (name, dtype) in enumerate(meta["columns"])
+        }
+        return meta, index, data
+
+    def _frame(self, meta, index, data):
+        idx = pd.DatetimeIndex(index, tz="UTC", name=meta["index_name"])
+        if meta["tz"]:
+            idx = idx.tz_convert(meta["tz"])
+        return pd.DataFrame(data, index=idx, copy=False)
+
+    def load(self, symbol, interval="1d"):
+        """Return everything stored for `symbol`, memory mapped, or None."""
+        mapped = self._mapped(symbol, interval)
+        return None if mapped is None else self._frame(*mapped)
+
+    def iter_chunks(self, symbol, interval="1d", chunksize=100_000, columns=None):
+        """Yield the stored history of `symbol` as DataFrames of at most `chunksize` rows."""
+        mapped = self._mapped(symbol, interval)
+        if mapped is None:
+            return
+        meta, index, data = mapped
+        names = columns or list(data)
+        for lo in range(0, meta["rows"], chunksize):
+            hi = lo + chunksize
+            yield self._frame(meta, np.array(index[lo:hi]), {name: np.array(data[name][lo:hi]) for name in names})
+
+    def _write(self, path, df, meta, keep):
+        """
+        Keep the first `keep` stored rows and write `df` after them.
+
+        meta.json only ever counts rows that are fully on disk: it is cut
+        to `keep` rows first and grown once the files are written. Files are
+        never truncated, since other processes may have them memory mapped.
+        A full rewrite goes to new files renamed over the old ones, an
+        incremental one overwrites from row `keep` on in place.
+        """
+        os.makedirs(path, exist_ok=True)
+        stored = self._read_meta(path)
+        if stored is not None and stored["rows"] > keep:
+            # A stale fetched_at, so an interrupted write is refreshed next time
+            self._write_meta(path, {**meta, "rows": keep, "fetched_at": 0})
+
+        index = df.index.tz_localize("UTC") if df.index.tz is None else df.index.tz_convert("UTC")
+        arrays = [("index.i8", index.asi8.astype("<i8"))]
+        arrays += [(f"c{i}.bin", df[name].to_numpy(dtype=dtype)) for i, (name, dtype) in enumerate(meta["columns"])]
+        for fname, values in arrays:
+            target = os.path.join(path, fname)
+            data = np.ascontiguousarray(values).tobytes()
+            if keep:
+                with open(target, "r+b") as f:
+                    f.seek(keep * values.dtype.itemsize)
+                    f.write(data)
+            else:
+                with open(target + ".tmp", "wb") as f:
+                    f.write(data)
+                os.replace(target + ".tmp", target)
+
+        meta["rows"] = keep + len(df)
+        meta["fetched_at"] = time.time()
+        self._write_meta(path, meta)
+
+    def _covers(self, meta, stored, period):
+        """Whether the stored bars reach back far enough for `period`."""
+        if period == meta.get("period"):
+            return True
+        wanted = period_start(stored.index[-1], period)
+        return wanted is not None and wanted >= stored.index[0]
+
+    def refresh(self, symbol, period="2y", interval="1d"):
+        """Bring the stored history of `symbol` up to date, downloading as little as possible."""
+        path = self._dir(symbol, interval)
+        meta = self._read_meta(path)
+        stored = self.load(symbol, interval)
+
+        if stored is not None and self._covers(meta, stored, period):
+            if time.time() - meta["fetched_at"] < self.max_age:
+                return
+
+            # Re-request the last stored day as well, its bar may have been partial
+            tail = self.provider.history(symbol, start=stored.index[-1].normalize(), interval=interval)
+            if tail.empty:
+                meta["fetched_at"] = time.time()
+                self._write_meta(path, meta)
+                return
+            if [str(c) for c in tail.columns] == [c for c, _ in meta["columns"]]:
+                keep = int(np.searchsorted(stored.index.asi8, _utc_ns(tail.index[0]), "left"))
+                del stored
+                self._write(path, tail, meta, keep)
+                return
+
+        df = self.provider.history(symbol, period=period, interval=interval)
+        del stored
+        if df.empty:
+            return
+        self._write(path, df, {"period": period, **_new_meta(df)}, 0)
+
+    def history(self, symbol, period="2y", interval="1d"):
+        """Return the last `period` of `symbol`, refreshing the store first."""
+        try:
+            self.refresh(symbol, period, interval)
+        except Exception as e:
+            print(f"Error refreshing {symbol}, using stored data: {e}")
+
+        df = self.load(symbol, interval)
+        if df is None:
+            return pd.DataFrame()
+        first = period_start(df.index[-1], period)
+        if first is not None:
+            df = df[df.index >= first]
+        return df.copy()
+
+
+def _new_meta(df):
+    return {
+        "columns": [[str(c), "<i8" if df[c].dtype.kind in "iu" else "<f8"] for c in df.columns],
+        "tz": str(df.index.tz) if df.index.tz is not None else None,
+        "index_name": df.index.name,
+    }
+
+
+def _utc_ns(ts):
+    ts = pd.Timestamp(ts)
+    return (ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")).value
+
+
+_default_store = None
+
+
+def default_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = PriceStore()
+    return _default_store
+
+
+def fetch_history(symbol, period="2y", interval="1d"):
+    """Fetch `period` of OHLCV history for `symbol` through the shared local store."""
+    return default_store().history(symbol, period, interval)
@@ -1,13 +1,16 @@
-import yfinance as yf
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from .pricestore import fetch_history
+from .metrics import timed
+from .charts import downsample, figure, finish, output_path
 
+@timed("rsi.fetch_data")
 def fetch_data(symbol, period="6mo"):
-    stock = yf.Ticker(symbol)
-    df = stock.history(period=period)
+    df = fetch_history(symbol, period=period)
     return df
 
+@timed("rsi.indicators")
 def compute_rsi(df, period=14):
     delta = df["Close"].diff()
     gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
@@ -17,18 +20,35 @@ def compute_rsi(df, period=14):
     df["RSI"] = 100 - (100 / (1 + rs))
     return df
 
+@timed("rsi.signals")
 def rsi_strategy(df):
     df["Signal"] = np.where(df["RSI"] < 30, 1, np.where(df["RSI"] > 70, -1, 0))
     return df
 
-df = fetch_data("TCS.NS")
-df = compute_rsi(df)
-df = rsi_strategy(df)
-
-plt.figure(figsize=(12,6))
-plt.plot(df.index, df["Close"], label="Stock Price")
-plt.scatter(df[df["Signal"] == 1].index, df[df["Signal"] == 1]["Close"], marker="^", color="green", label="Buy Signal", alpha=1)
-plt.scatter(df[df["Signal"] == -1].index, df[df["Signal"] == -1]["Close"], marker="v", color="red", label="Sell Signal", alpha=1)
-plt.title("RSI Mean Reversion Strategy")
-plt.legend()
-plt.show()
+@timed("rsi.plot")
+def plot_rsi(df, symbol, path=None):
+    """Price with RSI signals; written to `path` (or QIAB_PLOT_DIR) instead of shown when given."""
+    path = output_path(path, f"{symbol}_rsi")
+    fig = figure((12,6), path)
+    ax = fig.add_subplot()
+    view = downsample(df["Close"])
+    ax.plot(view.index, view, label="Stock Price")
+    ax.scatter(df[df["Signal"] == 1].index, df[df["Signal"] == 1]["Close"], marker="^", color="green", label="Buy Signal", alpha=1)
+    ax.scatter(df[df["Signal"] == -1].index, df[df["Signal"] == -1]["Close"], marker="v", color="red", label="Sell Signal", alpha=1)
+    ax.set_title("RSI Mean Reversion Strategy")
+    ax.legend()
+    return finish(fig, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RSI mean reversion signals for one symbol.")
+    parser.add_argument("symbol", nargs="?", default="TCS.NS")
+    parser.add_argument("--period", default="6mo")
+    args = parser.parse_args(argv)
+
+    df = fetch_data(args.symbol, args.period)
+    df = compute_rsi(df)
+    df = rsi_strategy(df)
+    plot_rsi(df, args.symbol)
+
+if __name__ == "__main__":
+    main()
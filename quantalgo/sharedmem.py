@@ -0,0 +1,25 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+
+def share_array(array):
+    """
+    Copy `array` into a new shared memory block.
+
+    Returns the block, which the caller must close() and unlink() when done,
+    and a small picklable spec that worker processes pass to attach_array.
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attach_array(spec):
+    """Attach to a block created by share_array and return (block, read-only view)."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    view.flags.writeable = False
+    return shm, view
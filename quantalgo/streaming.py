@@ -0,0 +1,302 @@
+import math
+import numpy as np
+
+NaN = float("nan")
+
+
+def _div(a, b):
+    """a / b with NumPy's IEEE semantics instead of ZeroDivisionError."""
+    if b == 0:
+        if a == 0 or a != a:
+            return NaN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class RingBuffer:
+    """Fixed-size window over the most recent values."""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = [NaN] * size
+        self.pos = 0
+        self.count = 0
+
+    def push(self, value):
+        """Store `value` and return the one it pushes out of the window (None while filling)."""
+        evicted = self.values[self.pos] if self.count == self.size else None
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        return evicted
+
+
+class RollingMean:
+    """
+    Streaming `Series.rolling(window, min_periods).mean()`.
+
+    Follows pandas' own add/remove Kahan summation step for step, so every
+    value is bit-identical to the batch result.
+    """
+
+    def __init__(self, window, min_periods=None):
+        self.window = RingBuffer(window)
+        self.min_periods = window if min_periods is None else min_periods
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def update(self, value):
+        evicted = self.window.push(value)
+        if self.prev_value is None:
+            self.prev_value = value
+
+        if evicted is not None and evicted == evicted:
+            self.nobs -= 1
+            y = -evicted - self.compensation_remove
+            t = self.sum_x + y
+            self.compensation_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, evicted) < 0:
+                self.neg_ct -= 1
+
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+        nobs = self.nobs
+        if nobs < self.min_periods or nobs == 0:
+            return NaN
+        result = self.sum_x / nobs
+        if self.num_consecutive_same_value >= nobs:
+            return self.prev_value
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == nobs and result > 0:
+            return 0.0
+        return result
+
+
+class RollingStd:
+    """Streaming `Series.rolling(window, min_periods).std()` (ddof=1), using pandas' Welford update."""
+
+    def __init__(self, window, min_periods=None, ddof=1):
+        self.window = RingBuffer(window)
+        self.min_periods = max(window if min_periods is None else min_periods, 1)
+        self.ddof = ddof
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def update(self, value):
+        evicted = self.window.push(value)
+        if self.prev_value is None:
+            self.prev_value = value
+
+        if evicted is not None and evicted == evicted:
+            self.nobs -= 1
+            if self.nobs:
+                prev_mean = self.mean_x - self.compensation_remove
+                y = evicted - self.compensation_remove
+                t = y - self.mean_x
+                self.compensation_remove = t + self.mean_x - y
+                self.mean_x = self.mean_x - t / self.nobs
+                self.ssqdm_x = self.ssqdm_x - (evicted - prev_mean) * (evicted - self.mean_x)
+            else:
+                self.mean_x = 0.0
+                self.ssqdm_x = 0.0
+
+        if value == value:
+            self.nobs += 1
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+            prev_mean = self.mean_x - self.compensation_add
+            y = value - self.compensation_add
+            t = y - self.mean_x
+            self.compensation_add = t + self.mean_x - y
+            self.mean_x = self.mean_x + t / self.nobs
+            self.ssqdm_x = self.ssqdm_x + (value - prev_mean) * (value - self.mean_x)
+
+        nobs = self.nobs
+        if nobs < self.min_periods or nobs <= self.ddof:
+            return NaN
+        if nobs == 1 or self.num_consecutive_same_value >= nobs:
+            return 0.0
+        var = self.ssqdm_x / (nobs - self.ddof)
+        return math.sqrt(var) if var >= 0 else 0.0
+
+
+class EMA:
+    """Streaming `Series.ewm(span=span, adjust=False).mean()`, pandas' recursion step for step."""
+
+    def __init__(self, span):
+        com = (span - 1) / 2.0
+        self.alpha = 1. / (1. + com)
+        self.old_wt_factor = 1. - self.alpha
+        self.weighted = None
+
+    def update(self, value):
+        weighted = self.weighted
+        if weighted is None:
+            self.weighted = value
+        elif weighted == weighted:
+            if value == value and weighted != value:
+                old_wt = self.old_wt_factor
+                self.weighted = (old_wt * weighted + self.alpha * value) / (old_wt + self.alpha)
+        elif value == value:
+            self.weighted = value
+        return self.weighted
+
+
+class RSI:
+    """
+    Streaming RSI over rolling means of gains and losses.
+
+    `epsilon` and `min_periods` select between the two batch variants:
+    calculate_advanced_indicators uses min_periods=1 and epsilon=1e-10,
+    rsi.compute_rsi uses the full window and no epsilon.
+    """
+
+    def __init__(self, window, min_periods=None, epsilon=0.0):
+        self.gain = RollingMean(window, min_periods)
+        self.loss = RollingMean(window, min_periods)
+        self.epsilon = epsilon
+        self.prev_close = NaN
+
+    def update(self, close):
+        delta = close - self.prev_close
+        self.prev_close = close
+        # Same zero-filling (and sign of zero) as delta.where(...) in the batch code
+        gain = self.gain.update(delta if delta > 0 else 0.0)
+        loss = self.loss.update(-(delta if delta < 0 else 0.0))
+        rs = _div(gain, loss + self.epsilon)
+        return 100 - _div(100, 1 + rs)
+
+
+ADVANCED_COLUMNS = ("Close", "SMA_Short", "SMA_Long", "RSI", "MACD", "MACD_Signal", "Signal")
+
+
+class AdvancedSignal:
+    """
+    Incremental calculate_advanced_indicators for one instrument.
+
+    update() takes the next close and returns the row that the batch function
+    would produce for it, including the combined Signal.
+    """
+
+    def __init__(self,
+                 short_window=10,
+                 long_window=50,
+                 rsi_window=14,
+                 macd_short=12,
+                 macd_long=26,
+                 macd_signal=9):
+        self.sma_short = RollingMean(short_window, 1)
+        self.sma_long = RollingMean(long_window, 1)
+        self.rsi = RSI(rsi_window, 1, 1e-10)
+        self.ema_short = EMA(macd_short)
+        self.ema_long = EMA(macd_long)
+        self.macd_signal = EMA(macd_signal)
+
+    def _step(self, close):
+        sma_short = self.sma_short.update(close)
+        sma_long = self.sma_long.update(close)
+        rsi = self.rsi.update(close)
+        macd = self.ema_short.update(close) - self.ema_long.update(close)
+        macd_signal = self.macd_signal.update(macd)
+
+        if sma_short > sma_long and rsi > 50 and macd > macd_signal and close > sma_long:
+            signal = 1
+        elif sma_short < sma_long and rsi < 50 and macd < macd_signal and close < sma_long:
+            signal = -1
+        else:
+            signal = 0
+        return sma_short, sma_long, rsi, macd, macd_signal, signal
+
+    def update(self, close):
+        return dict(zip(ADVANCED_COLUMNS, (close,) + self._step(close)))
+
+    def update_many(self, closes):
+        """update() over a whole batch of closes, returned as one array per column."""
+        closes = np.asarray(closes, dtype=np.float64)
+        rows = [self._step(close) for close in closes.tolist()]
+        columns = np.array(rows, dtype=np.float64).reshape(len(rows), 6).T
+        out = {"Close": closes}
+        out.update(zip(ADVANCED_COLUMNS[1:-1], columns[:-1]))
+        out["Signal"] = columns[-1].astype(np.int64)
+        return out
+
+
+class RSISignal:
+    """Incremental rsi.compute_rsi + rsi.rsi_strategy."""
+
+    def __init__(self, period=14):
+        self.rsi = RSI(period)
+
+    def update(self, close):
+        rsi = self.rsi.update(close)
+        signal = 1 if rsi < 30 else -1 if rsi > 70 else 0
+        return {"Close": close, "RSI": rsi, "Signal": signal}
+
+
+class BollingerSignal:
+    """Incremental test.mean_reversion_strategy."""
+
+    def __init__(self, window=20):
+        self.sma = RollingMean(window)
+        self.std = RollingStd(window)
+
+    def update(self, close):
+        sma = self.sma.update(close)
+        std = self.std.update(close)
+        upper = sma + (2 * std)
+        lower = sma - (2 * std)
+        signal = 1 if close < lower else -1 if close > upper else 0
+        return {"Close": close, "SMA": sma, "StdDev": std,
+                "UpperBand": upper, "LowerBand": lower, "Signal": signal}
+
+
+class SignalBook:
+    """
+    Live signal state for many instruments.
+
+    `factory` builds the per-instrument state (e.g. AdvancedSignal); update()
+    feeds one new bar and returns its row, with "Changed" set when the
+    Signal differs from that instrument's previous bar.
+    """
+
+    def __init__(self, factory=AdvancedSignal):
+        self.factory = factory
+        self.states = {}
+        self.last_signal = {}
+
+    def update(self, instrument, close):
+        state = self.states.get(instrument)
+        if state is None:
+            state = self.states[instrument] = self.factory()
+        row = state.update(close)
+        row["Changed"] = row["Signal"] != self.last_signal.get(instrument, 0)
+        self.last_signal[instrument] = row["Signal"]
+        return row
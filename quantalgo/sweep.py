@@ -0,0 +1,161 @@
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from .engine import adaptive_strategy_kernel
+from .indicators import sma, ema, rsi, combined_signal
+from .sharedmem import share_array, attach_array
+from .test import mean_reversion_strategy
+
+INDICATOR_PARAMS = ("short_window", "long_window", "rsi_window", "macd_short", "macd_long", "macd_signal")
+BACKTEST_PARAMS = ("risk_per_trade", "trailing_stop_loss_pct")
+
+DEFAULTS = {
+    "short_window": 10,
+    "long_window": 50,
+    "rsi_window": 14,
+    "macd_short": 12,
+    "macd_long": 26,
+    "macd_signal": 9,
+    "risk_per_trade": 0.02,
+    "trailing_stop_loss_pct": 0.05,
+}
+
+
+class IndicatorCache:
+    """
+    Memoises the building blocks of calculate_advanced_indicators for one
+    close series, so combinations sharing a window or span reuse the work.
+    """
+
+    def __init__(self, close):
+        self.close = pd.Series(close)
+        self.values = {}
+
+    def _get(self, key, compute):
+        if key not in self.values:
+            self.values[key] = compute()
+        return self.values[key]
+
+    def sma(self, window):
+        return self._get(("sma", window), lambda: sma(self.close, window))
+
+    def rsi(self, window):
+        return self._get(("rsi", window), lambda: rsi(self.close, window))
+
+    def ema(self, span):
+        return self._get(("ema", span), lambda: ema(self.close, span))
+
+    def macd(self, short, long):
+        return self._get(("macd", short, long), lambda: self.ema(short) - self.ema(long))
+
+    def macd_signal(self, short, long, signal):
+        return self._get(("macd_signal", short, long, signal), lambda: ema(self.macd(short, long), signal))
+
+    def bollinger_signal(self, window):
+        """Signal column of test.mean_reversion_strategy for this window."""
+        return self._get(("bollinger", window), lambda: mean_reversion_strategy(
+            pd.DataFrame({"Close": self.close}), window)["Signal"].to_numpy())
+
+    def signal(self, short_window, long_window, rsi_window, macd_short, macd_long, macd_signal):
+        """Same Signal column calculate_advanced_indicators produces for these parameters."""
+        return combined_signal(
+            self.close.to_numpy(),
+            self.sma(short_window).to_numpy(),
+            self.sma(long_window).to_numpy(),
+            self.rsi(rsi_window).to_numpy(),
+            self.macd(macd_short, macd_long).to_numpy(),
+            self.macd_signal(macd_short, macd_long, macd_signal).to_numpy(),
+        )
+
+
+def summarize_run(portfolio_values, realized_gains, initial_capital):
+    """Headline statistics of one backtest run."""
+    peak = np.maximum.accumulate(portfolio_values)
+    gains = np.asarray(realized_gains, dtype=np.float64)
+    return {
+        "final_value": portfolio_values[-1],
+        "total_return_pct": (portfolio_values[-1] - initial_capital) / initial_capital * 100,
+        "max_drawdown_pct": ((portfolio_values - peak) / peak).min() * 100,
+        "trades": len(gains),
+        "win_rate": (gains > 0).mean() if len(gains) else np.nan,
+        "realized_gains": gains.sum(),
+    }
+
+
+_worker = {}
+
+
+def _init_worker(spec):
+    shm, close = attach_array(spec)
+    _worker["shm"] = shm
+    _worker["cache"] = IndicatorCache(close)
+
+
+def _run_group(task):
+    """Backtest every (risk, stop) pair of one indicator parameter set."""
+    indicator_params, backtest_params, initial_capital = task
+    cache = _worker["cache"]
+    close = cache.close.to_numpy()
+    signal = cache.signal(*indicator_params)
+
+    rows = []
+    for risk_per_trade, trailing_stop_loss_pct in backtest_params:
+        values, gains = adaptive_strategy_kernel(close, signal, initial_capital,
+                                                 risk_per_trade, trailing_stop_loss_pct)
+        row = dict(zip(INDICATOR_PARAMS, indicator_params))
+        row.update(risk_per_trade=risk_per_trade, trailing_stop_loss_pct=trailing_stop_loss_pct)
+        row.update(summarize_run(values, gains, initial_capital))
+        rows.append(row)
+    return rows
+
+
+def parameter_grid(grid):
+    """Expand {param: [values]} into indicator groups, each with its list of backtest params."""
+    unknown = set(grid) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+
+    values = {name: list(grid.get(name, [default])) for name, default in DEFAULTS.items()}
+    backtest = list(itertools.product(*(values[name] for name in BACKTEST_PARAMS)))
+    return [(combo, backtest) for combo in itertools.product(*(values[name] for name in INDICATOR_PARAMS))]
+
+
+def sweep(df, grid, initial_capital=100000, processes=None, rank_by="final_value"):
+    """
+    Grid-search calculate_advanced_indicators + the adaptive backtest.
+
+    `grid` maps parameter names of those two functions to the values to try.
+    Combinations are fanned out over a process pool that reads the close
+    prices from shared memory; combinations with the same indicator
+    parameters are evaluated together so their Signal is computed once, and
+    each worker memoises the SMA/RSI/EMA series it has already computed.
+
+    Returns one row per combination, best first by `rank_by`.
+    """
+    close = df["Close"].to_numpy(dtype=np.float64) if isinstance(df, pd.DataFrame) else np.asarray(df, dtype=np.float64)
+    # Groups sharing windows land next to each other, so the same worker tends to reuse them
+    groups = sorted(parameter_grid(grid))
+    tasks = [(combo, backtest, initial_capital) for combo, backtest in groups]
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or len(tasks) == 1:
+        _worker["cache"] = IndicatorCache(close)
+        try:
+            results = [_run_group(task) for task in tasks]
+        finally:
+            _worker.clear()
+    else:
+        shm, spec = share_array(close)
+        try:
+            with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(spec,)) as pool:
+                chunksize = max(1, len(tasks) // (processes * 4))
+                results = list(pool.map(_run_group, tasks, chunksize=chunksize))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    table = pd.DataFrame([row for rows in results for row in rows])
+    return table.sort_values(rank_by, ascending=False, kind="stable").reset_index(drop=True)
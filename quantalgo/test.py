@@ -1,11 +1,11 @@
-import yfinance as yf
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from .pricestore import fetch_history
+from .charts import downsample, figure, finish, output_path
 
 def fetch_data(symbol, period="6mo"):
-    stock = yf.Ticker(symbol)
-    df = stock.history(period=period)
+    df = fetch_history(symbol, period=period)
     return df
 
 def mean_reversion_strategy(df, window=20):
@@ -38,28 +38,40 @@ def backtest(df, initial_capital=100000):
 
     return df
 
-def plot_strategy(df):
-    plt.figure(figsize=(12,6))
-    plt.plot(df.index, df["Close"], label="Stock Price", color='blue')
-    plt.plot(df.index, df["UpperBand"], label="Upper Band", linestyle="--", color='red')
-    plt.plot(df.index, df["LowerBand"], label="Lower Band", linestyle="--", color='green')
+def plot_strategy(df, path=None, symbol=""):
+    """Bands and signals; written to `path` (or QIAB_PLOT_DIR) instead of shown when given."""
+    path = output_path(path, f"{symbol}_mean_reversion" if symbol else "mean_reversion")
+    fig = figure((12,6), path)
+    ax = fig.add_subplot()
+    view = downsample(df[["Close", "UpperBand", "LowerBand"]])
+    ax.plot(view.index, view["Close"], label="Stock Price", color='blue')
+    ax.plot(view.index, view["UpperBand"], label="Upper Band", linestyle="--", color='red')
+    ax.plot(view.index, view["LowerBand"], label="Lower Band", linestyle="--", color='green')
     
     buy_signals = df[df['Signal'] == 1]
     sell_signals = df[df['Signal'] == -1]
     
-    plt.scatter(buy_signals.index, buy_signals["Close"], marker="^", color="green", label="Buy Signal", alpha=1)
-    plt.scatter(sell_signals.index, sell_signals["Close"], marker="v", color="red", label="Sell Signal", alpha=1)
+    ax.scatter(buy_signals.index, buy_signals["Close"], marker="^", color="green", label="Buy Signal", alpha=1)
+    ax.scatter(sell_signals.index, sell_signals["Close"], marker="v", color="red", label="Sell Signal", alpha=1)
 
-    plt.title("Mean Reversion Strategy")
-    plt.legend()
-    plt.show()
+    ax.set_title("Mean Reversion Strategy")
+    ax.legend()
+    return finish(fig, path)
 
-# Example Usage
-symbol = "TSLA"  # Use NSE ticker symbols
-df = fetch_data(symbol)
-df = mean_reversion_strategy(df)
-df = backtest(df)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bollinger band mean reversion backtest of one symbol.")
+    parser.add_argument("symbol", nargs="?", default="TSLA")  # Use NSE ticker symbols
+    parser.add_argument("--period", default="6mo")
+    args = parser.parse_args(argv)
 
-print(f"Final Portfolio Value: ₹{df['Portfolio'].iloc[-1]:,.2f}")
+    symbol = args.symbol
+    df = fetch_data(symbol, args.period)
+    df = mean_reversion_strategy(df)
+    df = backtest(df)
 
-plot_strategy(df)
+    print(f"Final Portfolio Value: ₹{df['Portfolio'].iloc[-1]:,.2f}")
+
+    plot_strategy(df, symbol=symbol)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+import os
+import time
+import socket
+import argparse
+import threading
+
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+
+# One tick as the Go forwarder (qiab/ticker.go) writes it: 32 little-endian bytes
+TICK_DTYPE = np.dtype([
+    ("token", "<u4"),     # instrument token
+    ("quantity", "<u4"),  # last traded quantity
+    ("time", "<f8"),      # exchange timestamp, seconds since the epoch
+    ("price", "<f8"),     # last traded price
+    ("volume", "<u8"),    # volume traded today
+])
+
+BAR_DTYPE = np.dtype([
+    ("token", "<u4"),
+    ("ticks", "<u4"),
+    ("start", "<f8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<u8"),
+])
+
+INTERVALS = (60, 300)
+TICK_FEED_ADDR = os.getenv("TICK_FEED_ADDR", "127.0.0.1:9100")
+RING_NAME = os.getenv("TICK_RING_NAME", "qiab")
+
+_HEADER = 64
+
+
+class SharedRing:
+    """
+    Fixed-size ring of structured records in a named shared memory block.
+
+    One process writes; any number of processes attach by name and read the
+    records in place. The block starts with the total number of records ever
+    written, which the writer only bumps after the records themselves are in
+    place, so a reader's cursor is simply that count.
+    """
+
+    def __init__(self, name, dtype, capacity=None, create=False):
+        self.dtype = np.dtype(dtype)
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                                  size=_HEADER + capacity * self.dtype.itemsize)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Only the creator may unlink the block; otherwise the reader's
+            # resource tracker removes it when the reader exits
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.header = np.ndarray(3, dtype=np.int64, buffer=self.shm.buf)
+        if create:
+            self.header[:] = (0, capacity, self.dtype.itemsize)
+        elif self.header[2] != self.dtype.itemsize:
+            raise ValueError(f"{name} holds {self.header[2]}-byte records, not {self.dtype.itemsize}")
+        self.capacity = int(self.header[1])
+        self.records = np.ndarray(self.capacity, dtype=self.dtype, buffer=self.shm.buf, offset=_HEADER)
+        if not create:
+            self.records.flags.writeable = False
+
+    @property
+    def count(self):
+        """Number of records written so far."""
+        return int(self.header[0])
+
+    def write(self, records):
+        """Append `records`; only the last `capacity` of an over-long batch are kept."""
+        n = len(records)
+        if n == 0:
+            return
+        count = self.count
+        if n > self.capacity:
+            count += n - self.capacity
+            records = records[-self.capacity:]
+            n = self.capacity
+        start = count % self.capacity
+        first = min(n, self.capacity - start)
+        self.records[start:start + first] = records[:first]
+        self.records[:n - first] = records[first:]
+        self.header[0] = count + n
+
+    def views(self, cursor):
+        """
+        (list of at most two zero-copy views, new cursor) with the records
+        written after `cursor`. Records the writer has already overwritten
+        are skipped.
+
+        The views stay valid until the writer laps them, which lapped() tells.
+        """
+        count = self.count
+        cursor = max(cursor, count - self.capacity)
+        if cursor >= count:
+            return [], count
+        start, end = cursor % self.capacity, count % self.capacity
+        if start < end:
+            return [self.records[start:end]], count
+        return [self.records[start:], self.records[:end]], count
+
+    def read(self, cursor):
+        """views() as one array, a view unless the records wrap around the end."""
+        views, cursor = self.views(cursor)
+        if not views:
+            return self.records[:0], cursor
+        return (views[0] if len(views) == 1 else np.concatenate(views)), cursor
+
+    def latest(self, n):
+        """Copy of the last `n` records."""
+        records, _ = self.read(self.count - n)
+        return records.copy()
+
+    def lapped(self, cursor):
+        """Whether records from `cursor` on have been overwritten since."""
+        return self.count - self.capacity > cursor
+
+    def close(self):
+        del self.header, self.records
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class BarAggregator:
+    """
+    Ticks into OHLCV bars of `interval` seconds for every instrument.
+
+    update() takes a batch of ticks and returns the bars that batch
+    completed. A bar completes when a later tick arrives for its instrument
+    or when any instrument's ticks move past its interval. Ticks older than
+    the latest interval seen are counted in `late` and dropped, so a
+    completed bar is never reopened.
+
+    Bar volume is the increase in the instrument's cumulative day volume
+    over the bar, since a tick's quantity is only its last trade and full
+    mode ticks repeat it. The day volume starts again from zero with each
+    new (UTC) day.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.open = {}
+        self.bucket = None
+        self.late = 0
+        self.volumes = {}  # Token -> (day, cumulative volume at the end of its last bar)
+
+    def update(self, ticks):
+        if len(ticks) == 0:
+            return np.empty(0, BAR_DTYPE)
+        buckets = (ticks["time"] // self.interval).astype(np.int64)
+        if self.bucket is not None:
+            current = buckets >= self.bucket
+            if not current.all():
+                self.late += int(len(ticks) - current.sum())
+                ticks, buckets = ticks[current], buckets[current]
+                if len(ticks) == 0:
+                    return np.empty(0, BAR_DTYPE)
+        order = np.lexsort((buckets, ticks["token"]))
+        tokens, buckets = ticks["token"][order], buckets[order]
+        prices = ticks["price"][order]
+        volumes = ticks["volume"][order]
+
+        # One group per (instrument, interval) in the batch, in arrival order within
+        starts = np.flatnonzero(np.r_[True, (tokens[1:] != tokens[:-1]) | (buckets[1:] != buckets[:-1])])
+        ends = np.r_[starts[1:], len(order)]
+        groups = zip(tokens[starts].tolist(), buckets[starts].tolist(), prices[starts].tolist(),
+                     np.maximum.reduceat(prices, starts).tolist(), np.minimum.reduceat(prices, starts).tolist(),
+                     prices[ends - 1].tolist(), np.maximum.reduceat(volumes, starts).tolist(),
+                     np.maximum(volumes[starts].astype(np.int64) - ticks["quantity"][order][starts], 0).tolist(), (ends - starts).tolist())
+
+        done = []
+        for token, bucket, open_, high, low, close, cumulative, before, count in groups:
+            day = bucket * self.interval // 86400
+            last_day, last = self.volumes.get(token, (None, None))
+            if last is None:
+                # First sight of the instrument: only its last trade is known to be in this bar
+                last = before
+            elif day != last_day:
+                last = 0
+            volume = max(cumulative - last, 0)
+            self.volumes[token] = (day, max(cumulative, last))
+
+            bar = self.open.get(token)
+            if bar is None or bucket > bar[0]:
+                if bar is not None:
+                    done.append((token, *bar))
+                self.open[token] = [bucket, open_, high, low, close, volume, count]
+            else:
+                bar[2] = max(bar[2], high)
+                bar[3] = min(bar[3], low)
+                bar[4] = close
+                bar[5] += volume
+                bar[6] += count
+
+        bucket = int(buckets.max())
+        if self.bucket is None or bucket > self.bucket:
+            self.bucket = bucket
+            # Quiet instruments' bars end with the interval, not with their next tick
+            for token in [t for t, bar in self.open.items() if bar[0] < bucket]:
+                done.append((token, *self.open.pop(token)))
+        return self._bars(done)
+
+    def flush(self):
+        """Complete and return every open bar."""
+        done = [(token, *bar) for token, bar in self.open.items()]
+        self.open.clear()
+        return self._bars(done)
+
+    def _bars(self, done):
+        bars = np.empty(len(done), BAR_DTYPE)
+        for i, (token, bucket, open_, high, low, close, volume, count) in enumerate(done):
+            bars[i] = (token, count, bucket * self.interval, open_, high, low, close, volume)
+        return bars
+
+
+def parse_address(address):
+    """(socket family, address) for "host:port" or "unix:/path"."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, port = address.rsplit(":", 1)
+    return socket.AF_INET, (host, int(port))
+
+
+class TickIngestor:
+    """
+    Writes ticks into the shared tick ring and completed 1m/5m bars into
+    one shared bar ring per interval.
+
+    The rings are named `<name>_ticks` and `<name>_bars_<interval>`, so
+    strategy processes attach with attach_ticks() / attach_bars().
+    """
+
+    def __init__(self, name=RING_NAME, capacity=1 << 20, bar_capacity=1 << 16, intervals=INTERVALS):
+        self.ticks = SharedRing(f"{name}_ticks", TICK_DTYPE, capacity, create=True)
+        self.aggregators = {interval: BarAggregator(interval) for interval in intervals}
+        self.bars = {interval: SharedRing(f"{name}_bars_{interval}", BAR_DTYPE, bar_capacity, create=True)
+                     for interval in intervals}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def ingest(self, ticks):
+        """Write a batch of TICK_DTYPE records and the bars it completes."""
+        with self.lock:
+            self.ticks.write(ticks)
+            for interval, aggregator in self.aggregators.items():
+                self.bars[interval].write(aggregator.update(ticks))
+
+    def flush(self):
+        with self.lock:
+            for interval, aggregator in self.aggregators.items():
+                self.bars[interval].write(aggregator.flush())
+
+    def _handle(self, conn, chunk_size=1 << 16):
+        pending = b""
+        with conn:
+            while not self.stopped.is_set():
+                data = conn.recv(chunk_size)
+                if not data:
+                    break
+                data = pending + data
+                n = len(data) // TICK_DTYPE.itemsize
+                pending = data[n * TICK_DTYPE.itemsize:]
+                if n:
+                    self.ingest(np.frombuffer(data, TICK_DTYPE, count=n))
+
+    def serve(self, address=TICK_FEED_ADDR, ready=None):
+        """
+        Accept feed connections on `address` until stop(), one thread per
+        connection. `ready` is an optional Event set once listening.
+        """
+        family, addr = parse_address(address)
+        if family == socket.AF_UNIX and os.path.exists(addr):
+            os.remove(addr)
+        with socket.socket(family, socket.SOCK_STREAM) as server:
+            if family == socket.AF_INET:
+                server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind(addr)
+            server.listen()
+            server.settimeout(0.2)
+            if ready is not None:
+                ready.set()
+            while not self.stopped.is_set():
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def close(self):
+        """Release and remove the shared rings."""
+        for ring in [self.ticks, *self.bars.values()]:
+            ring.close()
+            ring.unlink()
+
+
+def attach_ticks(name=RING_NAME):
+    return SharedRing(f"{name}_ticks", TICK_DTYPE)
+
+
+def attach_bars(interval, name=RING_NAME):
+    return SharedRing(f"{name}_bars_{interval}", BAR_DTYPE)
+
+
+def _grouped_cumsum(values, groups):
+    """Cumulative sum of `values` within each group, in the original order."""
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    firsts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    sums = np.cumsum(values[order])
+    offsets = np.zeros(len(firsts), sums.dtype)
+    offsets[1:] = sums[firsts[1:] - 1]
+    sums -= np.repeat(offsets, np.diff(np.r_[firsts, len(values)]))
+    out = np.empty_like(sums)
+    out[order] = sums
+    return out
+
+
+def synthetic_ticks(n, instruments=100, rate=20000, start=None, seed=0):
+    """
+    `n` random-walk ticks over `instruments` tokens arriving at `rate` ticks
+    per second from `start` (default now), for replays and benchmarks.
+    """
+    rng = np.random.default_rng(seed)
+    tokens = rng.integers(0, instruments, n)
+    base = 100 + 900 * rng.random(instruments)
+    ticks = np.empty(n, TICK_DTYPE)
+    ticks["token"] = 256265 + tokens
+    ticks["quantity"] = rng.integers(1, 500, n)
+    ticks["time"] = (time.time() if start is None else start) + np.arange(n) / rate
+    ticks["price"] = np.round(base[tokens] * np.exp(_grouped_cumsum(rng.normal(0, 0.0005, n), tokens)), 2)
+    ticks["volume"] = _grouped_cumsum(ticks["quantity"].astype(np.uint64), tokens)
+    return ticks
+
+
+def replay(ticks, address=TICK_FEED_ADDR, speed=None, batch_size=1024):
+    """
+    Send recorded ticks to an ingestor the way the Go forwarder does.
+
+    With `speed` None they go out as fast as possible, otherwise paced by
+    their timestamps (1.0 is real time, 10.0 ten times faster).
+    """
+    ticks = np.ascontiguousarray(ticks, dtype=TICK_DTYPE)
+    family, addr = parse_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.connect(addr)
+        began = time.perf_counter()
+        for i in range(0, len(ticks), batch_size):
+            batch = ticks[i:i + batch_size]
+            if speed:
+                delay = (batch["time"][0] - ticks["time"][0]) / speed - (time.perf_counter() - began)
+                if delay > 0:
+                    time.sleep(delay)
+            sock.sendall(batch.tobytes())
+
+
+def watch(interval=60, name=RING_NAME, poll=0.5):
+    """Print the bars of `interval` seconds as they complete."""
+    bars = attach_bars(interval, name)
+    cursor = bars.count
+    try:
+        while True:
+            records, cursor = bars.read(cursor)
+            for bar in records:
+                print(f"{time.strftime('%H:%M', time.localtime(bar['start']))} {bar['token']}: "
+                      f"O {bar['open']:.2f} H {bar['high']:.2f} L {bar['low']:.2f} C {bar['close']:.2f} "
+                      f"V {bar['volume']} ({bar['ticks']} ticks)")
+            time.sleep(poll)
+    finally:
+        bars.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live tick ingestion into shared memory rings.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="listen for the tick feed and fill the rings")
+    serve.add_argument("--address", default=TICK_FEED_ADDR)
+    serve.add_argument("--capacity", type=int, default=1 << 20, help="ticks kept in shared memory")
+
+    play = sub.add_parser("replay", help="send recorded (.npy) or synthetic ticks to the feed")
+    play.add_argument("file", nargs="?", help=".npy file of TICK_DTYPE records")
+    play.add_argument("--address", default=TICK_FEED_ADDR)
+    play.add_argument("--synthetic", type=int, default=100000, help="number of synthetic ticks without a file")
+    play.add_argument("--instruments", type=int, default=100)
+    play.add_argument("--speed", type=float, default=None)
+
+    bars = sub.add_parser("watch", help="print completed bars")
+    bars.add_argument("--interval", type=int, default=60, choices=INTERVALS)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        ingestor = TickIngestor(capacity=args.capacity)
+        print(f"Listening for ticks on {args.address}")
+        try:
+            ingestor.serve(args.address)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            ingestor.close()
+    elif args.command == "replay":
+        ticks = np.load(args.file) if args.file else synthetic_ticks(args.synthetic, args.instruments)
+        start = time.perf_counter()
+        replay(ticks, args.address, args.speed)
+        print(f"Sent {len(ticks)} ticks in {time.perf_counter() - start:.2f}s")
+    else:
+        watch(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from .indicators import sma, rsi, macd, combined_signal
+from .pricestore import fetch_history
+from .metrics import timed
+
+INDICATOR_COLUMNS = ["SMA_Short", "SMA_Long", "RSI", "MACD", "MACD_Signal", "Signal"]
+
+
+@timed("universe.close_matrix")
+def close_matrix(symbols, period="2y"):
+    """
+    Close prices of `symbols` as one time x symbols DataFrame.
+
+    Symbols are outer-joined on their dates and left NaN before their first
+    bar. Gaps inside a symbol's history are forward-filled, which is the only
+    case where the batch indicators can differ from running
+    calculate_advanced_indicators on that symbol alone.
+    """
+    closes = {}
+    for symbol in symbols:
+        df = fetch_history(symbol, period=period)
+        if df.empty:
+            print(f"Error fetching data: No data retrieved for {symbol}")
+            continue
+        closes[symbol] = df["Close"]
+
+    matrix = pd.DataFrame(closes)
+    return matrix.where(matrix.bfill().isna(), matrix.ffill())
+
+
+def calculate_universe_indicators(closes,
+                                  short_window=10,
+                                  long_window=50,
+                                  rsi_window=14,
+                                  macd_short=12,
+                                  macd_long=26,
+                                  macd_signal=9):
+    """
+    calculate_advanced_indicators for a whole universe at once.
+
+    `closes` is a time x symbols DataFrame (or 2-D array). Returns a dict of
+    aligned DataFrames keyed like the per-symbol columns: SMA_Short,
+    SMA_Long, RSI, MACD, MACD_Signal and Signal. Each column equals what the
+    per-symbol function gives for that symbol's own close series.
+    """
+    if not isinstance(closes, pd.DataFrame):
+        closes = pd.DataFrame(np.asarray(closes, dtype=np.float64))
+
+    # The first diff of a series counts as a zero gain in rsi(), so symbols
+    # are computed in blocks that start at their own first price
+    first = closes.notna().to_numpy().argmax(axis=0)
+    blocks = []
+    for start in np.unique(first):
+        block = closes.iloc[start:, first == start]
+        out = {
+            "SMA_Short": sma(block, short_window),
+            "SMA_Long": sma(block, long_window),
+            "RSI": rsi(block, rsi_window),
+        }
+        out["MACD"], out["MACD_Signal"] = macd(block, macd_short, macd_long, macd_signal)
+        signal = combined_signal(block.to_numpy(), *(out[name].to_numpy() for name in INDICATOR_COLUMNS[:-1]))
+        out["Signal"] = pd.DataFrame(signal, index=block.index, columns=block.columns)
+        blocks.append(out)
+
+    out = {
+        name: pd.concat([block[name] for block in blocks], axis=1).reindex(index=closes.index, columns=closes.columns)
+        for name in INDICATOR_COLUMNS
+    }
+    out["Signal"] = out["Signal"].fillna(0).astype(int)
+    return out
+
+
+def screen_universe(closes, **params):
+    """Latest indicator values and Signal for every symbol, buys first."""
+    indicators = calculate_universe_indicators(closes, **params)
+    latest = pd.DataFrame({name: frame.iloc[-1] for name, frame in indicators.items()})
+    latest.insert(0, "Close", closes.iloc[-1])
+    return latest.sort_values(["Signal", "RSI"], ascending=[False, False])
@@ -0,0 +1,142 @@
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from .engine import (adaptive_strategy_kernel, mean_reversion_kernel,
+                    new_adaptive_state, new_mean_reversion_state)
+from .sharedmem import share_array, attach_array
+from .sweep import DEFAULTS, INDICATOR_PARAMS, IndicatorCache
+
+STRATEGY_DEFAULTS = {
+    "adaptive": DEFAULTS,  # backtestm.py
+    "bollinger": {"window": 20},  # test.py
+}
+
+
+def make_folds(n_bars, train=252, test=63, step=None):
+    """(train_start, test_start, test_end) bar positions of every rolling fold."""
+    step = step or test
+    return [(lo, lo + train, min(lo + train + test, n_bars))
+            for lo in range(0, n_bars - train, step)]
+
+
+def expand_grid(strategy, grid):
+    defaults = STRATEGY_DEFAULTS[strategy]
+    unknown = set(grid) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown {strategy} parameters: {sorted(unknown)}")
+    names = list(defaults)
+    return [dict(zip(names, combo))
+            for combo in itertools.product(*(grid.get(name, [defaults[name]]) for name in names))]
+
+
+def strategy_signal(cache, strategy, params):
+    """Signal over the full history, computed once per parameter set and cached."""
+    if strategy == "adaptive":
+        return cache.signal(*(params[name] for name in INDICATOR_PARAMS))
+    return cache.bollinger_signal(params["window"])
+
+
+def run_strategy(strategy, close, signal, params, initial_capital, state=None):
+    if strategy == "adaptive":
+        values, _ = adaptive_strategy_kernel(close, signal, initial_capital,
+                                             params["risk_per_trade"], params["trailing_stop_loss_pct"], state)
+        return values
+    return mean_reversion_kernel(close, signal, initial_capital, state)
+
+
+_worker = {}
+
+
+def _init_worker(spec):
+    shm, close = attach_array(spec)
+    _worker["shm"] = shm
+    _worker["cache"] = IndicatorCache(close)
+
+
+def _fit_fold(task):
+    """Best parameters on one training window, judged by final portfolio value."""
+    strategy, combos, lo, hi, initial_capital = task
+    cache = _worker["cache"]
+    close = cache.close.to_numpy()[lo:hi]
+
+    best, best_value = None, -np.inf
+    for params in combos:
+        signal = strategy_signal(cache, strategy, params)[lo:hi]
+        value = run_strategy(strategy, close, signal, params, initial_capital)[-1]
+        if value > best_value:
+            best, best_value = params, value
+    return best, best_value
+
+
+def walk_forward(df, strategy="adaptive", grid=None, train=252, test=63, step=None,
+                 initial_capital=100000, processes=None):
+    """
+    Rolling train/test evaluation of the backtestm.py ("adaptive") or test.py
+    ("bollinger") strategy.
+
+    Indicators are computed once over the full history for each parameter set
+    in `grid` and sliced per fold, so test windows start with fully warmed-up
+    indicators and no rolling maths is repeated. Folds are fitted in parallel.
+    Each fold picks the parameters with the best training result. The test
+    windows are then traded in order. When they are back to back (step ==
+    test) the cash and open position carry over from one fold to the next.
+
+    Returns (per-fold table, equity curve over the test windows).
+    """
+    close = df["Close"].to_numpy(dtype=np.float64)
+    index = df.index
+    step = step or test
+    folds = make_folds(len(close), train, test, step)
+    if not folds:
+        raise ValueError(f"Need more than {train} bars for a {train} bar training window")
+
+    combos = expand_grid(strategy, grid or {})
+    tasks = [(strategy, combos, lo, mid, initial_capital) for lo, mid, _ in folds]
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or len(tasks) == 1:
+        _worker["cache"] = IndicatorCache(close)
+        try:
+            fits = [_fit_fold(task) for task in tasks]
+        finally:
+            _worker.clear()
+    else:
+        shm, spec = share_array(close)
+        try:
+            with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(spec,)) as pool:
+                fits = list(pool.map(_fit_fold, tasks))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    new_state = new_adaptive_state if strategy == "adaptive" else new_mean_reversion_state
+    carry = step == test
+    cache = IndicatorCache(close)
+    state = new_state(initial_capital)
+    value = initial_capital
+    rows, curves = [], []
+    for (lo, mid, hi), (params, train_value) in zip(folds, fits):
+        if not carry:
+            state, value = new_state(initial_capital), initial_capital
+        signal = strategy_signal(cache, strategy, params)[mid:hi]
+        values = run_strategy(strategy, close[mid:hi], signal, params, initial_capital, state)
+
+        rows.append({
+            "train_start": index[lo],
+            "test_start": index[mid],
+            "test_end": index[hi - 1],
+            **params,
+            "train_final_value": train_value,
+            "test_return_pct": (values[-1] - value) / value * 100,
+            "test_final_value": values[-1],
+        })
+        curves.append(pd.Series(values, index=index[mid:hi]))
+        value = values[-1]
+
+    equity = pd.concat(curves)
+    if not carry:
+        equity = equity[~equity.index.duplicated(keep="last")]
+    return pd.DataFrame(rows), equity
@@ -0,0 +1,198 @@
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from quantalgo.metrics import timed
+
+
+load_dotenv()
+ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
+
+# Point these at local stand-in servers to run without the real providers
+YAHOO_CHART_URL = os.getenv("YAHOO_CHART_URL", "https://query1.finance.yahoo.com/v8/finance/chart")
+YAHOO_SPARK_URL = os.getenv("YAHOO_SPARK_URL", "https://query1.finance.yahoo.com/v8/finance/spark")
+ALPHA_VANTAGE_URL = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")
+
+QUOTE_TTL = float(os.getenv("QUOTE_TTL", 30))
+
+
+def yahoo_price(session, ticker, timeout):
+    """Last price from Yahoo Finance's chart endpoint."""
+    response = session.get(f"{YAHOO_CHART_URL}/{ticker}", params={"range": "1d", "interval": "1d"},
+                           headers={"User-Agent": "Mozilla/5.0"}, timeout=timeout)
+    response.raise_for_status()
+    return response.json()["chart"]["result"][0]["meta"]["regularMarketPrice"]
+
+
+def alpha_vantage_price(session, ticker, timeout):
+    """Last price from Alpha Vantage's GLOBAL_QUOTE."""
+    params = {"function": "GLOBAL_QUOTE", "symbol": ticker, "apikey": ALPHA_VANTAGE_API_KEY}
+    response = session.get(ALPHA_VANTAGE_URL, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()["Global Quote"]["05. price"]
+
+
+def yahoo_prices(session, tickers, timeout):
+    """Last prices of several tickers from one Yahoo Finance spark request."""
+    response = session.get(YAHOO_SPARK_URL, params={"symbols": ",".join(tickers), "range": "1d", "interval": "1d"},
+                           headers={"User-Agent": "Mozilla/5.0"}, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    if "spark" in data:
+        # Older layout, one chart response per symbol
+        return {result["symbol"]: result["response"][0]["meta"]["regularMarketPrice"]
+                for result in data["spark"]["result"] if result.get("response")}
+    prices = {}
+    for ticker, entry in data.items():
+        closes = [close for close in entry.get("close") or [] if close is not None]
+        if closes:
+            prices[ticker] = closes[-1]
+    return prices
+
+
+PROVIDERS = [("Yahoo Finance", yahoo_price), ("Alpha Vantage", alpha_vantage_price)]
+# Providers answering for many tickers per request, and how many they take
+BATCH_PROVIDERS = [("Yahoo Finance", yahoo_prices, 20)]
+
+
+class QuoteService:
+    """
+    Latest prices from several providers at once.
+
+    Every provider is asked concurrently over one pooled HTTP session and the
+    first valid price wins. Quotes are kept for `ttl` seconds in an LRU cache
+    of at most `max_size` tickers, so repeated questions about the same
+    tickers don't go to the network at all.
+
+    Several uncached tickers are first asked from the batch providers in
+    groups, and only the ones those miss go to the per-ticker providers, at
+    most `fallback_limit` of them per call. Requests get `timeout` seconds
+    for each round the pool needs to work through them; whatever is still
+    queued after that is cancelled, so it doesn't hold up the next call.
+    """
+
+    def __init__(self, providers=None, ttl=QUOTE_TTL, max_size=4096, timeout=5, max_workers=8,
+                 batch_providers=None, fallback_limit=16):
+        self.providers = providers or PROVIDERS
+        self.batch_providers = BATCH_PROVIDERS if batch_providers is None else batch_providers
+        self.ttl = ttl
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.fallback_limit = fallback_limit
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.providers), pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool = ThreadPoolExecutor(max_workers)
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _cached(self, ticker):
+        with self.lock:
+            entry = self.cache.get(ticker)
+            if entry is None:
+                return None
+            if entry["time"] + self.ttl < time.time():
+                del self.cache[ticker]
+                return None
+            self.cache.move_to_end(ticker)
+            return entry
+
+    def _store(self, quote):
+        with self.lock:
+            self.cache[quote["ticker"]] = quote
+            self.cache.move_to_end(quote["ticker"])
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+
+    @staticmethod
+    def _quote(source, ticker, price):
+        price = float(price)
+        if not math.isfinite(price) or price <= 0:
+            raise ValueError(f"invalid price {price}")
+        return {"ticker": ticker, "price": price, "source": source, "time": time.time()}
+
+    def _ask(self, source, provider, ticker):
+        return self._quote(source, ticker, provider(self.session, ticker, self.timeout))
+
+    def _completed(self, futures):
+        """Futures as they finish, until the deadline for all of them; the ones left are cancelled."""
+        rounds = math.ceil(len(futures) / self.max_workers)
+        try:
+            yield from as_completed(futures, timeout=self.timeout * rounds)
+        except TimeoutError:
+            pass
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _ask_batches(self, tickers, quotes):
+        """Fill `quotes` for `tickers` from the batch providers, one request per group."""
+        futures = {}
+        for source, provider, size in self.batch_providers:
+            for i in range(0, len(tickers), size):
+                group = tickers[i:i + size]
+                futures[self.pool.submit(provider, self.session, group, self.timeout)] = source
+        for future in self._completed(futures):
+            if future.exception() is not None:
+                continue
+            for ticker, price in future.result().items():
+                # Only tickers asked for and not answered yet
+                if ticker not in quotes or quotes[ticker] is not None:
+                    continue
+                try:
+                    quotes[ticker] = self._quote(futures[future], ticker, price)
+                except (TypeError, ValueError):
+                    continue
+                self._store(quotes[ticker])
+
+    @timed("quotes.get_many")
+    def get_many(self, tickers):
+        """Quote dicts (ticker, price, source, time) keyed by ticker, None where no provider answered."""
+        quotes = {}
+        for ticker in dict.fromkeys(tickers):
+            quotes[ticker] = self._cached(ticker)
+
+        missing = [ticker for ticker, quote in quotes.items() if quote is None]
+        if len(missing) > 1 and self.batch_providers:
+            self._ask_batches(missing, quotes)
+            # Their misses are mostly unknown tickers; don't ask every one separately
+            missing = [ticker for ticker in missing if quotes[ticker] is None][:self.fallback_limit]
+
+        futures = {
+            self.pool.submit(self._ask, source, provider, ticker): ticker
+            for ticker in missing for source, provider in self.providers
+        }
+        for future in self._completed(futures):
+            ticker = futures[future]
+            if quotes[ticker] is None and future.exception() is None:
+                quotes[ticker] = future.result()
+                self._store(quotes[ticker])
+                if all(quotes[t] is not None for t in missing):
+                    break
+        return quotes
+
+    def get(self, ticker):
+        """Latest quote for one ticker, or None."""
+        return self.get_many([ticker])[ticker]
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+_default_service = None
+
+
+def default_service():
+    global _default_service
+    if _default_service is None:
+        _default_service = QuoteService()
+    return _default_service
@@ -1,44 +1,135 @@
 import praw
 import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import google.generativeai as genai
+from llmcache import default_client
+from sentiment import analyze, scored
 
 
 load_dotenv()
 
-key= os.environ.get('GOOGLE_API_KEY')
-genai.configure(api_key=key)
+SUBREDDITS = ["stocks", "investing", "business", "wallstreetbets", "technology"]
+SEEN_PATH = os.environ.get('REDDIT_SEEN_PATH', os.path.join(os.path.expanduser("~"), ".cache", "qiab", "reddit_seen.json"))
+SEEN_MAX_AGE = 30 * 24 * 3600
 
+_local = threading.local()
+_pool = None
+_pool_lock = threading.Lock()
 
-reddit=praw.Reddit(
-    client_id=os.environ.get('client_id'),
-    client_secret=os.environ.get('client_secret'),
-    user_agent=os.environ.get('user_agent'),
-    username=os.environ.get('username'),
-    password=os.environ.get('password')
-    )
 
-model = genai.GenerativeModel("gemini-2.0-flash")
+def _reddit():
+    # PRAW isn't thread safe, every harvesting thread gets its own client
+    if not hasattr(_local, "reddit"):
+        _local.reddit = praw.Reddit(
+            client_id=os.environ.get('client_id'),
+            client_secret=os.environ.get('client_secret'),
+            user_agent=os.environ.get('user_agent'),
+            username=os.environ.get('username'),
+            password=os.environ.get('password')
+            )
+    return _local.reddit
+
+
+def _harvest_pool():
+    # One pool for the process, so its threads keep their clients between harvests
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(len(SUBREDDITS))
+        return _pool
+
+
+def load_seen(path=SEEN_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_seen(seen, path=SEEN_PATH):
+    cutoff = time.time() - SEEN_MAX_AGE
+    seen = {post_id: entry for post_id, entry in seen.items() if entry["seen_at"] >= cutoff}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(seen, f)
+    os.replace(path + ".tmp", path)
+
+
+def harvest_subreddit(subreddit, query, limit=3, comment_limit=2, seen=None, comment_chars=300):
+    """
+    Posts matching `query` in one subreddit, each with only its top
+    `comment_limit` comments.
+
+    A post already in `seen` with an unchanged comment count is reused
+    instead of downloading its comments again.
+    """
+    seen = seen if seen is not None else {}
+    entries = []
+    for post in _reddit().subreddit(subreddit).search(query, limit=limit):
+        known = seen.get(post.id)
+        if known is not None and known["num_comments"] == post.num_comments:
+            entries.append(known)
+            continue
+
+        post.comment_sort = "top"
+        post.comments.replace_more(limit=0)  # Drop "load more comments" placeholders without fetching them
+        top_comments = [comment.body[:comment_chars] for comment in post.comments[:comment_limit]]
+        entries.append({
+            "id": post.id,
+            "subreddit": subreddit,
+            "title": post.title,
+            "body": post.selftext[:500],  # Limit body text to 500 characters
+            "score": post.score,
+            "num_comments": post.num_comments,
+            "top_comments": top_comments,
+            "seen_at": time.time(),
+        })
+    return entries
+
+
+def harvest(query, subreddits=SUBREDDITS, limit=3, comment_limit=2, seen_path=SEEN_PATH):
+    """harvest_subreddit over all `subreddits` at once, remembering the posts between runs."""
+    seen = load_seen(seen_path)
+    results = _harvest_pool().map(lambda sub: harvest_subreddit(sub, query, limit, comment_limit, seen), subreddits)
+    entries = list({entry["id"]: entry for result in results for entry in result}.values())
+
+    seen.update((entry["id"], entry) for entry in entries)
+    save_seen(seen, seen_path)
+    return entries
+
+
+def post_text(entry):
+    comments = "\n".join(f"- {comment}" for comment in entry["top_comments"])
+    return f"title: {entry['title']}\nbody: {entry['body']}\ntop_comments:\n{comments}\n\n"
+
+
+def build_corpus(entries, max_chars=12000):
+    """Post texts, highest scoring first, of at most `max_chars` characters in total."""
+    parts = []
+    size = 0
+    for entry in sorted(entries, key=lambda entry: entry["score"], reverse=True):
+        part = post_text(entry)
+        if size + len(part) > max_chars:
+            break
+        parts.append(part)
+        size += len(part)
+    return parts
 
 
 def companySentiment(company_name, limit=3,comment_limit=2):
-    subreddits = ["stocks", "investing", "business", "wallstreetbets", "technology"]
-    results = []
-    for subreddit in subreddits:
-        # Search for posts related to the company
-        for post in reddit.subreddit(subreddit).search(company_name, limit=limit):
-            # post.comments.replace_more(limit=0)  # Remove "load more comments" placeholders
-            
-            # Get the top 'comment_limit' comments
-            top_comments = [comment.body for comment in post.comments.list()]
-            
-            results.append(
-                f"title: {post.title}\n"
-                f"body: {post.selftext[:500]}\n"  # Limit body text to 500 characters
-                f"top_comments: {top_comments}\n\n"
-            )
-    
-    response = model.generate_content("Perform sentiment analysis:\n"+results+"\n return bullish neutral or bearish, just 1 word")
-    return response.text
+    # The same company within a day neither re-harvests nor re-asks Gemini,
+    # unless no post was found to score
+    return default_client().memoize("reddit_sentiment:analyze", [company_name, limit, comment_limit],
+                                    lambda: _companySentiment(company_name, limit, comment_limit), keep=scored)
+
+
+def _companySentiment(company_name, limit=3,comment_limit=2):
+    results = build_corpus(harvest(company_name, SUBREDDITS, limit, comment_limit))
+    return analyze(results, subject=company_name)
 
-print(companySentiment("Tesla"))
\ No newline at end of file
+if __name__ == "__main__":
+    print(companySentiment("Tesla"))
@@ -0,0 +1,132 @@
+import os
+import re
+import csv
+
+
+TICKER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tickers.csv")
+
+# Below this the chatbot asks Gemini instead
+MIN_CONFIDENCE = 0.8
+
+_NAME_SUFFIXES = {"inc", "ltd", "limited", "corporation", "corp", "company", "co", "the", "plc", "group",
+                  "holdings", "holding", "sa", "and"}
+
+_PRICE_WORDS = re.compile(
+    r"\b(price|prices|priced|quote|trading at|trades at|share value|stock value|how much is|how much are"
+    r"|how much does|worth|ltp|cmp|going for)\b"
+)
+# Words that put a company name in a market context. Price words alone
+# don't, "price of a ford fiesta" is not about Ford shares.
+_STOCK_WORDS = re.compile(r"\b(share|shares|stock|stocks|ticker)\b")
+# Price questions that still need a real answer rather than a quote
+_GENERAL_WORDS = re.compile(
+    r"\b(why|should|predict|prediction|forecast|will|expect|target|history|historical|trend|analysis|analyze"
+    r"|compare|vs|versus|news|dividend|yesterday|last|week|month|year|ratio|earnings|to book|to sales)\b"
+    r"|p/e"
+)
+_SYMBOL = re.compile(r"(\$)?\b([A-Z][A-Z0-9&-]*(?:\.[A-Z]{2})?)\b")
+
+
+def _tokens(text):
+    """Lowercase word tokens, with "&", possessives and dotted abbreviations folded."""
+    text = text.lower().replace("’", "'").replace("&", " and ")
+    text = re.sub(r"'s\b|'|\.(?=\w)", "", text)
+    return tuple(re.findall(r"[a-z0-9]+", text))
+
+
+def read_tickers(path=TICKER_FILE):
+    """Rows (symbol, name, aliases) of the ticker file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+class TickerIndex:
+    """
+    Company names, aliases and exchange symbols from the bundled ticker file.
+
+    Names are stored as hashed token n-grams, so a lookup is one dict probe
+    per n-gram of the query.
+    """
+
+    def __init__(self, rows):
+        self.phrases = {}
+        self.symbols = {}
+        for row in rows:
+            symbol = row["symbol"]
+            self.symbols.setdefault(symbol, symbol)
+            self.symbols.setdefault(symbol.split(".")[0], symbol)
+
+            name = [t for t in _tokens(row["name"]) if t not in _NAME_SUFFIXES]
+            for phrase in [name] + [_tokens(alias) for alias in row["aliases"].split("|") if alias]:
+                if phrase:
+                    self.phrases.setdefault(tuple(phrase), symbol)
+        self.max_len = max(map(len, self.phrases), default=0)
+
+    @classmethod
+    def from_csv(cls, path=TICKER_FILE):
+        return cls(read_tickers(path))
+
+    def tickers(self, text):
+        """Symbols written out as tickers in `text`, like "TSLA" or "$V"."""
+        found = []
+        for dollar, word in _SYMBOL.findall(text):
+            symbol = self.symbols.get(word)
+            # Single letters ("T", "F", "C") only count as "$T"
+            if symbol and (dollar or len(word) > 1):
+                found.append(symbol)
+        return found
+
+    def find(self, text):
+        """Every distinct symbol mentioned in `text`, explicit tickers first."""
+        found = self.tickers(text)
+        tokens = _tokens(text)
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self.max_len, len(tokens) - i), 0, -1):
+                symbol = self.phrases.get(tokens[i:i + n])
+                if symbol:
+                    found.append(symbol)
+                    i += n
+                    break
+            else:
+                i += 1
+        return list(dict.fromkeys(found))
+
+
+def resolve(text, index=None):
+    """
+    Guess the intent of a chat message and the ticker it is about, without an LLM.
+
+    Returns a dict with "intent" ("stock_price" or "general_query"),
+    "ticker" (or None) and "confidence" between 0 and 1. A company name
+    alone ("visa", "ford") is an ordinary word too, so it only counts with
+    a written ticker or share/stock wording next to it.
+    """
+    index = index or default_index()
+    symbols = index.find(text)
+    ticker = symbols[0] if len(symbols) == 1 else None
+    lowered = text.lower()
+    price = _PRICE_WORDS.search(lowered) is not None
+    general = _GENERAL_WORDS.search(lowered) is not None
+    market = ticker is not None and (ticker in index.tickers(text) or _STOCK_WORDS.search(lowered) is not None)
+
+    if price and not general:
+        if market:
+            return {"intent": "stock_price", "ticker": ticker, "confidence": 0.95}
+        return {"intent": "stock_price", "ticker": ticker, "confidence": 0.6}
+    if market and not general and len(_tokens(text)) <= 3:
+        # A bare "TSLA?" or "infosys share"
+        return {"intent": "stock_price", "ticker": ticker, "confidence": 0.85}
+    if not symbols and not price:
+        return {"intent": "general_query", "ticker": None, "confidence": 0.9}
+    return {"intent": "general_query", "ticker": ticker, "confidence": 0.5}
+
+
+_default_index = None
+
+
+def default_index():
+    global _default_index
+    if _default_index is None:
+        _default_index = TickerIndex.from_csv()
+    return _default_index
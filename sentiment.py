@@ -0,0 +1,190 @@
+import re
+import json
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from llmcache import default_client
+
+
+LABELS = {"bullish": 1, "neutral": 0, "bearish": -1}
+
+BULLISH_WORDS = {
+    "beat", "beats", "bullish", "buy", "buying", "climb", "climbs", "gain", "gains", "growth", "high", "higher",
+    "jump", "jumps", "moon", "outperform", "outperforms", "positive", "profit", "profits", "rally", "rallies",
+    "record", "rebound", "rise", "rises", "soar", "soars", "strong", "surge", "surges", "upgrade", "upgraded",
+    "upside", "calls", "long",
+}
+BEARISH_WORDS = {
+    "bearish", "cut", "cuts", "decline", "declines", "downgrade", "downgraded", "downside", "drop", "drops",
+    "fall", "falls", "fraud", "lawsuit", "loss", "losses", "low", "lower", "miss", "misses", "negative",
+    "plunge", "plunges", "recall", "sell", "selloff", "slump", "slumps", "tank", "tanks", "underperform",
+    "weak", "puts", "short", "crash", "crashes",
+}
+
+# XOR with a random mask stands in for a random hash permutation
+_MASKS = np.random.default_rng(20240101).integers(0, 2 ** 32, size=(64, 1), dtype=np.uint64)
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9$']+", text.lower())
+
+
+def estimate_tokens(text):
+    """Rough Gemini token count, about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def minhash(text, shingle=5):
+    """64-value MinHash signature of the word `shingle`-grams of `text`."""
+    words = _words(text)
+    grams = np.fromiter({zlib.crc32(" ".join(words[i:i + shingle]).encode())
+                         for i in range(max(len(words) - shingle + 1, 1))}, dtype=np.uint64)
+    return (grams ^ _MASKS).min(axis=1)
+
+
+def dedup(texts, threshold=0.8, bands=16):
+    """
+    `texts` without near duplicates (estimated Jaccard similarity of their
+    shingles at least `threshold`), first occurrence kept.
+
+    Candidates are found by LSH banding of the MinHash signatures, so texts
+    are only compared with the few others that share a band.
+    """
+    rows = len(_MASKS) // bands
+    buckets = {}
+    kept, signatures = [], []
+    for text in texts:
+        if not text or not text.strip():
+            continue
+        signature = minhash(text)
+        keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(bands)]
+        candidates = {i for key in keys for i in buckets.get(key, ())}
+        if any((signature == signatures[i]).mean() >= threshold
+               for i in candidates):
+            continue
+        for key in keys:
+            buckets.setdefault(key, []).append(len(kept))
+        kept.append(text)
+        signatures.append(signature)
+    return kept
+
+
+def strip_boilerplate(texts, min_docs=3, min_words=2):
+    """Drop very short lines and lines repeated in `min_docs` or more texts (menus, cookie banners)."""
+    counts = Counter(line for text in texts for line in {l.strip() for l in text.splitlines()})
+    return ["\n".join(
+        line for line in (l.strip() for l in text.splitlines())
+        if len(line.split()) >= min_words and counts[line] < min_docs
+    ) for text in texts]
+
+
+def chunk_texts(texts, max_tokens=3000):
+    """Pack texts into chunks of at most `max_tokens`, splitting long texts on paragraphs."""
+    pieces = []
+    for text in texts:
+        if estimate_tokens(text) <= max_tokens:
+            pieces.append(text)
+            continue
+        for paragraph in text.split("\n"):
+            # A single over-long paragraph is cut at the budget
+            limit = max_tokens * 4
+            pieces.extend(paragraph[i:i + limit] for i in range(0, len(paragraph), limit))
+
+    chunks, current, size = [], [], 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and size + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def lexicon_score(texts):
+    """(net score in [-1, 1], number of sentiment words) from the bullish/bearish word lists."""
+    bullish = bearish = 0
+    for text in texts:
+        for word in _words(text):
+            bullish += word in BULLISH_WORDS
+            bearish += word in BEARISH_WORDS
+    hits = bullish + bearish
+    return ((bullish - bearish) / hits if hits else 0.0), hits
+
+
+def parse_label(text):
+    """(label, confidence) from a model answer, JSON or plain words."""
+    try:
+        answer = json.loads(re.search(r"\{.*\}", text, re.S).group(0))
+        label = str(answer["label"]).lower()
+        if label in LABELS:
+            return label, min(max(float(answer.get("confidence", 0.5)), 0.0), 1.0)
+    except (AttributeError, ValueError, KeyError, TypeError):
+        pass
+    match = re.search(r"bullish|neutral|bearish", text.lower())
+    return (match.group(0), 0.5) if match else ("neutral", 0.0)
+
+
+def score_chunk(chunk, subject="", client=None):
+    """LLM (label, confidence) for one chunk."""
+    prompt = (
+        f"Perform sentiment analysis of these texts{' about ' + subject if subject else ''} for its stock.\n"
+        'Return only JSON like {"label": "bullish", "confidence": 0.8}, label is bullish, neutral or bearish.\n\n'
+        + chunk
+    )
+    return parse_label((client or default_client()).generate(prompt))
+
+
+def reduce_scores(scores):
+    """
+    One label from (label, confidence, tokens) chunk scores, weighted by
+    tokens x confidence. The confidence is the weight share agreeing with
+    the chosen label.
+    """
+    weights = [(LABELS[label], confidence * tokens) for label, confidence, tokens in scores]
+    total = sum(weight for _, weight in weights)
+    if total == 0:
+        return "neutral", 0.0
+    mean = sum(value * weight for value, weight in weights) / total
+    label = "bullish" if mean > 0.2 else "bearish" if mean < -0.2 else "neutral"
+    agreeing = sum(weight for value, weight in weights if value == LABELS[label])
+    return label, agreeing / total
+
+
+def analyze(texts, subject="", max_tokens=3000, max_workers=4, lexicon_hits=30, lexicon_margin=0.6,
+            client=None):
+    """
+    Sentiment of a corpus as {"label", "confidence", "method", "documents", "chunks"}.
+
+    Boilerplate and near-duplicate texts are dropped first. A corpus that
+    the word lists already call clearly one-sided (at least `lexicon_hits`
+    sentiment words with a net score beyond `lexicon_margin`) is labelled
+    without the LLM. Otherwise the texts are packed into chunks of
+    `max_tokens`, scored in parallel and the chunk scores reduced to one label.
+    """
+    documents = dedup(strip_boilerplate(list(texts)))
+    result = {"documents": len(documents), "chunks": 0}
+    if not documents:
+        return {"label": "neutral", "confidence": 0.0, "method": "none", **result}
+
+    net, hits = lexicon_score(documents)
+    if hits >= lexicon_hits and abs(net) >= lexicon_margin:
+        return {"label": "bullish" if net > 0 else "bearish", "confidence": abs(net), "method": "lexicon",
+                **result}
+
+    chunks = chunk_texts(documents, max_tokens)
+    with ThreadPoolExecutor(max_workers) as pool:
+        scores = list(pool.map(lambda chunk: score_chunk(chunk, subject, client), chunks))
+    label, confidence = reduce_scores(
+        [(label, confidence, estimate_tokens(chunk)) for (label, confidence), chunk in zip(scores, chunks)])
+    return {"label": label, "confidence": confidence, "method": "llm", **result, "chunks": len(chunks)}
+
+
+def scored(result):
+    """Whether an analyze() result scored any document, rather than being neutral for lack of them."""
+    return result["documents"] > 0
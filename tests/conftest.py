@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import types
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# The root scripts (quotes.py, llmcache.py, ...) and the quantalgo package import from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            status, body = self.server.respond(url.path, query)
+        except Exception:
+            status, body = 500, "error"
+        try:
+            if isinstance(body, types.GeneratorType):
+                self._send_chunked(status, body)
+            else:
+                self._send(status, body)
+        except OSError:
+            pass  # The client gave up on a slow answer
+
+    def _send(self, status, body):
+        if isinstance(body, (dict, list)):
+            body, content_type = json.dumps(body).encode(), "application/json"
+        else:
+            body, content_type = str(body).encode(), "text/html; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunked(self, status, pieces):
+        # Each piece goes out as soon as the generator yields it
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for piece in pieces:
+            data = piece.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """
+    Starts local stand-in servers: http_server(respond) returns the base URL
+    of one whose GET requests are answered by respond(path, query) ->
+    (status, body), where a dict or list body is sent as JSON and a
+    generator of strings is sent chunk by chunk as it yields them.
+    """
+    servers = []
+
+    def start(respond):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        server.daemon_threads = True
+        server.respond = respond
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
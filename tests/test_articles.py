@@ -0,0 +1,103 @@
+import time
+import threading
+
+import pytest
+
+from articles import ArticleFetcher
+
+
+PAGE = "<html><head><title>{title}</title></head><body><article><h1>{title}</h1>{body}</article></body></html>"
+PARAGRAPH = ("<p>Shares of the company rose sharply on Tuesday after quarterly results beat expectations, "
+             "and analysts said the outlook for the rest of the year remains strong.</p>")
+
+
+class Site:
+    """Canned article pages, recording requests and how many were served at once."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.most_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, path, query):
+        with self.lock:
+            self.requests.append(path)
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if path.startswith("/missing"):
+                return 404, "not found"
+            return 200, PAGE.format(title=f"Story {path}", body=PARAGRAPH * 5)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return ArticleFetcher(cache_dir=str(tmp_path), max_workers=8, per_domain=2, timeout=2)
+
+
+def test_per_domain_concurrency_cap(http_server, fetcher):
+    first, second = Site(delay=0.2), Site(delay=0.2)
+    first_base, second_base = http_server(first), http_server(second)
+    urls = [f"{first_base}/a{i}" for i in range(6)] + [f"{second_base}/b{i}" for i in range(6)]
+
+    texts = fetcher.fetch_many(urls)
+
+    assert all(text and "quarterly results" in text for text in texts)
+    assert first.most_active == 2
+    assert second.most_active == 2
+
+
+def test_second_fetch_is_a_cache_hit(http_server, fetcher, tmp_path):
+    site = Site()
+    url = f"{http_server(site)}/story"
+    text = fetcher.fetch(url)
+
+    assert fetcher.fetch(url) == text
+    # Another fetcher over the same directory doesn't download it either
+    assert ArticleFetcher(cache_dir=str(tmp_path)).fetch(url) == text
+    assert site.requests == ["/story"]
+
+
+def test_slow_url_times_out(http_server, tmp_path):
+    site = Site(delay=1.0)
+    url = f"{http_server(site)}/slow"
+    fetcher = ArticleFetcher(cache_dir=str(tmp_path), timeout=0.2)
+
+    start = time.perf_counter()
+    assert fetcher.fetch(url) is None
+    assert time.perf_counter() - start < 0.8
+    # Failures aren't cached
+    site.delay = 0
+    assert "quarterly results" in fetcher.fetch(url)
+    assert len(site.requests) == 2
+
+
+def test_failed_download_is_none(http_server, fetcher):
+    base = http_server(Site())
+    missing, found = fetcher.fetch_many([f"{base}/missing", f"{base}/ok"])
+    assert missing is None
+    assert "quarterly results" in found
+
+
+def test_trickling_page_hits_the_deadline(http_server, tmp_path):
+    def trickle(path, query):
+        def pieces():
+            for _ in range(40):
+                time.sleep(0.05)
+                yield PARAGRAPH
+        return 200, pieces()
+
+    url = f"{http_server(trickle)}/trickle"
+    fetcher = ArticleFetcher(cache_dir=str(tmp_path), timeout=0.5)
+
+    start = time.perf_counter()
+    assert fetcher.fetch(url) is None
+    # Each read is well inside the timeout, only the deadline stops it
+    assert time.perf_counter() - start < 1.0
+    assert fetcher.cached(url) is None
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from quantalgo.backtestm import backtest_with_adaptive_strategy, calculate_advanced_indicators
+from quantalgo.benchmark import synthetic_ohlcv
+from quantalgo.engine import adaptive_strategy_kernel, new_adaptive_state, run_adaptive_backtest
+
+
+@pytest.fixture(scope="module")
+def bars():
+    # Daily-ish bars volatile enough for buys, signal sells and trailing stops
+    return calculate_advanced_indicators(synthetic_ohlcv(3000, seed=7, volatility=0.6, bars_per_day=1))
+
+
+@pytest.fixture(scope="module")
+def reference(bars):
+    return backtest_with_adaptive_strategy(bars, 100000)
+
+
+def test_matches_dataframe_loop(bars, reference):
+    expected, expected_gains = reference
+    df, gains = run_adaptive_backtest(bars, 100000)
+
+    assert len(expected_gains) > 5
+    np.testing.assert_array_equal(df["Portfolio_Value"].to_numpy(), expected["Portfolio_Value"].to_numpy())
+    assert gains == expected_gains
+
+
+@pytest.mark.parametrize("cuts", [[1], [500, 1000, 2999], [7, 8, 9, 1234, 2500]])
+def test_chunks_with_carried_state_match(bars, reference, cuts):
+    expected, expected_gains = reference
+    close, signal = bars["Close"].to_numpy(), bars["Signal"].to_numpy()
+    state = new_adaptive_state(100000)
+    values, gains = [], []
+    for part in zip(np.split(close, cuts), np.split(signal, cuts)):
+        chunk_values, chunk_gains = adaptive_strategy_kernel(*part, 100000, state=state)
+        values.append(chunk_values)
+        gains.extend(chunk_gains)
+
+    np.testing.assert_array_equal(np.concatenate(values), expected["Portfolio_Value"].to_numpy())
+    assert gains == expected_gains
+    assert state["bars"] == len(close)
@@ -0,0 +1,127 @@
+import time
+import threading
+
+import pytest
+
+from quantalgo.execution import ExecutionLoop, HttpBroker, main, start_stub
+
+
+@pytest.fixture
+def stub():
+    server = start_stub(delay=0.05)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class CountingBroker(HttpBroker):
+    """HttpBroker recording how many orders it has outstanding at once."""
+
+    def __init__(self, url, **params):
+        super().__init__(url, **params)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.most_active = 0
+
+    def place(self, order):
+        with self.lock:
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        try:
+            return super().place(order)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class FailingOnceBroker(HttpBroker):
+    def __init__(self, url):
+        super().__init__(url)
+        self.failed = False
+
+    def place(self, order):
+        if not self.failed:
+            self.failed = True
+            raise ConnectionError("broker unavailable")
+        return super().place(order)
+
+
+class FailingLaterBroker(HttpBroker):
+    """HttpBroker failing its first order once `release` is set."""
+
+    def __init__(self, url):
+        super().__init__(url)
+        self.release = threading.Event()
+        self.failed = False
+
+    def place(self, order):
+        if not self.failed:
+            self.failed = True
+            self.release.wait(5)
+            raise ConnectionError("broker unavailable")
+        return super().place(order)
+
+
+def test_flip_flops_within_a_window_coalesce(stub):
+    loop = ExecutionLoop(HttpBroker(stub.url), quantity=5, window=0.2).start()
+    for signal in (1, -1, 1):
+        loop.on_signal("TCS", signal)
+    # Back where it started: nothing to order
+    loop.on_signal("INFY", 1)
+    loop.on_signal("INFY", -1)
+    loop.stop()
+
+    assert [(order["trading_symbol"], order["transaction_type"], order["quantity"]) for order in stub.orders] \
+        == [("TCS", "buy", 5)]
+    assert loop.positions["TCS"] == 5 and loop.positions.get("INFY", 0) == 0
+    assert loop.stats["coalesced"] == 1
+    assert loop.latency.summary()["count"] == 1
+
+
+def test_orders_in_flight_are_bounded(stub):
+    stub.delay = 0.1
+    broker = CountingBroker(stub.url, pool_size=3)
+    loop = ExecutionLoop(broker, window=0.01, max_in_flight=3).start()
+    for i in range(12):
+        loop.on_signal(f"SYM{i}", 1)
+    loop.stop()
+
+    assert len(stub.orders) == 12
+    assert broker.most_active == 3
+
+
+def test_failed_order_rolls_back_the_position(stub):
+    loop = ExecutionLoop(FailingOnceBroker(stub.url), quantity=2, window=0.01).start()
+    loop.on_signal("WIPRO", 1)
+    time.sleep(0.2)
+    assert loop.positions["WIPRO"] == 0
+    assert loop.stats["failed"] == 1
+
+    # The next signal orders again
+    loop.on_signal("WIPRO", 1)
+    loop.stop()
+    assert loop.positions["WIPRO"] == 2
+    assert [order["trading_symbol"] for order in stub.orders] == ["WIPRO"]
+
+
+def test_failure_keeps_a_target_queued_while_in_flight(stub):
+    broker = FailingLaterBroker(stub.url)
+    loop = ExecutionLoop(broker, quantity=2)
+    loop.on_signal("WIPRO", 1)
+    (buy,) = loop.flush()
+    # Sell and buy again while the first buy is still in flight
+    loop.on_signal("WIPRO", -1)
+    loop.on_signal("WIPRO", 1)
+    broker.release.set()
+    assert buy.result() is None
+
+    loop.flush()
+    loop.stop()
+    assert [(order["trading_symbol"], order["transaction_type"], order["quantity"]) for order in stub.orders] \
+        == [("WIPRO", "buy", 2)]
+    assert loop.positions["WIPRO"] == 2
+
+
+def test_live_needs_symbols_unless_paper():
+    with pytest.raises(SystemExit):
+        main(["live"])
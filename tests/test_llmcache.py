@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from llmcache import FakeBackend, LLMClient
+
+
+def client(backend=None, **params):
+    return LLMClient(backend or FakeBackend(lambda model, prompt, config: f"answer to {prompt}"),
+                     path=":memory:", **params)
+
+
+def test_generate_hits_the_cache():
+    llm = client()
+    assert llm.generate("Is TCS bullish?") == "answer to Is TCS bullish?"
+    # Only the whitespace differs
+    assert llm.generate("  Is TCS\n   bullish? ") == "answer to Is TCS bullish?"
+    assert len(llm.backend.calls) == 1
+    assert llm.stats()["hits"] == 1
+
+
+def test_memoized_hit():
+    llm = client()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        return {"sentiment": "positive", "score": 0.4}
+
+    assert llm.memoize("sentiment", ["TCS.NS"], compute) == {"sentiment": "positive", "score": 0.4}
+    assert llm.memoize("sentiment", ["TCS.NS"], compute) == {"sentiment": "positive", "score": 0.4}
+    assert len(runs) == 1
+    llm.memoize("sentiment", ["INFY.NS"], compute)
+    assert len(runs) == 2
+
+
+def test_entries_expire_after_ttl():
+    llm = client(ttl=0.1)
+    llm.generate("prompt")
+    llm.generate("prompt")
+    assert len(llm.backend.calls) == 1
+
+    time.sleep(0.15)
+    llm.generate("prompt")
+    assert len(llm.backend.calls) == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    llm = client(max_entries=2)
+    for prompt in ["a", "b", "a", "c"]:
+        llm.generate(prompt)
+        time.sleep(0.01)
+    assert llm.stats()["entries"] == 2
+
+    calls = len(llm.backend.calls)
+    llm.generate("a")
+    assert len(llm.backend.calls) == calls
+    llm.generate("b")
+    assert len(llm.backend.calls) == calls + 1
+
+
+def test_failed_calls_are_not_cached():
+    failures = [RuntimeError("quota exceeded")]
+
+    def responder(model, prompt, config):
+        if failures:
+            raise failures.pop()
+        return "recovered"
+
+    llm = client(FakeBackend(responder))
+    with pytest.raises(RuntimeError):
+        llm.generate("prompt")
+    assert llm.generate("prompt") == "recovered"
+    assert llm.stats()["entries"] == 1
+
+    def broken():
+        raise ConnectionError("scrape failed")
+
+    with pytest.raises(ConnectionError):
+        llm.memoize("sentiment", ["TCS.NS"], broken)
+    assert llm.memoize("sentiment", ["TCS.NS"], lambda: "ok") == "ok"
+
+
+def test_stream_is_cached_once_complete():
+    llm = client(FakeBackend(lambda model, prompt, config: "prices look firm today"))
+    chunks = list(llm.stream("outlook?"))
+    assert len(chunks) == 4
+    assert "".join(chunks) == "prices look firm today"
+
+    # A cached answer comes back whole, and generate() shares it
+    assert list(llm.stream("outlook?")) == ["prices look firm today"]
+    assert llm.generate("outlook?") == "prices look firm today"
+    assert len(llm.backend.calls) == 1
+
+
+def test_abandoned_stream_is_not_cached():
+    llm = client(FakeBackend(lambda model, prompt, config: "prices look firm today"))
+    stream = llm.stream("outlook?")
+    assert next(stream) == "prices "
+    stream.close()
+    assert llm.stats()["entries"] == 0
+
+    assert list(llm.stream("outlook?")) == ["prices ", "look ", "firm ", "today"]
+    assert len(llm.backend.calls) == 2
+
+
+def test_memoize_skips_rejected_results():
+    llm = client()
+    results = iter([{"documents": 0}, {"documents": 2}, {"documents": 0}])
+    keep = lambda result: result["documents"] > 0
+    assert llm.memoize("sentiment", ["TCS.NS"], lambda: next(results), keep=keep) == {"documents": 0}
+    assert llm.memoize("sentiment", ["TCS.NS"], lambda: next(results), keep=keep) == {"documents": 2}
+    assert llm.memoize("sentiment", ["TCS.NS"], lambda: next(results), keep=keep) == {"documents": 2}
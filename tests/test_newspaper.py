@@ -0,0 +1,35 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+import sentiment
+from llmcache import FakeBackend, LLMClient
+
+
+@pytest.fixture
+def scraping(monkeypatch):
+    # googlesearch is only needed for live searches, which these tests replace
+    monkeypatch.setitem(sys.modules, "googlesearch", types.SimpleNamespace(search=None))
+    module = importlib.import_module("newspaperScarping")
+    llm = LLMClient(FakeBackend(lambda model, prompt, config: '{"label": "bullish", "confidence": 0.9}'),
+                    path=":memory:")
+    monkeypatch.setattr(module, "default_client", lambda: llm)
+    monkeypatch.setattr(sentiment, "default_client", lambda: llm)
+    monkeypatch.setattr(module, "search_urls", lambda query: ["https://news.example/a"])
+    return module
+
+
+def test_failed_scrape_is_not_cached(scraping, monkeypatch):
+    pages = [None]
+    monkeypatch.setattr(scraping.ArticleFetcher, "fetch_many", lambda self, urls: list(pages))
+
+    assert scraping.sentimentAnalysis("TCS")["method"] == "none"
+    # The outage passes, the next ask scrapes again instead of reusing the empty answer
+    pages[0] = "TCS wins a large order and raises its guidance for the year."
+    result = scraping.sentimentAnalysis("TCS")
+    assert (result["method"], result["label"], result["documents"]) == ("llm", "bullish", 1)
+
+    pages[0] = None
+    assert scraping.sentimentAnalysis("TCS") == result
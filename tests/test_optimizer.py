@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from optimizer import PortfolioOptimizer
+
+
+@pytest.fixture
+def optimizer():
+    rng = np.random.default_rng(3)
+    symbols = ["AAPL", "MSFT", "NVDA", "JPM", "BAC", "GS"]
+    returns = pd.DataFrame(rng.normal(0.0005, 0.015, (500, len(symbols))), columns=symbols)
+    sectors = dict.fromkeys(symbols[:3], "Technology") | dict.fromkeys(symbols[3:], "Financials")
+    optimizer = PortfolioOptimizer(returns, sectors)
+    optimizer.solve()
+    return optimizer
+
+
+def test_sector_floor_is_applied(optimizer):
+    assert optimizer.apply_edit("at least 70% in tech") == ["at least 70% in Technology"]
+    weights = optimizer.solve()
+    assert weights.iloc[:3].sum() >= 0.7 - 1e-9
+
+
+@pytest.mark.parametrize("edit", ["more pharma", "at least 20% in pharma", "cap any stock at 30%, more pharma"])
+def test_floor_for_a_sector_not_held_is_rejected(optimizer, edit):
+    with pytest.raises(ValueError, match="no Healthcare stocks"):
+        optimizer.apply_edit(edit)
+    # Nothing of the edit stays applied
+    assert optimizer.sector_floors == {}
+    assert optimizer.max_weight == 0.25
+
+
+def test_names_with_and_are_not_split():
+    rng = np.random.default_rng(5)
+    symbols = ["XOM", "CVX", "JNJ", "PG", "AAPL"]
+    returns = pd.DataFrame(rng.normal(0.0005, 0.015, (500, len(symbols))), columns=symbols)
+    sectors = {"XOM": "Energy", "CVX": "Energy", "JNJ": "Healthcare", "PG": "Consumer", "AAPL": "Technology"}
+    optimizer = PortfolioOptimizer(returns, sectors, max_weight=0.4)
+    optimizer.solve()
+
+    assert optimizer.apply_edit("at least 10% in oil and gas and no Johnson & Johnson, "
+                                "at most 5% in procter and gamble") \
+        == ["at least 10% in Energy", "no JNJ", "at most 5% in PG"]
+    assert optimizer.sector_floors == {"Energy": 0.1}
+    assert optimizer.stock_caps == {"JNJ": 0.0, "PG": 0.05}
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from quantalgo.pairs import scan_pairs, spread_statistics
+
+
+def universe(rows=300, seed=3):
+    rng = np.random.default_rng(seed)
+    market = np.cumsum(rng.normal(0, 1, rows))
+    closes = pd.DataFrame(
+        {symbol: 100 + market + np.cumsum(rng.normal(0, 0.3, rows)) for symbol in ["A", "B", "C", "LATE", "GONE"]},
+        index=pd.bdate_range("2024-01-01", periods=rows),
+    )
+    closes.iloc[:200, closes.columns.get_loc("LATE")] = np.nan  # listed 100 bars ago
+    closes.iloc[-20:, closes.columns.get_loc("GONE")] = np.nan  # delisted 20 bars ago
+    return closes
+
+
+def expected_z(closes, first, second):
+    pair = closes[[first, second]].dropna()
+    zscore, _, _ = spread_statistics((pair[first] - pair[second]).to_numpy()[:, None])
+    return zscore[-1, 0]
+
+
+def test_pairs_are_scored_over_their_own_dates():
+    closes = universe()
+    table = scan_pairs(closes, min_corr=0, processes=1)
+
+    assert table.attrs["as_of"] == closes.index[-1]
+    assert "GONE" not in set(table["Stock1"]) | set(table["Stock2"])
+    assert {frozenset(pair) for pair in zip(table["Stock1"], table["Stock2"])} == {
+        frozenset(pair) for pair in [("A", "B"), ("A", "C"), ("B", "C"), ("A", "LATE"), ("B", "LATE"), ("C", "LATE")]}
+    # Full history for A, B and C, the last 100 bars for pairs with LATE
+    for first, second, z in zip(table["Stock1"], table["Stock2"], table["Z-Score"]):
+        assert np.isclose(z, expected_z(closes, first, second))
+
+def test_process_pool_matches_one_process():
+    closes = universe()
+    pd.testing.assert_frame_equal(scan_pairs(closes, min_corr=0, processes=2, block_size=2),
+                                  scan_pairs(closes, min_corr=0, processes=1, block_size=2))
@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from quantalgo.pricestore import FixtureProvider, PriceStore, _new_meta
+
+
+def ohlcv(start, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, rows))
+    df = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                       "Volume": rng.integers(1000, 2000, rows)},
+                      index=pd.bdate_range(start, periods=rows, name="Date"))
+    return df
+
+
+class Recording(FixtureProvider):
+    def __init__(self, fixture_dir):
+        super().__init__(fixture_dir)
+        self.calls = []
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        self.calls.append({"period": period, "start": start})
+        return super().history(symbol, period, start, interval)
+
+
+def setup(tmp_path, df, max_age=3600):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir(exist_ok=True)
+    df.to_csv(fixtures / "TCS.NS.csv")
+    provider = Recording(str(fixtures))
+    return PriceStore(str(tmp_path / "store"), provider, max_age=max_age), provider
+
+
+def expected(df):
+    out = df.copy()
+    out.index = out.index.tz_localize("UTC")
+    return out
+
+
+def test_fixture_round_trip(tmp_path):
+    df = ohlcv("2023-01-02", 300)
+    store, provider = setup(tmp_path, df)
+    pd.testing.assert_frame_equal(store.history("TCS.NS", "max"), expected(df), check_freq=False)
+    # Fresh enough, served from the store alone
+    pd.testing.assert_frame_equal(store.history("TCS.NS", "max"), expected(df), check_freq=False)
+    assert len(provider.calls) == 1
+
+
+def test_refresh_downloads_only_the_tail(tmp_path):
+    df = ohlcv("2023-01-02", 300)
+    store, provider = setup(tmp_path, df.iloc[:250], max_age=0)
+    store.history("TCS.NS", "max")
+    # The last stored bar was partial, its final values differ
+    setup(tmp_path, df)
+    pd.testing.assert_frame_equal(store.history("TCS.NS", "max"), expected(df), check_freq=False)
+    assert provider.calls[-1] == {"period": None, "start": expected(df).index[249]}
+
+
+def test_period_slices_from_the_last_bar(tmp_path):
+    df = ohlcv("2023-01-02", 300)
+    store, _ = setup(tmp_path, df)
+    store.history("TCS.NS", "max")
+    month = store.history("TCS.NS", "1mo")
+    last = expected(df).index[-1]
+    pd.testing.assert_frame_equal(month, expected(df)[expected(df).index >= last - pd.DateOffset(months=1)],
+                                  check_freq=False)
+
+
+def test_files_shorter_than_meta_are_downloaded_again(tmp_path):
+    df = ohlcv("2023-01-02", 300)
+    store, provider = setup(tmp_path, df)
+    store.history("TCS.NS", "max")
+    # An interrupted write left the column shorter than meta.json says
+    with open(os.path.join(store._dir("TCS.NS", "1d"), "c3.bin"), "r+b") as f:
+        f.truncate(100 * 8)
+
+    pd.testing.assert_frame_equal(store.history("TCS.NS", "max"), expected(df), check_freq=False)
+    assert len(provider.calls) == 2
+
+
+def test_rewrite_leaves_open_maps_readable(tmp_path):
+    df = ohlcv("2023-01-02", 300)
+    store, _ = setup(tmp_path, df)
+    store.history("TCS.NS", "max")
+    mapped = store.load("TCS.NS")
+
+    shorter = ohlcv("2024-01-01", 50, seed=1)
+    store._write(store._dir("TCS.NS", "1d"), shorter, {"period": "max", **_new_meta(shorter)}, 0)
+    assert mapped["Close"].to_numpy().sum() == df["Close"].sum()
+    pd.testing.assert_frame_equal(store.load("TCS.NS").copy(), expected(shorter), check_freq=False)
@@ -0,0 +1,134 @@
+import time
+import threading
+from collections import Counter
+
+import pytest
+
+import quotes
+from quotes import QuoteService, alpha_vantage_price, yahoo_price, yahoo_prices
+
+
+class Providers:
+    """Stand-in Yahoo chart/spark and Alpha Vantage endpoints counting their requests."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.delay = {}
+        self.failing = set()
+        self.unknown = set()  # Tickers the spark endpoint doesn't know
+
+    def __call__(self, path, query):
+        endpoint = path.strip("/").split("/")[0]
+        with self.lock:
+            self.calls[endpoint] += 1
+        time.sleep(self.delay.get(endpoint, 0))
+        if endpoint in self.failing:
+            return 500, {"error": "down"}
+        if endpoint == "chart":
+            return 200, {"chart": {"result": [{"meta": {"regularMarketPrice": 101.5}}]}}
+        if endpoint == "spark":
+            return 200, {ticker: {"close": [99.0, 100.0]} for ticker in query["symbols"].split(",")
+                         if ticker not in self.unknown}
+        return 200, {"Global Quote": {"05. price": "102.25"}}
+
+
+@pytest.fixture
+def providers(http_server, monkeypatch):
+    stub = Providers()
+    base = http_server(stub)
+    monkeypatch.setattr(quotes, "YAHOO_CHART_URL", f"{base}/chart")
+    monkeypatch.setattr(quotes, "YAHOO_SPARK_URL", f"{base}/spark")
+    monkeypatch.setattr(quotes, "ALPHA_VANTAGE_URL", f"{base}/alpha")
+    return stub
+
+
+def service(**params):
+    params.setdefault("providers", [("Yahoo Finance", yahoo_price), ("Alpha Vantage", alpha_vantage_price)])
+    params.setdefault("batch_providers", [("Yahoo Finance", yahoo_prices, 20)])
+    params.setdefault("timeout", 2)
+    return QuoteService(**params)
+
+
+def test_fastest_provider_wins(providers):
+    providers.delay["chart"] = 1.0
+    quotes_service = service()
+    start = time.perf_counter()
+    quote = quotes_service.get("TCS.NS")
+
+    assert time.perf_counter() - start < 0.8
+    assert quote["source"] == "Alpha Vantage"
+    assert quote["price"] == 102.25
+    quotes_service.close()
+
+
+def test_failing_provider_falls_back(providers):
+    providers.failing.add("chart")
+    quotes_service = service()
+    assert quotes_service.get("INFY.NS")["source"] == "Alpha Vantage"
+
+    providers.failing.add("alpha")
+    assert quotes_service.get("WIPRO.NS") is None
+    quotes_service.close()
+
+
+def test_cache_expires_after_ttl(providers):
+    quotes_service = service(providers=[("Yahoo Finance", yahoo_price)], ttl=0.3)
+    first = quotes_service.get("TCS.NS")
+    assert quotes_service.get("TCS.NS") is first
+    assert providers.calls["chart"] == 1
+
+    time.sleep(0.4)
+    assert quotes_service.get("TCS.NS") is not first
+    assert providers.calls["chart"] == 2
+    quotes_service.close()
+
+
+def test_get_many_batches_and_falls_back(providers):
+    providers.unknown = {"T3", "T4"}
+    quotes_service = service(providers=[("Yahoo Finance", yahoo_price)])
+    tickers = [f"T{i}" for i in range(45)]
+    result = quotes_service.get_many(tickers)
+
+    assert list(result) == tickers
+    assert all(quote is not None for quote in result.values())
+    # Three spark requests of at most 20 tickers, single requests only for the two they missed
+    assert providers.calls["spark"] == 3
+    assert providers.calls["chart"] == 2
+    assert result["T0"]["price"] == 100.0 and result["T3"]["price"] == 101.5
+
+    # Everything is cached now
+    quotes_service.get_many(tickers)
+    assert providers.calls["spark"] == 3
+    quotes_service.close()
+
+
+def test_get_many_caps_fallback_and_cancels_on_timeout(providers):
+    providers.unknown = {f"X{i}" for i in range(100)}
+    quotes_service = service(providers=[("Yahoo Finance", yahoo_price)], fallback_limit=5)
+    quotes_service.get_many([f"X{i}" for i in range(100)])
+    assert providers.calls["chart"] == 5
+
+    # Batches slower than their deadline: what's left is cancelled, not run after the call
+    calls = []
+
+    def stuck_prices(session, tickers, timeout):
+        calls.append(tickers)
+        time.sleep(0.5)
+        return {}
+
+    slow = service(providers=[("Yahoo Finance", yahoo_price)], batch_providers=[("Stuck", stuck_prices, 1)],
+                   timeout=0.2, max_workers=2, fallback_limit=0)
+    start = time.perf_counter()
+    slow.get_many([f"S{i}" for i in range(20)])
+    assert time.perf_counter() - start < 5
+    time.sleep(0.6)
+    asked = len(calls)
+    time.sleep(0.6)
+    assert len(calls) == asked < 20
+
+    slow.timeout = 2
+    start = time.perf_counter()
+    assert slow.get("NEWONE") is not None
+    assert time.perf_counter() - start < 1
+    slow.close()
@@ -0,0 +1,59 @@
+import importlib
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import sentiment
+from llmcache import FakeBackend, LLMClient
+
+
+@pytest.fixture
+def reddit(monkeypatch):
+    # Reddit itself is replaced below, its client isn't needed
+    monkeypatch.setitem(sys.modules, "praw", types.SimpleNamespace(Reddit=None))
+    module = importlib.import_module("redditscraping")
+    llm = LLMClient(FakeBackend(lambda model, prompt, config: '{"label": "bearish", "confidence": 0.7}'),
+                    path=":memory:")
+    monkeypatch.setattr(module, "default_client", lambda: llm)
+    monkeypatch.setattr(sentiment, "default_client", lambda: llm)
+    return module
+
+
+def post(post_id, title):
+    return {"id": post_id, "subreddit": "stocks", "title": title, "body": "", "score": 10, "num_comments": 0,
+            "top_comments": [], "seen_at": 0}
+
+
+def test_search_without_posts_is_not_cached(reddit, monkeypatch):
+    posts = []
+    monkeypatch.setattr(reddit, "harvest", lambda query, subreddits, limit, comment_limit: list(posts))
+
+    assert reddit.companySentiment("Tesla")["method"] == "none"
+    posts.append(post("a1", "Tesla misses delivery estimates again, shares slide"))
+    result = reddit.companySentiment("Tesla")
+    assert (result["method"], result["label"], result["documents"]) == ("llm", "bearish", 1)
+
+    posts.clear()
+    assert reddit.companySentiment("Tesla") == result
+
+
+def test_harvests_reuse_their_clients(reddit, monkeypatch, tmp_path):
+    clients = []
+
+    class Reddit:
+        def __init__(self, **credentials):
+            clients.append(self)
+
+        def subreddit(self, name):
+            # Slow enough that every subreddit gets its own thread
+            return types.SimpleNamespace(search=lambda query, limit: time.sleep(0.05) or [])
+
+    monkeypatch.setattr(reddit.praw, "Reddit", Reddit)
+    monkeypatch.setattr(reddit, "_pool", None)
+    monkeypatch.setattr(reddit, "_local", threading.local())
+    for query in ("Tesla", "Infosys", "Apple"):
+        reddit.harvest(query, seen_path=str(tmp_path / "seen.json"))
+    assert len(clients) == len(reddit.SUBREDDITS)
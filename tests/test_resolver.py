@@ -0,0 +1,35 @@
+import pytest
+
+from resolver import MIN_CONFIDENCE, resolve
+
+
+@pytest.mark.parametrize("text, ticker", [
+    ("visa stock price", "V"),
+    ("$V", "V"),
+    ("how much is TSLA", "TSLA"),
+    ("what is the apple share price", "AAPL"),
+    ("AAPL price", "AAPL"),
+    ("infosys share", "INFY.NS"),
+])
+def test_price_questions_resolve_confidently(text, ticker):
+    resolved = resolve(text)
+    assert (resolved["intent"], resolved["ticker"]) == ("stock_price", ticker)
+    assert resolved["confidence"] >= MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("text", [
+    "I paid with my visa card",
+    "how much is a visa to India",
+    "is my ford worth fixing",
+    "ford fiesta",
+    "what is the price of apple",
+    "price of a ford fiesta",
+])
+def test_company_words_in_other_sentences_are_not_confident(text):
+    resolved = resolve(text)
+    assert resolved["intent"] == "general_query" or resolved["confidence"] < MIN_CONFIDENCE
+
+
+def test_general_questions():
+    resolved = resolve("what is a stop loss?")
+    assert resolved["intent"] == "general_query" and resolved["confidence"] >= MIN_CONFIDENCE
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from quantalgo.ticks import BarAggregator, TICK_DTYPE, synthetic_ticks
+
+
+def ticks(*rows):
+    """(token, quantity, time, price, cumulative volume) rows as TICK_DTYPE."""
+    return np.array(list(rows), dtype=TICK_DTYPE)
+
+
+def test_bars_match_groupby():
+    data = synthetic_ticks(50_000, instruments=20, rate=100, start=1_700_000_000)
+    aggregator = BarAggregator(60)
+    bars = np.concatenate([aggregator.update(data[i:i + 1000]) for i in range(0, len(data), 1000)]
+                          + [aggregator.flush()])
+
+    frame = pd.DataFrame(data)
+    frame["start"] = frame["time"] // 60 * 60
+    expected = frame.groupby(["token", "start"]).agg(
+        open=("price", "first"), high=("price", "max"), low=("price", "min"), close=("price", "last"),
+        volume=("quantity", "sum"), ticks=("price", "size")).reset_index()
+    got = pd.DataFrame(bars).sort_values(["token", "start"]).reset_index(drop=True)
+
+    assert len(got) == len(expected)
+    for column in ["token", "start", "open", "high", "low", "close", "volume", "ticks"]:
+        np.testing.assert_array_equal(got[column].to_numpy(), expected[column].to_numpy())
+    assert aggregator.late == 0
+
+
+def test_late_tick_never_reopens_a_bar():
+    aggregator = BarAggregator(60)
+    bars = [aggregator.update(ticks((1, 10, 0.0, 100.0, 10))),
+            # Another instrument moves on to the next minute, closing token 1's bar
+            aggregator.update(ticks((2, 5, 61.0, 50.0, 5))),
+            aggregator.update(ticks((1, 3, 30.0, 101.0, 13))),
+            aggregator.update(ticks((1, 2, 62.0, 102.0, 15))),
+            aggregator.flush()]
+    bars = np.concatenate(bars)
+
+    token1 = bars[bars["token"] == 1]
+    assert token1["start"].tolist() == [0.0, 60.0]
+    assert token1["close"].tolist() == [100.0, 102.0]
+    # The late tick's trades still show up through the cumulative volume
+    assert token1["volume"].tolist() == [10, 5]
+    assert aggregator.late == 1
+
+
+def test_volume_from_cumulative_day_volume():
+    aggregator = BarAggregator(60)
+    # The second tick repeats the first snapshot
+    aggregator.update(ticks((1, 10, 0.0, 100.0, 10), (1, 10, 1.0, 100.0, 10), (1, 4, 2.0, 100.0, 14)))
+    assert aggregator.flush()["volume"].tolist() == [14]
+
+    # The day volume starts again on the next day
+    bars = aggregator.update(ticks((1, 7, 86400.0, 101.0, 7)))
+    assert bars["volume"].tolist() == []
+    assert aggregator.flush()["volume"].tolist() == [7]
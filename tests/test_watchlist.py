@@ -0,0 +1,31 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+@pytest.fixture
+def watchlist(monkeypatch):
+    # Live searches and Reddit are replaced below, their clients aren't needed
+    monkeypatch.setitem(sys.modules, "googlesearch", types.SimpleNamespace(search=None))
+    monkeypatch.setitem(sys.modules, "praw", types.SimpleNamespace(Reddit=None))
+    return importlib.import_module("watchlist")
+
+
+def test_symbols_missing_from_the_ticker_file_match_their_name(watchlist):
+    index, names = watchlist.watchlist_index(["ZOMATO.NS", "TCS.NS"])
+    assert names["ZOMATO.NS"] == "zomato"
+    assert index.find("Zomato rallies after results") == ["ZOMATO.NS"]
+    assert index.find("ZOMATO.NS and TCS") == ["ZOMATO.NS", "TCS.NS"]
+
+
+def test_news_results_scale_with_the_group(watchlist, monkeypatch):
+    searches = []
+    monkeypatch.setattr(watchlist, "search_urls", lambda query, num_results: searches.append(num_results) or [])
+    monkeypatch.setattr(watchlist, "harvest", lambda query, subreddits, limit, comment_limit: [])
+    fetcher = types.SimpleNamespace(fetch_many=lambda urls: [])
+
+    watchlist.harvest_documents(["a", "b", "c", "d", "e", "f", "g"], group_size=5, news_results=4, fetcher=fetcher)
+    # Two results more than asked for, search_urls drops the first two
+    assert searches == [22, 10]
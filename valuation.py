@@ -0,0 +1,138 @@
+import re
+import csv
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from quotes import default_service
+
+
+def parse_portfolio(portfolio):
+    """
+    Symbols and target weights (summing to 1) of a portfolio JSON as
+    produced by `portfolio.py`, given as a string or an already parsed dict.
+    """
+    if isinstance(portfolio, str):
+        # Model answers often wrap the JSON in a code fence
+        portfolio = json.loads(portfolio[portfolio.index("{"):portfolio.rindex("}") + 1])
+    entries = portfolio["portfolio"]
+    symbols = [entry["stock"].split("(")[0].strip().upper() for entry in entries]
+    percentages = np.array([float(re.sub(r"[^0-9.]", "", str(entry["percentage"])) or 0)
+                            for entry in entries])
+    # The same stock listed under two sectors counts once
+    targets = pd.Series(percentages, index=symbols).groupby(level=0, sort=False).sum()
+    total = targets.sum()
+    if total <= 0:
+        raise ValueError("The portfolio has no target percentages")
+    return list(targets.index), targets.to_numpy() / total
+
+
+def read_holdings(path):
+    """{symbol: shares} from a CSV file with symbol and shares columns."""
+    with open(path, newline="") as f:
+        holdings = {}
+        for row in csv.DictReader(f):
+            symbol = row["symbol"].strip().upper()
+            holdings[symbol] = holdings.get(symbol, 0.0) + float(row["shares"])
+        return holdings
+
+
+def fetch_prices(symbols, service=None):
+    """Latest prices of `symbols` as an array, NaN where no provider answered."""
+    quotes = (service or default_service()).get_many(symbols)
+    return np.array([quotes[s]["price"] if quotes.get(s) else np.nan for s in symbols], dtype=float)
+
+
+def rebalance(symbols, targets, shares, prices, cash=0.0, tolerance=0.0, fractional=False):
+    """
+    Value the holdings and size the trades that bring them to their targets.
+
+    `targets`, `shares` and `prices` are arrays aligned with `symbols`.
+    Cash counts towards the portfolio value, so with no shares this sizes a
+    fresh investment. Positions whose weight drifted by `tolerance` or less
+    are left alone, and unless `fractional` trades are whole shares rounded
+    towards zero, so buys never spend more than the plan. Positions without
+    a price are neither valued nor traded.
+
+    Returns a DataFrame indexed by symbol with price, shares, value, weight,
+    target, drift, trade_shares and trade_value.
+    """
+    targets = np.asarray(targets, dtype=float)
+    shares = np.asarray(shares, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    priced = np.isfinite(prices) & (prices > 0)
+
+    value = np.where(priced, shares * prices, 0.0)
+    total = value.sum() + cash
+    weight = value / total if total > 0 else np.zeros_like(value)
+    drift = weight - targets
+    trade_value = np.where(priced & (np.abs(drift) > tolerance), targets * total - value, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trade_shares = np.where(priced, trade_value / prices, 0.0)
+    if not fractional:
+        trade_shares = np.trunc(trade_shares)
+        trade_value = trade_shares * np.where(priced, prices, 0.0)
+
+    return pd.DataFrame({
+        "price": prices,
+        "shares": shares,
+        "value": value,
+        "weight": weight,
+        "target": targets,
+        "drift": drift,
+        "trade_shares": trade_shares,
+        "trade_value": trade_value,
+    }, index=pd.Index(symbols, name="symbol"))
+
+
+def value_portfolio(portfolio, holdings=None, cash=0.0, service=None, **params):
+    """
+    rebalance() for a portfolio JSON and {symbol: shares} holdings, with
+    every price fetched in one batched, cached request. Holdings missing
+    from the portfolio are sold off.
+    """
+    symbols, targets = parse_portfolio(portfolio)
+    holdings = holdings or {}
+    known = set(symbols)
+    extra = [symbol for symbol in holdings if symbol not in known]
+    symbols = symbols + extra
+    targets = np.concatenate([targets, np.zeros(len(extra))])
+    shares = np.array([holdings.get(symbol, 0.0) for symbol in symbols], dtype=float)
+    return rebalance(symbols, targets, shares, fetch_prices(symbols, service), cash, **params)
+
+
+def describe(table):
+    """Holdings value, the net cash the trades need and the orders, as text."""
+    total = table["value"].sum()
+    orders = table[table["trade_shares"] != 0]
+    lines = [f"Holdings value: ${total:,.2f}, net cash needed for trades: ${orders['trade_value'].sum():,.2f}"]
+    for symbol, row in orders.iterrows():
+        side = "Buy" if row.trade_shares > 0 else "Sell"
+        lines.append(f"{side} {abs(row.trade_shares):g} {symbol} at ${row.price:,.2f} "
+                     f"(weight {row.weight:.1%} -> target {row.target:.1%})")
+    missing = table.index[~np.isfinite(table["price"])]
+    if len(missing):
+        lines.append("No price for: " + ", ".join(missing))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Value a portfolio JSON and list the trades to rebalance it.")
+    parser.add_argument("portfolio", help="portfolio JSON file from portfolio.py")
+    parser.add_argument("--holdings", help="CSV file with symbol and shares columns")
+    parser.add_argument("--cash", type=float, default=0.0, help="cash to invest as well")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="weight drift left alone, e.g. 0.01")
+    parser.add_argument("--fractional", action="store_true", help="allow fractional shares")
+    args = parser.parse_args(argv)
+
+    with open(args.portfolio) as f:
+        portfolio = f.read()
+    holdings = read_holdings(args.holdings) if args.holdings else {}
+    table = value_portfolio(portfolio, holdings, args.cash, tolerance=args.tolerance, fractional=args.fractional)
+    print(describe(table))
+
+
+if __name__ == "__main__":
+    main()
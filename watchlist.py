@@ -0,0 +1,193 @@
+import os
+import csv
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from articles import ArticleFetcher
+from newspaperScarping import search_urls
+from redditscraping import SUBREDDITS, harvest, post_text
+from resolver import TickerIndex, read_tickers
+from sentiment import analyze
+
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "qiab")
+STATE_PATH = os.getenv("WATCHLIST_STATE_PATH", os.path.join(CACHE_DIR, "watchlist_state.json"))
+STORE_PATH = os.getenv("WATCHLIST_STORE_PATH", os.path.join(CACHE_DIR, "sentiment.csv"))
+STORE_COLUMNS = ["time", "symbol", "label", "confidence", "documents", "method"]
+DOC_MAX_AGE = 7 * 24 * 3600
+
+
+def watchlist_index(symbols):
+    """
+    TickerIndex over just the watchlist, plus the search name of every symbol.
+
+    Symbols missing from the bundled ticker file are matched and searched by
+    the symbol without its exchange suffix, "ZOMATO.NS" as "zomato".
+    """
+    known = {row["symbol"]: row for row in read_tickers()}
+    rows = [known.get(symbol) or {"symbol": symbol, "name": symbol.split(".")[0],
+                                  "aliases": symbol.split(".")[0].lower()} for symbol in symbols]
+    names = {row["symbol"]: (row["aliases"].split("|")[0] or row["name"]) for row in rows}
+    return TickerIndex(rows), names
+
+
+def _any_of(names):
+    return " OR ".join(f'"{name}"' if " " in name else name for name in names)
+
+
+def harvest_documents(names, group_size=5, news_results=8, reddit_limit=3, comment_limit=2, fetcher=None):
+    """
+    One news and Reddit pass for the whole watchlist.
+
+    Companies are searched `group_size` at a time with OR queries, asking
+    for `news_results` articles and `reddit_limit` posts per company in the
+    group. Every article is downloaded once however many searches returned
+    it. Returns {document id: text}; Reddit ids include the comment count
+    so a thread with new comments counts as a new document.
+    """
+    groups = [names[i:i + group_size] for i in range(0, len(names), group_size)]
+    urls = {}
+    for group in groups:
+        try:
+            # search_urls drops the first two results
+            urls.update(dict.fromkeys(search_urls("news about stocks of " + _any_of(group), news_results * len(group) + 2)))
+        except Exception as e:
+            print(f"Error searching news for {group}: {e}")
+
+    fetcher = fetcher or ArticleFetcher()
+    documents = {url: text for url, text in zip(urls, fetcher.fetch_many(list(urls))) if text}
+
+    for group in groups:
+        try:
+            entries = harvest(_any_of(group), SUBREDDITS, reddit_limit * len(group), comment_limit)
+        except Exception as e:
+            print(f"Error harvesting Reddit for {group}: {e}")
+            continue
+        for entry in entries:
+            documents[f"reddit:{entry['id']}:{entry['num_comments']}"] = post_text(entry)
+    return documents
+
+
+def load_state(path=STATE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"documents": {}, "last": {}}
+
+
+def save_state(state, path=STATE_PATH):
+    cutoff = time.time() - DOC_MAX_AGE
+    state["documents"] = {doc: seen for doc, seen in state["documents"].items() if seen >= cutoff}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def append_rows(rows, path=STORE_PATH):
+    """Append sentiment rows to the CSV time series at `path`."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    new = not os.path.exists(path)
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, STORE_COLUMNS)
+        if new:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def load_series(symbol=None, path=STORE_PATH):
+    """Stored sentiment rows, optionally for one symbol only."""
+    try:
+        with open(path, newline="") as f:
+            return [row for row in csv.DictReader(f) if symbol is None or row["symbol"] == symbol]
+    except OSError:
+        return []
+
+
+def run_once(symbols, state_path=STATE_PATH, store_path=STORE_PATH, max_workers=8, documents=None, **harvest_params):
+    """
+    One scheduled pass: harvest for the whole watchlist, map each new
+    document to every watched company it mentions, score only those and
+    append one row per company to the store.
+
+    Companies without new documents keep their previous label ("carried").
+    `documents` skips the harvest and uses the given {id: text} instead.
+    """
+    index, names = watchlist_index(symbols)
+    if documents is None:
+        documents = harvest_documents(list(names.values()), **harvest_params)
+
+    state = load_state(state_path)
+    new = {doc: text for doc, text in documents.items() if doc not in state["documents"]}
+    mentions = {symbol: [] for symbol in symbols}
+    for text in new.values():
+        for symbol in index.find(text):
+            mentions[symbol].append(text)
+
+    def score(symbol):
+        return analyze(mentions[symbol], subject=names[symbol]) if mentions[symbol] else None
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        results = dict(zip(symbols, pool.map(score, symbols)))
+
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    rows = []
+    for symbol in symbols:
+        result = results[symbol]
+        if result is not None:
+            state["last"][symbol] = {"label": result["label"], "confidence": result["confidence"]}
+            rows.append({"time": now, "symbol": symbol, "label": result["label"],
+                         "confidence": round(result["confidence"], 4), "documents": len(mentions[symbol]),
+                         "method": result["method"]})
+        elif symbol in state["last"]:
+            last = state["last"][symbol]
+            rows.append({"time": now, "symbol": symbol, "label": last["label"],
+                         "confidence": round(last["confidence"], 4), "documents": 0, "method": "carried"})
+
+    append_rows(rows, store_path)
+    # Documents are only marked seen once their scores are stored
+    seen = time.time()
+    state["documents"].update((doc, seen) for doc in new)
+    save_state(state, state_path)
+    return rows
+
+
+def run_forever(symbols, interval=3600, **params):
+    """run_once every `interval` seconds."""
+    while True:
+        start = time.time()
+        try:
+            rows = run_once(symbols, **params)
+            print(f"Scored {sum(row['method'] != 'carried' for row in rows)} of {len(symbols)} companies "
+                  f"in {time.time() - start:.0f}s")
+        except Exception as e:
+            print(f"Watchlist run failed: {e}")
+        time.sleep(max(0.0, interval - (time.time() - start)))
+
+
+def read_watchlist(path):
+    with open(path) as f:
+        return list(dict.fromkeys(symbol.strip() for line in f for symbol in line.split(",") if symbol.strip()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hourly sentiment for a watchlist of symbols.")
+    parser.add_argument("watchlist", help="file of symbols, one per line or comma separated")
+    parser.add_argument("--interval", type=float, default=3600)
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args(argv)
+
+    symbols = read_watchlist(args.watchlist)
+    if args.once:
+        for row in run_once(symbols):
+            print(row)
+    else:
+        run_forever(symbols, args.interval)
+
+
+if __name__ == "__main__":
+    main()